@@ -0,0 +1,78 @@
+# benchmarks/bench_archive.py
+"""
+Live-store cost before and after archiving finished seasons (src/seasons.py)
+on a synthetic store spanning several seasons: store size, parsing it
+(load_data() on a changed store) and rewriting it (every edit), plus opening an
+archived meet cold (its season's file is read) and warm (from memory).
+
+Run from the repository root:
+    python benchmarks/bench_archive.py [--meets 40] [--students 60] [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _live_costs(repeat):
+    from src.data_manager import _read_store, load_data, save_data, store_file_path
+    data = load_data()
+    return (os.path.getsize(store_file_path()) / 1024,
+            _best_ms(lambda: _read_store(store_file_path()), repeat),
+            _best_ms(lambda: save_data(data), repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live store cost before/after archiving finished seasons")
+    parser.add_argument("--meets", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_archive_", meets=args.meets, students=args.students)
+    try:
+        from src import archive
+        from src.data_manager import get_meet, load_data
+        from src.seasons import archive_season, live_seasons
+
+        before = _live_costs(args.repeat)
+        seasons = live_seasons(load_data())
+        # Keep the latest season live, as during a season.
+        for season in list(seasons)[:-1]:
+            archive_season(season)
+        after = _live_costs(args.repeat)
+        print(f"{len(seasons)} seasons, {sum(seasons.values())} meets; {len(seasons) - 1} archived")
+        print(f"{'live store':12}{'size':>10}{'parse':>11}{'save':>11}")
+        for label, (size, parse, save) in (("all seasons", before), ("archived", after)):
+            print(f"{label:12}{size:>8.0f}kB{parse:>9.1f}ms{save:>9.1f}ms")
+
+        archive_bytes = sum(os.path.getsize(os.path.join(archive.archive_dir(), name))
+                            for name in os.listdir(archive.archive_dir()))
+        print(f"archive on disk: {archive_bytes / 1024:.0f}kB (index included)")
+        meet_id = archive.read_index()["seasons"][next(iter(seasons))]["meets"][0]["id"]
+        archive._cache.clear()
+        cold = _best_ms(lambda: get_meet(meet_id), 1)
+        warm = _best_ms(lambda: get_meet(meet_id), args.repeat)
+        print(f"open archived meet: cold {cold:.1f}ms   warm {warm:.2f}ms")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/bench_async_uploads.py
+"""
+Load test for the ASGI serving mode: page-view latency while many GPT-backed
+uploads are in flight.
+
+Run from the repository root (needs uvicorn and httpx):
+    python benchmarks/bench_async_uploads.py [--uploads 40] [--latency 2] [--threads 8]
+
+Both modes are served by uvicorn with the same worker thread pool and talk to
+a local fake model (benchmarks/fake_openai.py) that takes `--latency` seconds:
+
+  sync   every route runs on the pool as plain Flask, so each upload holds a
+         thread for the whole model round-trip (Flask's sync model)
+  async  the upload flows await the model call on the event loop (src/asgi.py)
+
+For each mode it reports page-view latency with no uploads and while
+`--uploads` uploads are in flight. In async mode the two should stay close.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(asgi_app):
+    import uvicorn
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port,
+                                           log_level="warning", lifespan="on"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def _summary(latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    return f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  max {latencies[-1] * 1000:7.1f} ms  (n={len(latencies)})"
+
+
+async def _page_views(client, url, stop, interval=0.05):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def _run_mode(base_url, page_url, upload_url, uploads, baseline_seconds):
+    import httpx
+    limits = httpx.Limits(max_connections=uploads + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_page_views(client, page_url, stop))
+        await asyncio.sleep(baseline_seconds)
+        stop.set()
+        idle = await sampler
+
+        async def upload(i):
+            files = {"scoreFile": (f"sheet{i}.png", os.urandom(2048), "image/png")}
+            data = {"studentName": f"Student {i}", "gradeLevel": "junior", "scoreMode": "image"}
+            response = await client.post(upload_url, data=data, files=files)
+            return response.status_code
+
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_page_views(client, page_url, stop))
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(upload(i) for i in range(uploads)))
+        upload_seconds = time.perf_counter() - started
+        stop.set()
+        busy = await sampler
+    return idle, busy, upload_seconds, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page-view latency under concurrent GPT-backed uploads")
+    parser.add_argument("--uploads", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=2.0, help="fake model latency (seconds)")
+    parser.add_argument("--threads", type=int, default=8, help="worker threads in both modes")
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_async_")
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), os.path.join(workdir, "data"))
+    os.chdir(workdir)
+
+    from fake_openai import FakeOpenAIServer
+    fake = FakeOpenAIServer(latency=args.latency).start()
+    os.environ["OPENAI_BASE_URL"] = fake.base_url
+    os.environ["OPENAI_API_KEY"] = "fake-key"
+
+    from src.app import create_app
+    from src.asgi import AsyncUploadApp
+    from src.data_manager import create_meet, create_event, get_event, update_event_num_questions
+
+    class SyncUploadApp(AsyncUploadApp):
+        """Serves the upload routes like every other route: blocking on the pool."""
+        def _flow_endpoint(self, environ):
+            return None
+
+    try:
+        for mode in args.modes.split(","):
+            meet_id = create_meet(f"Bench {mode}")
+            event_id = create_event(meet_id, "Individual Algebra")
+            update_event_num_questions(meet_id, event_id, 30)
+            app_class = AsyncUploadApp if mode == "async" else SyncUploadApp
+            server, base_url = _serve(app_class(create_app(), worker_threads=args.threads))
+            page_url = f"/meet/{meet_id}/event/{event_id}"
+            upload_url = f"{page_url}/upload_single_student_score"
+            idle, busy, upload_seconds, statuses = asyncio.run(
+                _run_mode(base_url, page_url, upload_url, args.uploads, baseline_seconds=1.0))
+            server.should_exit = True
+            print(f"[{mode:5}] page views, idle          : {_summary(idle)}")
+            print(f"[{mode:5}] page views, {args.uploads:3d} uploads   : {_summary(busy)}")
+            recorded = len(get_event(meet_id, event_id).participants)
+            print(f"[{mode:5}] {args.uploads} uploads finished in {upload_seconds:.1f}s "
+                  f"(statuses: {sorted(set(statuses))}, participants recorded: {recorded})\n")
+            time.sleep(0.5)
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# benchmarks/bench_chunked_uploads.py
+"""
+Resumable chunked uploads (src/chunked_uploads.py) against one multipart
+upload of the whole file: time and peak Python memory (tracemalloc) on the
+server side while a large scan is stored, for several numbers of chunks in
+flight at once.
+
+Then the same file over a flaky connection that drops with probability
+--drop-rate per MB sent: bytes sent with chunks (only the chunk in flight is
+resent, through the real routes) against a multipart upload that has to start
+over from zero after every drop (modelled, with the same drop rate).
+
+Run from the repository root:
+    python benchmarks/bench_chunked_uploads.py [--size-mb 64] [--drop-rate 0.05] [--seed 1]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MB = 1024 * 1024
+# The modelled multipart upload gives up after this many restarts.
+MAX_RESTARTS = 100
+
+
+def _measure(fn):
+    """(result, seconds, peak MB) of fn()."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / MB
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _chunk_crcs(path, chunk_size):
+    with open(path, "rb") as f:
+        return [f"{zlib.crc32(block):08x}" for block in iter(lambda: f.read(chunk_size), b"")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked resumable uploads vs. one multipart body")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--drop-rate", type=float, default=0.05, help="Chance of a dropped connection per MB sent")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_uploads_", meets=1, students=5)
+    try:
+        from werkzeug.datastructures import FileStorage
+        from werkzeug.test import EnvironBuilder, encode_multipart, run_wsgi_app
+        from src.app import create_app, save_uploaded_files
+        from src.chunked_uploads import UPLOAD_CHUNK_SIZE
+        from flask import request
+
+        app = create_app()
+        size = args.size_mb * MB
+        scan = os.path.join(workdir, "scan.jpg")
+        with open(scan, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(MB))
+        crcs = _chunk_crcs(scan, UPLOAD_CHUNK_SIZE)
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, "client"):
+                local.client = app.test_client()
+            return local.client
+
+        def put_chunk(upload_id, index, sent_bytes=None):
+            """PUTs chunk `index` read from the file; sent_bytes < its length simulates a drop mid-chunk."""
+            offset = index * UPLOAD_CHUNK_SIZE
+            length = min(UPLOAD_CHUNK_SIZE, size - offset)
+            length = length if sent_bytes is None else sent_bytes
+            environ = EnvironBuilder(f"/uploads/{upload_id}/chunks/{index}", method="PUT",
+                                     headers={"X-Chunk-CRC32": crcs[index]}).get_environ()
+            with open(scan, "rb") as f:
+                f.seek(offset)
+                # The body streamed from the file, as a server would hand it over.
+                environ.update({"wsgi.input": f, "CONTENT_LENGTH": str(length)})
+                environ.pop("wsgi.input_terminated", None)
+                app_iter, status, _ = run_wsgi_app(app, environ)
+                b"".join(app_iter)
+            return status.startswith("200"), length
+
+        def chunked(parallel):
+            upload_id = client().post("/uploads", json={"filename": "scan.jpg", "size": size}).json["uploadId"]
+            with ThreadPoolExecutor(parallel) as pool:
+                assert all(ok for ok, _ in pool.map(lambda i: put_chunk(upload_id, i), range(len(crcs))))
+            client().post(f"/uploads/{upload_id}/complete")
+            with app.test_request_context(method="POST", data={"filesUploadId": upload_id}):
+                return save_uploaded_files([], "exams", request.form.getlist("filesUploadId"))
+
+        # The multipart body is built before timing; the server side reads it from a file.
+        body_path = os.path.join(workdir, "body")
+        with open(scan, "rb") as f:
+            boundary, body = encode_multipart({"files": FileStorage(f, "scan.jpg")})
+        with open(body_path, "wb") as f:
+            f.write(body)
+        del body
+
+        def multipart():
+            with open(body_path, "rb") as f:
+                with app.test_request_context(method="POST", input_stream=f, content_length=os.path.getsize(body_path),
+                                              content_type=f"multipart/form-data; boundary={boundary}"):
+                    return save_uploaded_files(request.files.getlist("files"), "exams")
+
+        print(f"{args.size_mb} MB file, {len(crcs)} chunks of {UPLOAD_CHUNK_SIZE // 1024} kB")
+        print(f"{'variant':28}{'time':>10}{'MB/s':>9}{'peak mem':>11}")
+        variants = [("multipart, whole body", multipart)]
+        variants += [(f"chunked, {n} in flight", lambda n=n: chunked(n)) for n in (1, 2, 4, 8)]
+        for label, fn in variants:
+            shutil.rmtree(os.path.join(workdir, "uploads", "exams"), ignore_errors=True)
+            paths, elapsed, peak = _measure(fn)
+            assert len(paths) == 1, label
+            print(f"{label:28}{elapsed * 1000:>8.0f}ms{args.size_mb / elapsed:>9.0f}{peak:>9.2f}MB")
+
+        # Flaky connection.
+        rng = random.Random(args.seed)
+        drop_per_byte = args.drop_rate / MB
+
+        def bytes_before_drop():
+            """Bytes a connection carries before it drops (geometric, per byte)."""
+            return int(rng.expovariate(drop_per_byte)) if drop_per_byte else float("inf")
+
+        upload_id = client().post("/uploads", json={"filename": "scan.jpg", "size": size}).json["uploadId"]
+        chunked_sent = drops = 0
+        budget = bytes_before_drop()
+        pending = list(range(len(crcs)))
+        while pending:
+            index = pending[0]
+            length = min(UPLOAD_CHUNK_SIZE, size - index * UPLOAD_CHUNK_SIZE)
+            if budget < length:
+                ok, sent = put_chunk(upload_id, index, sent_bytes=budget)
+                drops += 1
+                budget = bytes_before_drop()
+            else:
+                ok, sent = put_chunk(upload_id, index)
+                budget -= length
+            chunked_sent += sent
+            if ok:
+                pending.pop(0)
+        assert client().post(f"/uploads/{upload_id}/complete").json["complete"]
+
+        restart_sent = restarts = 0
+        finished = False
+        while restarts < MAX_RESTARTS:
+            budget = bytes_before_drop()
+            if budget >= size:
+                restart_sent += size
+                finished = True
+                break
+            restart_sent += budget
+            restarts += 1
+
+        print(f"\nflaky connection, {args.drop_rate:.0%} chance of a drop per MB:")
+        print(f"  chunked, resumed:           {chunked_sent / MB:>8.1f} MB sent ({drops} drops, "
+              f"{chunked_sent / size:.2f}x the file)")
+        print(f"  multipart, restart at zero: {restart_sent / MB:>8.1f} MB sent ({restarts} restarts, "
+              f"{restart_sent / size:.2f}x the file)" + ("" if finished else ", gave up"))
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
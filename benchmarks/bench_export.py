@@ -0,0 +1,88 @@
+# benchmarks/bench_export.py
+"""
+Analytics exports (src/analytics_export.py) over a synthetic store spanning
+several seasons, all but the latest archived: rows, output size, time and peak
+Python memory (tracemalloc) of the streamed export, against building the whole
+table first and writing it in one piece (what a non-streaming endpoint does).
+
+Run from the repository root:
+    python benchmarks/bench_export.py [--meets 40] [--students 60]
+"""
+import argparse
+import csv
+import io
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _measure(fn):
+    """(result, seconds, peak MB) of fn()."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamed vs. materialized analytics exports")
+    parser.add_argument("--meets", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60)
+    args = parser.parse_args()
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_export_", meets=args.meets, students=args.students)
+    try:
+        from src.analytics_export import COLUMNS, _csv_value, export_chunks, export_rows
+        from src.archive import load_season
+        from src.data_manager import load_data
+        from src.seasons import archive_season, live_seasons
+
+        seasons = list(live_seasons(load_data()))
+        for season in seasons[:-1]:
+            archive_season(season)
+        # Warm the store and every season's file, so both variants start from the same cache.
+        for season in seasons[:-1]:
+            load_season(season)
+
+        def streamed(dataset, file_format):
+            size = 0
+            for chunk in export_chunks(dataset, file_format):
+                size += len(chunk)  # a response would send it and let it go here
+            return size
+
+        def materialized(dataset):
+            names = [name for name, _ in COLUMNS[dataset]]
+            rows = list(export_rows(dataset))
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            writer.writerows([_csv_value(row[name]) for name in names] for row in rows)
+            return len(buffer.getvalue().encode("utf-8"))
+
+        print(f"{len(seasons)} seasons, {args.meets} meets, {len(seasons) - 1} seasons archived")
+        print(f"{'dataset':18}{'variant':18}{'rows':>9}{'size':>10}{'time':>10}{'peak mem':>11}")
+        for dataset in COLUMNS:
+            rows = sum(1 for _ in export_rows(dataset))
+            variants = [("streamed csv", lambda: streamed(dataset, "csv")),
+                        ("streamed jsonl", lambda: streamed(dataset, "jsonl")),
+                        ("materialized csv", lambda: materialized(dataset))]
+            for label, fn in variants:
+                size, elapsed, peak = _measure(fn)
+                print(f"{dataset:18}{label:18}{rows:>9}{size / 1024:>8.0f}kB{elapsed * 1000:>8.0f}ms{peak:>9.1f}MB")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
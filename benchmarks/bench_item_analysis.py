@@ -0,0 +1,54 @@
+# benchmarks/bench_item_analysis.py
+"""
+Times item analysis (difficulty, discrimination, topic rollups) across every
+event of a synthetic store, cold and cached.
+
+Run from the repository root:
+    python benchmarks/bench_item_analysis.py [--meets 40] [--students 60] [--questions 30]
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item analysis over the whole store")
+    parser.add_argument("--meets", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--questions", type=int, default=30)
+    args = parser.parse_args()
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_items_", meets=args.meets, students=args.students,
+                           questions=args.questions)
+    try:
+        from src.data_manager import load_data
+        from src.dashboard_logic import get_item_analysis
+
+        load_data()  # registers students once, like the first request would
+        started = time.perf_counter()
+        analysis = get_item_analysis()
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(100):
+            get_item_analysis()
+        cached = (time.perf_counter() - started) / 100
+
+        questions = sum(len(e["questions"]) for e in analysis["events"].values())
+        print(f"{len(analysis['events'])} events, {questions} questions, {len(analysis['topics'])} topics")
+        print(f"cold (load + analyze): {cold * 1000:8.1f} ms")
+        print(f"cached               : {cached * 1000:8.3f} ms")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
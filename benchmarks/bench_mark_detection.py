@@ -0,0 +1,103 @@
+# benchmarks/bench_mark_detection.py
+"""
+Local answer-sheet scoring (src/mark_detection.py) against a labeled sample
+set: how many sheets are scored locally, how accurate those scores are, why
+the rest go to GPT, and the latency per sheet compared with sending every
+sheet to GPT.
+
+The sample set is a folder of images with labels.jsonl (see
+synthetic_sheets.py); without --samples a synthetic set is generated. The
+GPT round-trip is not called; use --gpt-latency with a figure from
+/api/gpt_stats.
+
+Run from the repository root (needs numpy and Pillow):
+    python benchmarks/bench_mark_detection.py [--samples DIR] [--count 100] [--seed 1] [--gpt-latency 4.0]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local answer-sheet scoring accuracy and latency")
+    parser.add_argument("--samples", help="Folder with sheet images and labels.jsonl (default: synthetic)")
+    parser.add_argument("--count", type=int, default=100, help="Synthetic sheets to generate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gpt-latency", type=float, default=4.0, help="Seconds per GPT parse, for the comparison")
+    args = parser.parse_args()
+
+    from src.mark_detection import score_sheet
+
+    folder = args.samples
+    if folder is None:
+        from synthetic_sheets import write_sample_set
+        folder = tempfile.mkdtemp(prefix="bench_sheets_")
+        print(f"Generating {args.count} synthetic sheets...")
+        write_sample_set(folder, args.count, seed=args.seed)
+    try:
+        with open(os.path.join(folder, "labels.jsonl"), encoding="utf-8") as f:
+            labels = [json.loads(line) for line in f if line.strip()]
+
+        # Build the templates before timing.
+        score_sheet(os.path.join(folder, labels[0]["file"]), labels[0]["numQuestions"])
+
+        latencies = []
+        local = exact = questions = questions_right = 0
+        miscounted = miscounted_caught = 0
+        reasons = Counter()
+        for label in labels:
+            started = time.perf_counter()
+            result = score_sheet(os.path.join(folder, label["file"]), label["numQuestions"])
+            latencies.append(time.perf_counter() - started)
+            true_total = len(label["correctQuestions"])
+            if label.get("total", true_total) != true_total:
+                miscounted += 1
+                miscounted_caught += result.reason is not None
+            if result.reason:
+                reasons[result.reason.split(" (")[0] if "total says" not in result.reason else "total disagrees"] += 1
+                continue
+            local += 1
+            truth = {q: True for q in label["correctQuestions"]}
+            truth.update({q: False for q in label["incorrectQuestions"]})
+            read = {q: True for q in result.correctQuestions}
+            read.update({q: False for q in result.incorrectQuestions})
+            exact += read == truth
+            questions += label["numQuestions"]
+            questions_right += sum(read.get(q) == truth.get(q) for q in range(1, label["numQuestions"] + 1))
+
+        n = len(labels)
+        print(f"{n} sheets: {local} scored locally ({local / n:.0%}), {n - local} sent to GPT")
+        if local:
+            print(f"locally scored sheets exactly right: {exact}/{local} ({exact / local:.1%}); "
+                  f"questions right: {questions_right}/{questions} ({questions_right / questions:.2%})")
+        if miscounted:
+            print(f"sheets with a miscounted total: {miscounted}, sent to GPT: {miscounted_caught}")
+        for reason, count in reasons.most_common():
+            print(f"  to GPT: {reason}: {count}")
+        print(f"local scoring per sheet: p50 {_percentile(latencies, 50) * 1000:.0f}ms   "
+              f"p95 {_percentile(latencies, 95) * 1000:.0f}ms   max {max(latencies) * 1000:.0f}ms")
+        mean_local = sum(latencies) / n
+        mixed = mean_local + (n - local) / n * args.gpt_latency
+        print(f"mean time per sheet: every sheet to GPT {args.gpt_latency:.2f}s   "
+              f"local first, GPT fallback {mixed:.2f}s")
+    finally:
+        if args.samples is None:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_model.py
+"""
+Compares the store's meets held as plain JSON dicts with the typed __slots__
+model (src/models.py): memory per event and per participant, and the time of
+dashboard_logic's aggregation loops with dict lookups vs. attribute access.
+
+Run from the repository root:
+    python benchmarks/bench_model.py [--meets 40] [--students 60] [--questions 30]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _allocated(build):
+    """(result, bytes still allocated by build())."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def _tally_dicts(meets, q2ids):
+    correct = defaultdict(int)
+    attempted = defaultdict(int)
+    for meet in meets:
+        for event in meet["events"]:
+            topics = q2ids[event["id"]]
+            for participant in event.get("participants", []):
+                for q in participant.get("correctQuestions", []):
+                    for t in topics.get(q, ()):
+                        correct[t] += 1
+                        attempted[t] += 1
+                for q in participant.get("incorrectQuestions", []):
+                    for t in topics.get(q, ()):
+                        attempted[t] += 1
+    return correct, attempted
+
+
+def _tally_models(meets, q2ids):
+    correct = defaultdict(int)
+    attempted = defaultdict(int)
+    for meet in meets:
+        for event in meet.events:
+            topics = q2ids[event.id]
+            for participant in event.participants:
+                for q in participant.correctQuestions:
+                    for t in topics.get(q, ()):
+                        correct[t] += 1
+                        attempted[t] += 1
+                for q in participant.incorrectQuestions:
+                    for t in topics.get(q, ()):
+                        attempted[t] += 1
+    return correct, attempted
+
+
+def _totals_dicts(meets):
+    totals = defaultdict(lambda: [0, 0])
+    for meet in meets:
+        for event in meet["events"]:
+            for participant in event.get("participants", []):
+                row = totals[participant.get("studentId") or participant["studentName"]]
+                row[0] += len(participant.get("correctQuestions", []))
+                row[1] += len(participant.get("incorrectQuestions", []))
+    return totals
+
+
+def _totals_models(meets):
+    totals = defaultdict(lambda: [0, 0])
+    for meet in meets:
+        for event in meet.events:
+            for participant in event.participants:
+                row = totals[participant.studentId or participant.studentName]
+                row[0] += len(participant.correctQuestions)
+                row[1] += len(participant.incorrectQuestions)
+    return totals
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dict vs. __slots__ model memory and access speed")
+    parser.add_argument("--meets", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from synthetic_store import build_store
+    from src.models import Event, Meet, Participant
+
+    meets = build_store(meets=args.meets, students=args.students, questions=args.questions)["meets"]
+    events = [e for m in meets for e in m["events"]]
+    participants = [p for e in events for p in e["participants"]]
+    # Events are measured without their participants, which are measured on their own.
+    bare_events = [dict(e, participants=[]) for e in events]
+    print(f"{len(meets)} meets, {len(events)} events, {len(participants)} participants")
+
+    print(f"{'memory':12}{'dicts':>10}{'models':>10}")
+    for label, items, cls in (("event", bare_events, Event), ("participant", participants, Participant)):
+        text = json.dumps(items)
+        _, dict_bytes = _allocated(lambda: json.loads(text))
+        _, model_bytes = _allocated(lambda: [cls.from_dict(d) for d in json.loads(text)])
+        print(f"{label:12}{dict_bytes / len(items):>9.0f}B{model_bytes / len(items):>9.0f}B")
+
+    text = json.dumps(meets)
+    dict_meets = json.loads(text)
+    model_meets = [Meet.from_dict(m) for m in json.loads(text)]
+    assert [m.to_dict() for m in model_meets] == dict_meets
+
+    # Per-student totals (the get_individual_breakdowns loop) are bound by field
+    # access; the topic tally (get_topic_accuracy_across_meets) mostly by its
+    # per-question inner loop. Same question -> topics maps for both versions.
+    q2ids = {e["id"]: {q["questionNumber"]: tuple(q["topics"]) for q in e["examTopics"]} for e in events}
+    for label, with_dicts, with_models in (
+            ("student totals", lambda: _totals_dicts(dict_meets), lambda: _totals_models(model_meets)),
+            ("topic tally", lambda: _tally_dicts(dict_meets, q2ids), lambda: _tally_models(model_meets, q2ids))):
+        dict_result, dict_time = _best_of(with_dicts, args.repeat)
+        model_result, model_time = _best_of(with_models, args.repeat)
+        assert dict_result == model_result
+        print(f"{label:15} dict lookups {dict_time * 1000:7.2f} ms   attributes {model_time * 1000:7.2f} ms"
+              f"  ({dict_time / model_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
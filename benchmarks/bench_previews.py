@@ -0,0 +1,123 @@
+# benchmarks/bench_previews.py
+"""
+Thumbnails and previews of uploaded images (src/previews.py) for an event
+with many score sheets photographed on phones: bytes transferred to review
+the event page (every thumbnail) and to open each preview, against serving the
+originals, and the time per image when it is made (cold) and when it comes
+from the cache (warm). Also times thumbnails made without JPEG draft decoding,
+i.e. decoding the full photo first.
+
+Run from the repository root (needs Pillow):
+    python benchmarks/bench_previews.py [--sheets 40] [--width 3024] [--height 4032]
+"""
+import argparse
+import io
+import os
+import random
+import re
+import shutil
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MB = 1024 * 1024
+
+
+def _photo(size, rng):
+    """A JPEG that compresses like a phone photo of a filled-in sheet: lines of writing, uneven light, sensor noise."""
+    from PIL import Image, ImageDraw
+    page = Image.linear_gradient("L").resize(size).point(lambda v: 200 + v // 6)
+    draw = ImageDraw.Draw(page)
+    width, height = size
+    y = height // 12
+    while y < height * 0.9:
+        x = width // 10
+        while x < width * 0.85:
+            word = rng.randint(width // 40, width // 10)
+            draw.rectangle((x, y, x + word, y + height // 90), fill=rng.randint(20, 90))
+            x += word + width // 60
+        y += height // 30
+    noise = Image.effect_noise(size, 25)
+    photo = Image.blend(page, noise, 0.12).convert("RGB")
+    buffer = io.BytesIO()
+    photo.save(buffer, "JPEG", quality=90)
+    buffer.seek(0)
+    return buffer
+
+
+def _fetch_all(client, urls):
+    """(total bytes, seconds per image)."""
+    started = time.perf_counter()
+    total = sum(len(client.get(url).data) for url in urls)
+    return total, (time.perf_counter() - started) / len(urls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thumbnail/preview bytes and latency vs. originals")
+    parser.add_argument("--sheets", type=int, default=40)
+    parser.add_argument("--width", type=int, default=3024)
+    parser.add_argument("--height", type=int, default=4032)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_previews_", meets=1, students=5)
+    try:
+        from PIL.JpegImagePlugin import JpegImageFile
+        from src import previews
+        from src.app import create_app
+        from src.data_manager import add_score_files, create_event, create_meet
+        from src.upload_store import PREVIEW_CACHE_DIR, save_stream, upload_path, upload_root
+
+        rng = random.Random(args.seed)
+        meet_id = create_meet("Bench Meet", "2024-01-06")
+        event_id = create_event(meet_id, "Individual Algebra")
+        print(f"Generating {args.sheets} photos of {args.width}x{args.height}...")
+        paths = [save_stream(_photo((args.width, args.height), rng), f"sheet{i}.jpg", "scores")[0]
+                 for i in range(args.sheets)]
+        add_score_files(meet_id, event_id, paths)
+        client = create_app().test_client()
+
+        page = client.get(f"/meet/{meet_id}/event/{event_id}").get_data(as_text=True)
+        thumb_urls = re.findall(r'<img src="(/image/thumb/[^"]+)"', page)
+        preview_urls = [url.replace("/image/thumb/", "/image/preview/") for url in thumb_urls]
+        assert len(thumb_urls) == args.sheets
+        original_bytes = sum(os.path.getsize(upload_path(p)) for p in paths)
+
+        def clear_cache():
+            shutil.rmtree(os.path.join(upload_root(), PREVIEW_CACHE_DIR), ignore_errors=True)
+            previews._cache_bytes.clear()
+
+        rows = []
+        clear_cache()
+        thumb_bytes, thumb_cold = _fetch_all(client, thumb_urls)
+        _, thumb_warm = _fetch_all(client, thumb_urls)
+        preview_bytes, preview_cold = _fetch_all(client, preview_urls)
+        _, preview_warm = _fetch_all(client, preview_urls)
+        rows.append(("thumbnails", thumb_bytes, thumb_cold, thumb_warm))
+        rows.append(("previews", preview_bytes, preview_cold, preview_warm))
+
+        clear_cache()
+        draft = JpegImageFile.draft
+        JpegImageFile.draft = lambda self, mode, size: None
+        try:
+            _, no_draft_cold = _fetch_all(client, thumb_urls)
+        finally:
+            JpegImageFile.draft = draft
+        rows.append(("thumbnails, no draft", thumb_bytes, no_draft_cold, None))
+
+        print(f"{args.sheets} sheets, originals {original_bytes / MB:.1f} MB")
+        print(f"{'':22}{'bytes':>10}{'of originals':>14}{'cold/image':>12}{'warm/image':>12}")
+        for label, size, cold, warm in rows:
+            warm_text = f"{warm * 1000:>10.1f}ms" if warm is not None else f"{'-':>12}"
+            print(f"{label:22}{size / MB:>8.2f}MB{size / original_bytes:>14.1%}{cold * 1000:>10.0f}ms{warm_text}")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
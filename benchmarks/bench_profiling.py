@@ -0,0 +1,84 @@
+# benchmarks/bench_profiling.py
+"""
+Cost of the on-demand request profiler (src/profiling.py) on /dashboard over
+a large synthetic store, recomputed on every request (fragment cache cleared):
+median latency with profiling not installed (no PROFILING_TOKEN), installed
+but not asked for, and asked for with ?profile=<token>. Then prints where the
+time of one profiled request went, by category.
+
+Run from the repository root:
+    python benchmarks/bench_profiling.py [--meets 40] [--students 60] [--requests 20]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+TOKEN = "bench-token"
+
+
+def _median_ms(client, url, requests, before_each):
+    times = []
+    for _ in range(requests):
+        before_each()
+        started = time.perf_counter()
+        response = client.get(url)
+        times.append(time.perf_counter() - started)
+        assert response.status_code == 200, (url, response.status_code)
+    times.sort()
+    return times[len(times) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request profiler overhead")
+    parser.add_argument("--meets", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_profiling_", meets=args.meets, students=args.students)
+    try:
+        from src import rendering
+        from src.app import create_app
+        from src.profiling import list_profiles
+
+        os.environ.pop("PROFILING_TOKEN", None)
+        off = create_app().test_client()
+        os.environ["PROFILING_TOKEN"] = TOKEN
+        on = create_app().test_client()
+        off.get("/dashboard")  # the store is parsed once, as in a running server
+
+        rows = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for label, client, url in (("not installed", off, "/dashboard"),
+                                       ("installed, not requested", on, "/dashboard"),
+                                       ("profiled", on, f"/dashboard?profile={TOKEN}")):
+                rows.append((label, _median_ms(client, url, args.requests, rendering._fragments.clear)))
+        base = rows[0][1]
+        for label, ms in rows:
+            print(f"{label:26}{ms:9.1f} ms{ms / base:8.2f}x")
+
+        profile = list_profiles()[0]
+        print(f"\none profiled request: {profile['duration'] * 1000:.1f} ms, {profile['samples']} stack samples")
+        for category, seconds in profile["categories"].items():
+            print(f"  {category:18}{seconds * 1000:9.1f} ms{seconds / profile['duration']:7.0%}")
+        print("  (categories are inclusive, so one can contain another)")
+        print("\nmost own time among the top functions:")
+        for row in sorted(profile["topFunctions"], key=lambda row: row["ownTime"], reverse=True)[:8]:
+            print(f"  {row['ownTime'] * 1000:8.1f} ms{row['calls']:>9}  {row['function']}")
+    finally:
+        os.environ.pop("PROFILING_TOKEN", None)
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_render.py
+"""
+Times page rendering on a large synthetic store:
+  - compiling every template from source vs. loading it from the on-disk
+    bytecode cache (what a fresh worker pays before its first render)
+  - /dashboard and an event page with the fragment cache cleared before each
+    request (every request recomputes and re-renders the tables, as before
+    fragment caching) vs. served from the fragment cache
+
+Run from the repository root:
+    python benchmarks/bench_render.py [--meets 40] [--students 60] [--requests 20]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _compile_all(loader, bytecode_cache):
+    from jinja2 import Environment
+    env = Environment(loader=loader, bytecode_cache=bytecode_cache)
+    started = time.perf_counter()
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+    return time.perf_counter() - started
+
+
+def _median_ms(client, url, requests, before_each=None):
+    times = []
+    for _ in range(requests):
+        if before_each:
+            before_each()
+        started = time.perf_counter()
+        response = client.get(url)
+        times.append(time.perf_counter() - started)
+        assert response.status_code == 200, (url, response.status_code)
+    times.sort()
+    return times[len(times) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template compile and page render times")
+    parser.add_argument("--meets", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_render_", meets=args.meets, students=args.students)
+    try:
+        from jinja2 import FileSystemBytecodeCache
+        from src import rendering
+        from src.app import create_app
+        from src.data_manager import load_data
+
+        app = create_app()
+        cache_dir = tempfile.mkdtemp(prefix="bench_bytecode_", dir=workdir)
+        cold = _compile_all(app.jinja_loader, None)
+        _compile_all(app.jinja_loader, FileSystemBytecodeCache(cache_dir))
+        warm = _compile_all(app.jinja_loader, FileSystemBytecodeCache(cache_dir))
+        print(f"compile all templates: from source {cold * 1000:7.1f} ms   from bytecode cache {warm * 1000:7.1f} ms")
+
+        data = load_data()
+        meet = data["meets"][0]
+        event = max(meet.events, key=lambda e: len(e.participants))
+        client = app.test_client()
+        results = []
+        # The event view prints its exam topics; keep the output readable.
+        with contextlib.redirect_stdout(io.StringIO()):
+            for label, url in (("dashboard", "/dashboard"), ("event page", f"/meet/{meet.id}/event/{event.id}")):
+                uncached = _median_ms(client, url, args.requests, before_each=rendering._fragments.clear)
+                client.get(url)
+                results.append((label, uncached, _median_ms(client, url, args.requests)))
+        for label, uncached, cached in results:
+            print(f"{label:10} uncached {uncached:8.1f} ms   fragment cache {cached:8.1f} ms")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_serialization.py
+"""
+Store file formats (src/serialization.py) at several store sizes: file size,
+save time, full load time (every meet decoded), time to load the store and
+decode one meet (what a meet or event page needs), and a one-meet edit
+(load, change one meet, save, as the mutators do).
+
+"pretty" with the stdlib is what save_data()/load_data() used before;
+orjson rows are skipped when it isn't installed.
+
+Run from the repository root:
+    python benchmarks/bench_serialization.py [--sizes 10,40,120] [--students 60] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store format size and load/save times")
+    parser.add_argument("--sizes", default="10,40,120", help="Comma-separated meet counts")
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from synthetic_store import build_store
+    from src import serialization
+    from src.models import Meet
+
+    accelerated = serialization.orjson
+    variants = [("pretty", "stdlib"), ("json", "stdlib"), ("binary", "stdlib")]
+    if accelerated is not None:
+        variants += [("json", "orjson"), ("binary", "orjson")]
+
+    folder = tempfile.mkdtemp(prefix="bench_serialization_")
+    path = os.path.join(folder, "store.json")
+
+    def save(data, store_format):
+        # Replace rather than truncate, as save_data() does: loaded binary snapshots map the old file.
+        with open(path + ".tmp", "wb") as f:
+            f.write(serialization.encode_store(data, store_format))
+        os.replace(path + ".tmp", path)
+
+    try:
+        for meets in [int(n) for n in args.sizes.split(",")]:
+            store = build_store(meets=meets, students=args.students)
+            store["meets"] = [Meet.from_dict(m) for m in store["meets"]]
+            middle_id = store["meets"][meets // 2].id
+            print(f"\n{meets} meets")
+            print(f"{'format':16}{'size':>9}{'save':>10}{'full load':>11}{'one meet':>10}{'edit one':>10}")
+            for store_format, library in variants:
+                serialization.orjson = accelerated if library == "orjson" else None
+                save(store, store_format)
+                size = os.path.getsize(path) / 1024
+                save_ms = _best_ms(lambda: save(store, store_format), args.repeat)
+                full_ms = _best_ms(lambda: list(serialization.read_store_file(path)["meets"]), args.repeat)
+
+                def one_meet():
+                    loaded = serialization.read_store_file(path)["meets"]
+                    ids = loaded.ids() if isinstance(loaded, serialization.LazyMeets) else [m.id for m in loaded]
+                    return loaded[ids.index(middle_id)]
+                one_ms = _best_ms(one_meet, args.repeat)
+
+                def edit_one():
+                    loaded = serialization.read_store_file(path)
+                    meets_list = loaded["meets"]
+                    ids = meets_list.ids() if isinstance(meets_list, serialization.LazyMeets) else [m.id for m in meets_list]
+                    meets_list[ids.index(middle_id)].title += "!"
+                    save(loaded, store_format)
+                edit_ms = _best_ms(edit_one, args.repeat)
+                print(f"{store_format + ' (' + library + ')':16}{size:>7.0f}kB{save_ms:>8.1f}ms{full_ms:>9.1f}ms"
+                      f"{one_ms:>8.1f}ms{edit_ms:>8.1f}ms")
+        serialization.orjson = accelerated
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
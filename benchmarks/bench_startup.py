@@ -0,0 +1,83 @@
+# benchmarks/bench_startup.py
+"""
+Measures cold-start cost of the app with `python -X importtime`.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--runs N]
+
+Prints the cumulative import time of `src.app`, the slowest imports, the time
+taken by create_app(), and exits non-zero if a heavy dependency (openai,
+pydantic, numpy, Pillow, pyarrow, ...) is pulled in at import time.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported on first use: the GPT client, local
+# answer-sheet scoring and image previews (numpy, Pillow), Parquet exports.
+HEAVY_MODULES = ("openai", "pydantic", "httpx", "numpy", "PIL", "pyarrow")
+
+CREATE_APP_SNIPPET = (
+    "import time; t = time.perf_counter(); "
+    "from src.app import create_app; create_app(); "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def run_importtime(target="src.app"):
+    """Run one fresh interpreter and return {module: (self_us, cumulative_us)}."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        timings[name] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def time_create_app():
+    proc = subprocess.run(
+        [sys.executable, "-c", CREATE_APP_SNIPPET],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals, create_times, last = [], [], {}
+    for _ in range(args.runs):
+        last = run_importtime()
+        totals.append(last["src.app"][1] / 1000)
+        create_times.append(time_create_app())
+
+    print(f"import src.app     median {statistics.median(totals):8.1f} ms  "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}, runs={args.runs})")
+    print(f"import+create_app  median {statistics.median(create_times):8.1f} ms")
+
+    print(f"\nTop {args.top} imports by self time (last run):")
+    for name, (self_us, cum_us) in sorted(last.items(), key=lambda kv: kv[1][0], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.2f} ms self  {cum_us / 1000:8.2f} ms cumulative  {name}")
+
+    eager = sorted(name for name in last if name.split(".")[0] in HEAVY_MODULES)
+    if eager:
+        print("\nREGRESSION: heavy modules imported at startup:", ", ".join(sorted({n.split('.')[0] for n in eager})))
+        return 1
+    print("\nOK: no heavy modules imported at startup")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+# benchmarks/bench_tenants.py
+"""
+Mixed traffic against many tenants (src/tenants.py): page views of the home,
+meet, dashboard and student pages plus occasional meet-date edits, spread over
+the tenants with a skewed (Zipf-like) popularity, as a few busy teams and a
+long tail of quiet ones would produce. Runs the same request sequence with
+several sizes of the loaded-store LRU (STORE_CACHE_SIZE; 0 re-parses the store
+on every load) and reports latency percentiles and how often a store had to be
+parsed.
+
+Each size runs in a fresh process so every run starts cold.
+
+Run from the repository root:
+    python benchmarks/bench_tenants.py [--tenants 40] [--requests 1000] [--sizes 0,8,64]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _make_tenants(count, meets, students):
+    """Writes one synthetic store per tenant; returns {tenant: (meet ids, student ids)}."""
+    from synthetic_store import build_store
+    from src.data_manager import load_data
+    from src.tenants import tenant_context
+    layout = {}
+    for i in range(count):
+        tenant_id = f"team{i:03d}"
+        os.makedirs(os.path.join("data", "tenants", tenant_id, "uploads"))
+        with open(os.path.join("data", "tenants", tenant_id, "store.json"), "w", encoding="utf-8") as f:
+            json.dump(build_store(meets=meets, students=students, seed=i + 1), f)
+        # The first load adds the student tables, so the timed runs don't pay for it.
+        with tenant_context(tenant_id):
+            data = load_data()
+        layout[tenant_id] = ([m.id for m in data["meets"]], sorted(data["students"]))
+    return layout
+
+
+def _traffic(layout, requests, seed=7):
+    """[(method, url, form)] with tenant popularity ~ 1/rank."""
+    rng = random.Random(seed)
+    tenant_ids = sorted(layout)
+    weights = [1 / (rank + 1) for rank in range(len(tenant_ids))]
+    sequence = []
+    for tenant_id in rng.choices(tenant_ids, weights, k=requests):
+        meet_ids, student_ids = layout[tenant_id]
+        prefix = f"/t/{tenant_id}"
+        roll = rng.random()
+        if roll < 0.35:
+            sequence.append(("GET", f"{prefix}/", None))
+        elif roll < 0.65:
+            sequence.append(("GET", f"{prefix}/meet/{rng.choice(meet_ids)}", None))
+        elif roll < 0.80:
+            sequence.append(("GET", f"{prefix}/dashboard", None))
+        elif roll < 0.95:
+            sequence.append(("GET", f"{prefix}/student/{rng.choice(student_ids)}", None))
+        else:
+            date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            sequence.append(("POST", f"{prefix}/meet/{rng.choice(meet_ids)}/date", {"date": date}))
+    return sequence
+
+
+def _run(sequence_file):
+    """Child process: replays the sequence against the app and prints a JSON result line."""
+    import contextlib
+    import io
+
+    from src import data_manager
+    from src.app import create_app
+
+    parses = 0
+    read_store = data_manager._read_store
+
+    def counting_read_store(path):
+        nonlocal parses
+        parses += 1
+        return read_store(path)
+    data_manager._read_store = counting_read_store
+
+    with open(sequence_file, "r", encoding="utf-8") as f:
+        sequence = json.load(f)
+    client = create_app().test_client()
+    times = {"GET": [], "POST": []}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for method, url, form in sequence:
+            started = time.perf_counter()
+            response = client.open(url, method=method, data=form)
+            times[method].append(time.perf_counter() - started)
+            assert response.status_code in (200, 302), (url, response.status_code)
+    print(json.dumps({"times": times, "parses": parses}))
+
+
+def _percentile(sorted_times, p):
+    return sorted_times[min(len(sorted_times) - 1, int(len(sorted_times) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Many tenants under mixed traffic, by loaded-store LRU size")
+    parser.add_argument("--tenants", type=int, default=40)
+    parser.add_argument("--meets", type=int, default=8)
+    parser.add_argument("--students", type=int, default=25)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--sizes", default="0,8,64", help="Comma-separated STORE_CACHE_SIZE values to compare")
+    parser.add_argument("--replay", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.replay:
+        return _run(args.replay)
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(prefix="bench_tenants_", meets=1, students=5)
+    try:
+        layout = _make_tenants(args.tenants, args.meets, args.students)
+        sequence = _traffic(layout, args.requests)
+        with open("sequence.json", "w", encoding="utf-8") as f:
+            json.dump(sequence, f)
+        snapshot = os.path.join(workdir, "tenants-initial")
+        shutil.copytree(os.path.join("data", "tenants"), snapshot)
+        writes = sum(1 for method, _, _ in sequence if method == "POST")
+        print(f"{args.tenants} tenants, {len(sequence)} requests ({writes} writes)")
+        print(f"{'cache size':>10} {'GET p50':>9} {'GET p95':>9} {'GET p99':>9} {'POST p50':>9} {'parses/req':>11}")
+        for size in [int(s) for s in args.sizes.split(",")]:
+            # Every run starts from the same stores.
+            shutil.rmtree(os.path.join("data", "tenants"))
+            shutil.copytree(snapshot, os.path.join("data", "tenants"))
+            shutil.rmtree(os.path.join("data", "template_cache"), ignore_errors=True)
+            env = dict(os.environ, STORE_CACHE_SIZE=str(size), PYTHONPATH=REPO_ROOT)
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--replay", "sequence.json"],
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            gets = sorted(result["times"]["GET"])
+            posts = sorted(result["times"]["POST"]) or [0.0]
+            print(f"{size:>10} {_percentile(gets, 0.5):>7.2f}ms {_percentile(gets, 0.95):>7.2f}ms "
+                  f"{_percentile(gets, 0.99):>7.2f}ms {_percentile(posts, 0.5):>7.2f}ms "
+                  f"{result['parses'] / len(sequence):>11.2f}")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/fake_openai.py
+"""
+A local stand-in for the OpenAI chat completions API, for benchmarks and load
+tests. Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Each request sleeps for `latency` seconds (simulating the model round-trip)
+and answers with canned JSON matching the requested structured-output schema.
+
+    python benchmarks/fake_openai.py --port 8765 --latency 2
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NUM_QUESTIONS = 30
+
+
+def _user_text(payload):
+    for message in payload.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            return content
+        for part in content or []:
+            if part.get("type") == "text":
+                return part["text"]
+    return ""
+
+
+def canned_reply(payload):
+    """JSON content for the schema named in response_format."""
+    schema = ((payload.get("response_format") or {}).get("json_schema") or {}).get("name", "")
+    if schema == "StudentScores":
+        return {"correctQuestions": list(range(1, 21)), "incorrectQuestions": list(range(21, NUM_QUESTIONS + 1))}
+    if schema == "ExamTopicIds":
+        ids = [int(m) for m in re.findall(r"^(\d+) ", _user_text(payload), flags=re.M)] or [0]
+        return {"questions": [
+            {"questionNumber": q, "topicIds": [ids[q % len(ids)], ids[(q * 7) % len(ids)]]}
+            for q in range(1, NUM_QUESTIONS + 1)
+        ]}
+    if schema == "TopicListResponse":
+        return {"courses": [{"course": c, "topics": [f"{c} topic {i}" for i in range(1, 11)]}
+                            for c in ("Algebra", "Geometry", "Algebra II", "Precalculus")]}
+    return {}
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content, "refusal": None},
+            "finish_reason": "stop",
+            "logprobs": None,
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=2.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.requests_served = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.server.latency)
+        with self.server._lock:
+            self.server.requests_served += 1
+        body = json.dumps(completion(json.dumps(canned_reply(payload)))).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.port, args.latency)
+    print(f"Fake OpenAI API on {server.base_url} (latency {args.latency}s)")
+    server.serve_forever()
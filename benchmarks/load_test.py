@@ -0,0 +1,480 @@
+# benchmarks/load_test.py
+"""
+Load test of the whole app on one box: a mix of page views (home, meet, event
+and dashboard pages) and score entry (manual single-student scores and
+GPT-backed score-sheet uploads against a local fake model,
+benchmarks/fake_openai.py), sent over HTTP to the app served in a separate
+process on a synthetic store.
+
+Two ways to generate load:
+  --rate R        open loop: requests arrive at random (Poisson) at R per
+                  second, whatever the server's speed, with at most
+                  --concurrency in flight. Latency is counted from the
+                  scheduled arrival, so time spent waiting for a free client
+                  counts too (no coordinated omission).
+  --rate 0        closed loop: --concurrency users, each sending its next
+                  request --think seconds after the last one finished.
+
+It reports throughput, p50/p95/p99 latency and error rate per route, then
+checks the store the run left behind:
+  - it decodes, and no meet was lost
+  - every score the server accepted was recorded exactly once
+  - scores are valid question numbers
+  - the topic rollups and student index match the scores
+The exit status is 1 if the check fails or more than --max-error-rate of
+the requests failed. --json writes the results for regression tracking.
+
+Run from the repository root:
+    python benchmarks/load_test.py [--duration 30] [--rate 5 | --rate 0] [--concurrency 16]
+        [--mix home=30,meet=25,event=20,dashboard=10,manual_score=10,gpt_score=5]
+        [--server wsgi|asgi] [--threads 8] [--gpt-latency 2] [--meets 40] [--students 60] [--json out.json]
+
+--server asgi serves src/asgi.py with uvicorn (needs uvicorn).
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import queue
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "home=30,meet=25,event=20,dashboard=10,manual_score=10,gpt_score=5"
+# The route each kind of request exercises.
+ROUTES = {
+    "home": "home_page",
+    "meet": "view_meet",
+    "event": "view_event",
+    "dashboard": "dashboard_view",
+    "manual_score": "upload_single_student_score (manual)",
+    "gpt_score": "upload_single_student_score (GPT)",
+}
+SCORE_KINDS = ("manual_score", "gpt_score")
+REQUEST_TIMEOUT = 120
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(args):
+    """Child process: serves the app in the current directory on --port."""
+    import contextlib
+    import io
+
+    # The app logs every GPT call and flash; keep the parent's output readable.
+    with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+        if args.server == "asgi":
+            import uvicorn
+            from src.app import create_app
+            from src.asgi import AsyncUploadApp
+            uvicorn.run(AsyncUploadApp(create_app(), worker_threads=args.threads),
+                        host="127.0.0.1", port=args.port, log_level="warning")
+        else:
+            from werkzeug.serving import make_server
+            from src.app import create_app
+            # The development server has no thread limit; this caps it at --threads like the other modes.
+            pool = threading.BoundedSemaphore(args.threads)
+            app = create_app()
+
+            def limited(environ, start_response):
+                with pool:
+                    result = app(environ, start_response)
+                    try:
+                        return list(result)
+                    finally:
+                        if hasattr(result, "close"):
+                            result.close()
+
+            make_server("127.0.0.1", args.port, limited, threaded=True).serve_forever()
+
+
+def _start_server(args, workdir, env):
+    port = _free_port()
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+               "--server", args.server, "--threads", str(args.threads)]
+    if args.verbose:
+        command.append("--verbose")
+    log = open(os.path.join(workdir, "server.log"), "w")
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    log.close()
+    with open(os.path.join(workdir, "server.log"), encoding="utf-8", errors="replace") as f:
+        raise RuntimeError(f"Server did not start:\n{f.read()[-2000:]}")
+
+
+def _parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind.strip() not in ROUTES:
+            raise SystemExit(f"Unknown request kind {kind!r}; choose from {', '.join(ROUTES)}")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def _multipart(fields, filename, content):
+    boundary = "loadtest" + os.urandom(8).hex()
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="scoreFile"; filename="{filename}"\r\n'
+                 f"Content-Type: image/png\r\n\r\n".encode() + content + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Workload:
+    """Picks requests from the mix over the synthetic store's meets and events."""
+
+    def __init__(self, layout, mix, seed):
+        self.layout = layout  # see _store_layout()
+        self.kinds = list(mix)
+        self.weights = [mix[k] for k in self.kinds]
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sequence = 0
+
+    def next(self):
+        """(kind, method, path, body, content type, (meet_id, event_id, student name) or None)."""
+        with self.lock:
+            rng = self.rng
+            kind = rng.choices(self.kinds, self.weights)[0]
+            # Recent meets are viewed most; scores go into the latest one, as during a season.
+            meet_id, events = self.layout[-1 - min(int(rng.expovariate(0.3)), len(self.layout) - 1)]
+            if kind in SCORE_KINDS:
+                meet_id, events = self.layout[-1]
+                events = [e for e in events if e[1]]
+            event_id = rng.choice(events)[0]
+            self.sequence += 1
+            sequence = self.sequence
+            incorrect = ",".join(str(q) for q in sorted(rng.sample(range(1, 31), rng.randint(0, 15))))
+        if kind == "home":
+            return kind, "GET", "/", None, None, None
+        if kind == "meet":
+            return kind, "GET", f"/meet/{meet_id}", None, None, None
+        if kind == "event":
+            return kind, "GET", f"/meet/{meet_id}/event/{event_id}", None, None, None
+        if kind == "dashboard":
+            return kind, "GET", "/dashboard", None, None, None
+        name = f"Load {kind} {sequence}"
+        path = f"/meet/{meet_id}/event/{event_id}/upload_single_student_score"
+        fields = {"studentName": name, "gradeLevel": "junior"}
+        if kind == "manual_score":
+            fields.update(scoreMode="manual", incorrectList=incorrect)
+            body = "&".join(f"{k}={v}".replace(" ", "+").replace(",", "%2C") for k, v in fields.items())
+            return kind, "POST", path, body.encode(), "application/x-www-form-urlencoded", (meet_id, event_id, name)
+        fields["scoreMode"] = "image"
+        # Not a printed answer sheet, so local scoring passes it on to the (fake) model.
+        body, content_type = _multipart(fields, f"sheet{sequence}.png", os.urandom(4096))
+        return kind, "POST", path, body, content_type, (meet_id, event_id, name)
+
+
+class Client:
+    """One keep-alive HTTP connection per worker thread."""
+
+    def __init__(self, port):
+        self.port = port
+        self.local = threading.local()
+
+    def send(self, method, path, body, content_type):
+        """The response status; raises OSError/HTTPException on a connection failure."""
+        headers = {"Content-Type": content_type} if content_type else {}
+        for attempt in (1, 2):
+            connection = getattr(self.local, "connection", None)
+            reused = connection is not None
+            if connection is None:
+                connection = self.local.connection = http.client.HTTPConnection(
+                    "127.0.0.1", self.port, timeout=REQUEST_TIMEOUT)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.will_close:
+                    connection.close()
+                    self.local.connection = None
+                return response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                self.local.connection = None
+                # A kept-alive connection the server had closed: a GET is sent again on a new one.
+                if not reused or method != "GET":
+                    raise
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(set)
+        self.accepted_scores = []
+        self.failed_scores = []
+
+    def record(self, kind, latency, status, error, score):
+        ok = error is None and status < 400
+        with self.lock:
+            self.latencies[kind].append(latency)
+            if not ok:
+                self.errors[kind] += 1
+                if len(self.error_samples[kind]) < 3:
+                    self.error_samples[kind].add(error or f"HTTP {status}")
+            if score:
+                (self.accepted_scores if ok else self.failed_scores).append(score)
+
+
+def _run_request(client, workload, results, scheduled):
+    kind, method, path, body, content_type, score = workload.next()
+    status, error = 0, None
+    try:
+        status = client.send(method, path, body, content_type)
+    except (OSError, http.client.HTTPException) as e:
+        error = type(e).__name__
+    results.record(kind, time.perf_counter() - scheduled, status, error, score)
+
+
+def run_open_loop(client, workload, results, rate, concurrency, duration, seed):
+    """Poisson arrivals at `rate` per second; returns the seconds it took for all to finish."""
+    rng = random.Random(seed + 1)
+    arrivals = queue.Queue()
+
+    def worker():
+        while True:
+            scheduled = arrivals.get()
+            if scheduled is None:
+                return
+            _run_request(client, workload, results, scheduled)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    next_arrival = started
+    while next_arrival - started < duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        arrivals.put(next_arrival)
+        next_arrival += rng.expovariate(rate)
+    for _ in threads:
+        arrivals.put(None)
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def run_closed_loop(client, workload, results, users, think, duration):
+    """`users` users sending back to back (after `think` seconds); returns the elapsed seconds."""
+    started = time.perf_counter()
+
+    def user():
+        while time.perf_counter() - started < duration:
+            _run_request(client, workload, results, time.perf_counter())
+            if think:
+                time.sleep(think)
+
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def _percentile(sorted_values, p):
+    """Nearest-rank percentile."""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(results, elapsed):
+    rows = {}
+    for kind in ROUTES:
+        latencies = sorted(results.latencies.get(kind, ()))
+        if not latencies:
+            continue
+        rows[ROUTES[kind]] = {
+            "requests": len(latencies),
+            "throughput": len(latencies) / elapsed,
+            "p50Ms": _percentile(latencies, 50) * 1000,
+            "p95Ms": _percentile(latencies, 95) * 1000,
+            "p99Ms": _percentile(latencies, 99) * 1000,
+            "maxMs": latencies[-1] * 1000,
+            "errors": results.errors.get(kind, 0),
+            "errorRate": results.errors.get(kind, 0) / len(latencies),
+            "errorSamples": sorted(results.error_samples.get(kind, ())),
+        }
+    return rows
+
+
+def verify_store(meet_count, accepted_scores, failed_scores):
+    """Problems found in the store the run left behind (an empty list if none)."""
+    from src.data_manager import get_topic_registry
+    from src.rollups import rebuild_topic_rollups
+    from src.serialization import StoreError, read_store_file
+    from src.tenants import store_file_path
+    from src.topics import TEAM_EVENTS
+
+    try:
+        data = read_store_file(store_file_path())
+        data["meets"] = list(data["meets"])  # binary snapshots decode their meets here
+    except (OSError, StoreError) as e:
+        return [f"store does not decode: {e}"]
+    problems = []
+    if len(data["meets"]) != meet_count:
+        problems.append(f"{meet_count} meets before the run, {len(data['meets'])} after")
+
+    recorded = defaultdict(int)
+    students = data.get("students", {})
+    index = data.get("studentIndex", {})
+    for meet in data["meets"]:
+        for event in meet.events:
+            for participant in event.participants:
+                recorded[(meet.id, event.id, participant.studentName)] += 1
+                correct, incorrect = set(participant.correctQuestions), set(participant.incorrectQuestions)
+                limit = event.numQuestions or 0
+                if correct & incorrect or any(not 1 <= q <= limit for q in correct | incorrect):
+                    problems.append(f"invalid scores for {participant.studentName} in event {event.id}")
+                if participant.studentId not in students:
+                    problems.append(f"{participant.studentName} in event {event.id} is not a registered student")
+                elif [meet.id, event.id] not in index.get(participant.studentId, []):
+                    problems.append(f"student index is missing {participant.studentName} in event {event.id}")
+    lost = [score for score in accepted_scores if recorded[score] == 0]
+    duplicated = [score for score in accepted_scores + failed_scores if recorded[score] > 1]
+    if lost:
+        problems.append(f"{len(lost)} accepted scores were not recorded (lost updates), e.g. {lost[0][2]}")
+    if duplicated:
+        problems.append(f"{len(duplicated)} scores were recorded more than once, e.g. {duplicated[0][2]}")
+
+    stored_rollups = data.get("topicRollups")
+    rebuild_topic_rollups(data, get_topic_registry(data), TEAM_EVENTS)
+    if stored_rollups != data["topicRollups"]:
+        stale = [meet_id for meet_id, rollup in data["topicRollups"].items()
+                 if (stored_rollups or {}).get(meet_id, {}) != rollup]
+        problems.append(f"topic rollups differ from the scores in {len(stale)} meets")
+    return problems
+
+
+def _store_layout():
+    """[(meet_id, [(event_id, individual), ...])] of the store, oldest meet first."""
+    from src.data_manager import load_data
+    from src.topics import TEAM_EVENTS
+
+    data = load_data()  # adds the student registry and rollups, as the server would on its first request
+    return [(meet.id, [(event.id, event.eventName not in TEAM_EVENTS) for event in meet.events])
+            for meet in data["meets"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent mixed-workload load test")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--rate", type=float, default=5, help="arrivals per second (0: closed loop)")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at most / users")
+    parser.add_argument("--think", type=float, default=0.0, help="closed loop: seconds between a user's requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight,... over " + ", ".join(ROUTES))
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--threads", type=int, default=8, help="server worker threads")
+    parser.add_argument("--gpt-latency", type=float, default=2.0, help="fake model latency (seconds)")
+    parser.add_argument("--meets", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's output in server.log")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        _serve(args)
+        return
+    mix = _parse_mix(args.mix)
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    from synthetic_store import make_workdir
+    from fake_openai import FakeOpenAIServer
+    workdir = make_workdir(prefix="load_test_", meets=args.meets, students=args.students)
+    server = None
+    try:
+        layout = _store_layout()
+        fake = FakeOpenAIServer(latency=args.gpt_latency).start()
+        env = dict(os.environ, OPENAI_BASE_URL=fake.base_url, OPENAI_API_KEY="fake-key",
+                   PYTHONPATH=REPO_ROOT)
+        env.pop("PROFILING_TOKEN", None)
+        server, port = _start_server(args, workdir, env)
+        client = Client(port)
+        # One unmeasured view of each page, so templates are compiled and the store parsed.
+        meet_id, events = layout[-1]
+        for path in ("/", f"/meet/{meet_id}", f"/meet/{meet_id}/event/{events[0][0]}", "/dashboard"):
+            client.send("GET", path, None, None)
+
+        workload = Workload(layout, mix, args.seed)
+        results = Results()
+        if args.rate > 0:
+            mode = f"open loop, {args.rate:g} req/s, at most {args.concurrency} in flight"
+            elapsed = run_open_loop(client, workload, results, args.rate, args.concurrency, args.duration, args.seed)
+        else:
+            mode = f"closed loop, {args.concurrency} users, {args.think:g}s think time"
+            elapsed = run_closed_loop(client, workload, results, args.concurrency, args.think, args.duration)
+        server.terminate()
+        server.wait()
+        server = None
+
+        rows = summarize(results, elapsed)
+        total = sum(row["requests"] for row in rows.values())
+        errors = sum(row["errors"] for row in rows.values())
+        problems = verify_store(len(layout), results.accepted_scores, results.failed_scores)
+
+        print(f"{args.server} server, {args.threads} threads, {args.meets} meets; {mode}; "
+              f"fake model {args.gpt_latency:g}s")
+        print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, "
+              f"{errors} errors ({errors / max(total, 1):.2%}), {fake.requests_served} model calls\n")
+        print(f"{'route':40}{'requests':>9}{'req/s':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>9}")
+        for route, row in rows.items():
+            print(f"{route:40}{row['requests']:>9}{row['throughput']:>8.1f}{row['p50Ms']:>8.0f}ms"
+                  f"{row['p95Ms']:>8.0f}ms{row['p99Ms']:>8.0f}ms{row['errorRate']:>9.1%}")
+            for sample in row["errorSamples"]:
+                print(f"{'':42}{sample}")
+        scores = len(results.accepted_scores)
+        print(f"\nstore check: {scores} accepted scores, "
+              + ("OK" if not problems else f"{len(problems)} problems:"))
+        for problem in problems[:20]:
+            print(f"  {problem}")
+
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({"server": args.server, "threads": args.threads, "mode": mode, "mix": mix,
+                           "duration": elapsed, "requests": total, "throughput": total / elapsed,
+                           "errorRate": errors / max(total, 1), "routes": rows,
+                           "storeProblems": problems}, f, indent=2)
+        if problems or errors / max(total, 1) > args.max_error_rate:
+            sys.exit(1)
+    finally:
+        if server is not None:
+            server.kill()
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
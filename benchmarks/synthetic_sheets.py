@@ -0,0 +1,102 @@
+# benchmarks/synthetic_sheets.py
+"""
+Labeled synthetic answer sheets for bench_mark_detection.py: blank sheets from
+src/mark_detection.answer_sheet() with hand-drawn-looking marks and totals
+(jittered strokes, varying pen width, size, slant and position), then scanned
+or photographed (rotation, scaling, blur, uneven lighting, noise, JPEG).
+
+A sample set is a folder of images plus labels.jsonl, one line per image:
+    {"file", "numQuestions", "correctQuestions", "incorrectQuestions", "total"}
+"total" is what the grader wrote; a few sheets get a miscounted total, which
+local scoring must catch (and send to GPT).
+"""
+import json
+import os
+import random
+
+
+def _jittered(strokes, rng, amount):
+    return [[(x + rng.uniform(-amount, amount), y + rng.uniform(-amount, amount)) for x, y in line]
+            for line in strokes]
+
+
+def _draw_symbol(page, strokes, center, height, aspect, rng):
+    from PIL import Image, ImageDraw
+    from src.mark_detection import draw_strokes
+    w, h = height * aspect, height
+    size = int(max(w, h) * 2)
+    patch = Image.new("L", (size, size), 255)
+    box = ((size - w) / 2, (size - h) / 2, (size + w) / 2, (size + h) / 2)
+    draw_strokes(ImageDraw.Draw(patch), _jittered(strokes, rng, 0.06), box, rng.randint(2, 5))
+    patch = patch.rotate(rng.uniform(-15, 15), fillcolor=255)
+    mask = patch.point(lambda v: 255 - v)
+    page.paste(patch, (int(center[0] - size / 2), int(center[1] - size / 2)), mask)
+
+
+def make_sheet(num_questions, rng, miscount_rate=0.03, blank_rate=0.05):
+    """(PIL image, label dict) for one graded sheet."""
+    from PIL import ImageFilter
+    from src.mark_detection import (DIGIT_STROKES, MARK_COLUMN, MARK_STROKES, SHEET_SIZE, TOTAL_BOX,
+                                    answer_sheet, frame_box, layout_box, question_row_box)
+    page = answer_sheet(num_questions, title="Meet 3 - Individual Algebra")
+    frame = frame_box(SHEET_SIZE)
+    correct, incorrect = [], []
+    for i in range(num_questions):
+        roll = rng.random()
+        if roll < blank_rate:
+            continue
+        kind = "x" if roll < blank_rate + 0.35 else rng.choice(["check", "check", "c"])
+        (correct if kind != "x" else incorrect).append(i + 1)
+        x0, y0, x1, y1 = question_row_box(frame, num_questions, i, MARK_COLUMN)
+        height = (y1 - y0) * rng.uniform(0.55, 0.85)
+        center = (x0 + (x1 - x0) * rng.uniform(0.15, 0.6), (y0 + y1) / 2 + rng.uniform(-0.08, 0.08) * (y1 - y0))
+        aspect = {"check": rng.uniform(0.9, 1.3), "c": rng.uniform(0.7, 1.0), "x": rng.uniform(0.8, 1.2)}[kind]
+        _draw_symbol(page, MARK_STROKES[kind], center, height, aspect, rng)
+
+    total = len(correct)
+    if rng.random() < miscount_rate:
+        total = max(0, total + rng.choice([-1, 1]))
+    bx0, by0, bx1, by1 = layout_box(frame, TOTAL_BOX)
+    height = (by1 - by0) * 0.55
+    x = bx0 + (bx1 - bx0) * rng.uniform(0.2, 0.35)
+    for digit in str(total):
+        _draw_symbol(page, DIGIT_STROKES[int(digit)], (x, (by0 + by1) / 2), height, 0.6, rng)
+        x += height * rng.uniform(0.75, 0.95)
+
+    # Scanning / photographing.
+    page = page.rotate(rng.uniform(-2.5, 2.5), fillcolor=255, expand=False)
+    scale = rng.uniform(0.7, 1.6)
+    page = page.resize((int(page.width * scale), int(page.height * scale)))
+    page = page.filter(ImageFilter.GaussianBlur(rng.uniform(0, 1.2)))
+    page = _lighting_and_noise(page, rng)
+    label = {"numQuestions": num_questions, "correctQuestions": correct, "incorrectQuestions": incorrect,
+             "total": total}
+    return page, label
+
+
+def _lighting_and_noise(page, rng):
+    import numpy as np
+    from PIL import Image
+    pixels = np.asarray(page, dtype=np.float64)
+    h, w = pixels.shape
+    gradient = np.linspace(rng.uniform(0.75, 1.0), 1.0, w)[None, :] * np.linspace(rng.uniform(0.8, 1.0), 1.0, h)[:, None]
+    noise = np.random.default_rng(rng.randrange(2**32)).normal(0, rng.uniform(2, 10), pixels.shape)
+    pixels = pixels * gradient + noise
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def write_sample_set(folder, count, seed=1, question_counts=(10, 20, 30)):
+    """Writes `count` labeled sheets (JPEG and PNG) to `folder`; returns the path of labels.jsonl."""
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    labels_path = os.path.join(folder, "labels.jsonl")
+    with open(labels_path, "w", encoding="utf-8") as labels:
+        for i in range(count):
+            page, label = make_sheet(rng.choice(question_counts), rng)
+            name = f"sheet-{i:03d}." + ("jpg" if i % 3 else "png")
+            if name.endswith(".jpg"):
+                page.save(os.path.join(folder, name), quality=rng.randint(60, 90))
+            else:
+                page.save(os.path.join(folder, name))
+            labels.write(json.dumps(dict(label, file=name)) + "\n")
+    return labels_path
@@ -0,0 +1,85 @@
+# benchmarks/synthetic_store.py
+"""
+Builds a realistic, reproducible store for benchmarks: several seasons of
+meets with every event, tagged exam questions and a roster whose answers
+follow a simple ability/difficulty model (so item statistics are meaningful).
+
+    from synthetic_store import make_workdir
+    workdir = make_workdir(meets=40, students=60)   # chdir'd into it, store written
+"""
+import json
+import os
+import random
+import shutil
+import tempfile
+import uuid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INDIVIDUAL_EVENTS = ["Individual Algebra", "Individual Geometry", "Individual Algebra II", "Individual Precalculus"]
+TEAM_EVENTS = ["Frosh-Soph 2-Person", "Jr-Sr 2-Person", "Frosh-Soph 8-person", "Jr-Sr 8-person", "Calculator Team"]
+GRADES = ["freshman", "sophomore", "junior", "senior"]
+
+
+def _uid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+
+def build_store(meets=40, students=60, questions=30, topics_per_question=2, seed=1):
+    """Returns a store dict (meets only; the student registry is built on first load)."""
+    rng = random.Random(seed)
+    with open(os.path.join(REPO_ROOT, "data", "topic_list.json"), encoding="utf-8") as f:
+        topic_list = json.load(f)
+
+    roster = [(f"Student {i}", GRADES[i % 4], rng.gauss(0, 1)) for i in range(students)]
+    data = {"meets": []}
+    for m in range(meets):
+        meet = {"id": _uid(rng), "title": f"Meet {m + 1}", "date": f"{2020 + m // 8}-{(m % 8) + 1:02d}-15",
+                "topicList": topic_list, "topicListUploads": [], "events": []}
+        for event_name in INDIVIDUAL_EVENTS + TEAM_EVENTS:
+            course = next((c for c in topic_list if event_name.endswith(c)), "Algebra")
+            course_topics = [f"{course} - {t}" for t in topic_list[course]]
+            difficulty = [rng.gauss(0, 1) for _ in range(questions)]
+            event = {
+                "id": _uid(rng),
+                "eventName": event_name,
+                "numQuestions": questions,
+                "examTopics": [
+                    {"questionNumber": q + 1, "topics": rng.sample(course_topics, topics_per_question)}
+                    for q in range(questions)
+                ],
+                "participants": [],
+                "examImagePaths": [],
+                "scoreImagePaths": [],
+            }
+            if event_name in TEAM_EVENTS:
+                event["participants"] = [
+                    {"studentName": name, "gradeLevel": grade, "correctQuestions": [], "incorrectQuestions": []}
+                    for name, grade, _ in rng.sample(roster, 2)
+                ]
+                correct = [q + 1 for q in range(questions) if rng.random() < 0.6]
+                event["teamCorrectQuestions"] = correct
+                event["teamIncorrectQuestions"] = [q for q in range(1, questions + 1) if q not in correct]
+            else:
+                for name, grade, ability in rng.sample(roster, min(len(roster), 12)):
+                    correct, incorrect = [], []
+                    for q in range(questions):
+                        # Rasch-style: P(correct) rises with ability - difficulty.
+                        p = 1 / (1 + 2.718281828 ** (difficulty[q] - ability))
+                        (correct if rng.random() < p else incorrect).append(q + 1)
+                    event["participants"].append({"studentName": name, "gradeLevel": grade,
+                                                  "correctQuestions": correct, "incorrectQuestions": incorrect})
+            meet["events"].append(event)
+        data["meets"].append(meet)
+    return data
+
+
+def make_workdir(prefix="bench_", **kwargs):
+    """Creates a temp dir with data/store.json and data/topic_list.json and chdirs into it."""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), os.path.join(workdir, "data"))
+    with open(os.path.join(workdir, "data", "store.json"), "w", encoding="utf-8") as f:
+        json.dump(build_store(**kwargs), f)
+    os.chdir(workdir)
+    return workdir
@@ -0,0 +1,277 @@
+# src/analytics_export.py
+# Analytics and raw results as downloadable tables (GET /export/<dataset>.<format>
+# and `flask export-data`). Rows are generated one at a time and written out
+# in chunks, so memory stays flat however many seasons are exported:
+#   topic-accuracy     per topic: correct, attempted, accuracy, importance
+#   event-summaries    per event: questions, total correct, participants
+#   participants       per student: events, total correct, questions attempted
+#   question-outcomes  per participant (or team) and question: its topics and
+#                      whether it was answered correctly
+# Without a season filter, topic-accuracy and participants are the dashboard's
+# all-season totals (season is empty); with one, they have a row per season,
+# taken from the archive index for archived seasons.
+# Formats: CSV, JSONL, and Parquet when pyarrow is installed (imported on the
+# first Parquet export, not when the app starts).
+
+import csv
+import io
+import os
+import tempfile
+
+from src.archive import archived_seasons, load_season, season_of
+from src.dashboard_logic import (event_summaries, get_individual_breakdowns, get_topic_accuracy_across_meets,
+                                 season_aggregates, topic_importance)
+from src.data_manager import load_data
+from src.serialization import dumps
+from src.topics import TEAM_EVENTS
+
+FORMATS = ("csv", "jsonl", "parquet")
+MIMETYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+# Bytes of CSV/JSONL gathered before a chunk is handed to the response, and rows per Parquet row group.
+CHUNK_SIZE = 64 * 1024
+PARQUET_BATCH_ROWS = 10000
+
+# Column names and types per dataset, in output order.
+COLUMNS = {
+    "topic-accuracy": [("season", "string"), ("topic", "string"), ("correct", "int"), ("attempted", "int"),
+                       ("accuracy", "float"), ("importance", "float")],
+    "event-summaries": [("season", "string"), ("meetTitle", "string"), ("eventName", "string"),
+                        ("totalQuestions", "int"), ("totalCorrect", "int"), ("totalParticipants", "int")],
+    "participants": [("season", "string"), ("studentId", "string"), ("studentName", "string"),
+                     ("gradeLevel", "string"), ("meetsEventsParticipated", "int"), ("totalCorrect", "int"),
+                     ("totalQuestionsAttempted", "int")],
+    "question-outcomes": [("season", "string"), ("meetId", "string"), ("meetTitle", "string"),
+                          ("date", "string"), ("eventId", "string"), ("eventName", "string"),
+                          ("studentId", "string"), ("studentName", "string"), ("gradeLevel", "string"),
+                          ("questionNumber", "int"), ("topics", "list"), ("correct", "bool")],
+}
+
+
+class ExportError(ValueError):
+    """An export that can't be produced (unknown dataset or format, Parquet without pyarrow)."""
+
+
+def _season_meets(seasons):
+    """Yields (season, meets) oldest season first: archived seasons, then the live store's meets by season."""
+    live = {}
+    for meet in load_data()["meets"]:
+        live.setdefault(season_of(meet.date), []).append(meet)
+    for season, _ in archived_seasons():
+        if seasons is None or season in seasons:
+            yield season, load_season(season)
+    # Undated meets (season None) only appear in unfiltered exports.
+    for season in sorted(live, key=lambda s: s or ""):
+        if seasons is None or season in seasons:
+            yield season, live[season]
+
+
+def _season_aggregates(seasons):
+    """Yields (season, aggregates) as kept in the archive index, computing them for live seasons."""
+    archived = dict(archived_seasons())
+    data = load_data()
+    for season, meets in _season_meets(seasons):
+        yield season, archived[season]["aggregates"] if season in archived else season_aggregates(data, meets)
+
+
+def _topic_accuracy(seasons, individual_only):
+    key = "individual" if individual_only else "all"
+    if seasons is None:
+        for topic, stats in get_topic_accuracy_across_meets(individual_only).items():
+            yield dict(stats, season=None, topic=topic)
+        return
+    for season, aggregates in _season_aggregates(seasons):
+        for topic, (correct, attempted) in aggregates["topicTotals"][key].items():
+            accuracy = correct / attempted if attempted else 0.0
+            yield {"season": season, "topic": topic, "correct": correct, "attempted": attempted,
+                   "accuracy": accuracy, "importance": topic_importance(accuracy, attempted)}
+
+
+def _event_summary_rows(seasons, individual_only):
+    archived = dict(archived_seasons())
+    for season, meets in _season_meets(seasons):
+        if season in archived:
+            summaries = archived[season]["aggregates"]["eventSummaries"]
+        else:
+            summaries = (summary for meet in meets for summary in event_summaries([meet]))
+        for summary in summaries:
+            if not (individual_only and summary["eventName"] in TEAM_EVENTS):
+                yield dict(summary, season=season)
+
+
+def _participants(seasons, individual_only):
+    if seasons is None:
+        for row in get_individual_breakdowns(individual_only):
+            yield dict(row, season=None)
+        return
+    key = "individual" if individual_only else "all"
+    students = load_data()["students"]
+    for season, aggregates in _season_aggregates(seasons):
+        for student_id, totals in aggregates["students"].items():
+            events, correct, attempted = totals[key]
+            if events:
+                student = students.get(student_id, {})
+                yield {"season": season, "studentId": student_id, "studentName": student.get("studentName"),
+                       "gradeLevel": student.get("gradeLevel"), "meetsEventsParticipated": events,
+                       "totalCorrect": correct, "totalQuestionsAttempted": attempted}
+
+
+def _question_outcomes(seasons, individual_only):
+    for season, meets in _season_meets(seasons):
+        for meet in meets:
+            for event in meet.events:
+                is_team = event.eventName in TEAM_EVENTS
+                if individual_only and is_team:
+                    continue
+                topics = {q.questionNumber: list(q.topics) for q in event.examTopics}
+                base = {"season": season, "meetId": meet.id, "meetTitle": meet.title, "date": meet.date,
+                        "eventId": event.id, "eventName": event.eventName}
+                if is_team:
+                    answers = [(None, event.eventName, None,
+                                event.teamCorrectQuestions or (), event.teamIncorrectQuestions or ())]
+                else:
+                    answers = [(p.studentId, p.studentName, p.gradeLevel, p.correctQuestions, p.incorrectQuestions)
+                               for p in event.participants]
+                for student_id, name, grade, correct_qs, incorrect_qs in answers:
+                    outcomes = sorted([(q, True) for q in correct_qs] + [(q, False) for q in incorrect_qs])
+                    for question, correct in outcomes:
+                        yield dict(base, studentId=student_id, studentName=name, gradeLevel=grade,
+                                   questionNumber=question, topics=topics.get(question, []), correct=correct)
+
+
+_DATASETS = {
+    "topic-accuracy": _topic_accuracy,
+    "event-summaries": _event_summary_rows,
+    "participants": _participants,
+    "question-outcomes": _question_outcomes,
+}
+
+
+def export_rows(dataset, seasons=None, individual_only=False):
+    """
+    Yields a dataset's rows as dicts with the keys of COLUMNS[dataset]. `seasons`
+    (e.g. ["2023-24"]) limits the rows to those seasons; individual_only leaves
+    out team events. Raises ExportError for an unknown dataset.
+    """
+    if dataset not in _DATASETS:
+        raise ExportError(f"Unknown dataset '{dataset}' (expected one of {', '.join(_DATASETS)})")
+    return _DATASETS[dataset](set(seasons) if seasons else None, individual_only)
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return "; ".join(value)
+    return "" if value is None else value
+
+
+def _csv_chunks(rows, names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for row in rows:
+        writer.writerow([_csv_value(row[name]) for name in names])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl_chunks(rows, names):
+    chunk = []
+    size = 0
+    for row in rows:
+        line = dumps({name: row[name] for name in names}) + b"\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def _pyarrow():
+    """The pyarrow module (with pyarrow.parquet loaded), or None if it isn't installed."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:  # optional, for Parquet exports
+        return None
+    return pyarrow
+
+
+def _parquet_schema(columns):
+    pyarrow = _pyarrow()
+    types = {"string": pyarrow.string(), "int": pyarrow.int64(), "float": pyarrow.float64(),
+             "bool": pyarrow.bool_(), "list": pyarrow.list_(pyarrow.string())}
+    return pyarrow.schema([(name, types[kind]) for name, kind in columns])
+
+
+def write_parquet(rows, columns, out):
+    """Writes rows to a Parquet file (path or binary file object), PARQUET_BATCH_ROWS rows per row group."""
+    pyarrow = _pyarrow()
+    schema = _parquet_schema(columns)
+    names = [name for name, _ in columns]
+    with pyarrow.parquet.ParquetWriter(out, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append({name: row[name] for name in names})
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_batch(pyarrow.RecordBatch.from_pylist(batch, schema=schema))
+                batch = []
+        if batch:
+            writer.write_batch(pyarrow.RecordBatch.from_pylist(batch, schema=schema))
+
+
+def _parquet_chunks(rows, columns):
+    # Parquet's footer is written last, so the file is built in a temporary
+    # file (not in memory) and then streamed.
+    with tempfile.TemporaryFile() as f:
+        write_parquet(rows, columns, f)
+        f.seek(0)
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _check_format(file_format):
+    if file_format not in FORMATS:
+        raise ExportError(f"Unknown format '{file_format}' (expected one of {', '.join(FORMATS)})")
+    if file_format == "parquet" and _pyarrow() is None:
+        raise ExportError("Parquet export needs pyarrow (pip install pyarrow).")
+
+
+def export_chunks(dataset, file_format, seasons=None, individual_only=False):
+    """
+    The dataset encoded as `file_format`, as a generator of byte chunks for a
+    streaming response. Raises ExportError (before anything is generated) for
+    an unknown dataset or format, or Parquet without pyarrow.
+    """
+    _check_format(file_format)
+    rows = export_rows(dataset, seasons, individual_only)
+    if file_format == "parquet":
+        return _parquet_chunks(rows, COLUMNS[dataset])
+    names = [name for name, _ in COLUMNS[dataset]]
+    return _csv_chunks(rows, names) if file_format == "csv" else _jsonl_chunks(rows, names)
+
+
+def export_to_file(dataset, file_format, path, seasons=None, individual_only=False):
+    """Writes an export to `path` (via a temporary file, so a failed export leaves no partial file)."""
+    _check_format(file_format)
+    rows = export_rows(dataset, seasons, individual_only)
+    tmp_path = path + ".tmp"
+    try:
+        if file_format == "parquet":
+            write_parquet(rows, COLUMNS[dataset], tmp_path)
+        else:
+            names = [name for name, _ in COLUMNS[dataset]]
+            with open(tmp_path, "wb") as f:
+                for chunk in (_csv_chunks if file_format == "csv" else _jsonl_chunks)(rows, names):
+                    f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
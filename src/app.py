@@ -1,18 +1,30 @@
+import io
 import os
-import uuid
 import json  # Needed for parsing and formatting JSON data
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
-from werkzeug.utils import secure_filename
-from dotenv import load_dotenv
-from src.dashboard_logic import get_event_topic_accuracy
-
-load_dotenv()
-BASE_UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
-os.makedirs(BASE_UPLOAD_FOLDER, exist_ok=True)
+from flask import Flask, Response, abort, g, render_template, request, redirect, send_file, send_from_directory, stream_with_context, url_for, flash, jsonify
+
+from src.upload_store import content_hash_of, save_upload, upload_path
+from src.chunked_uploads import (UploadError, abort_upload, claim_upload, complete_upload, init_upload,
+                                 upload_status, write_chunk)
+from src.analytics_export import MIMETYPES, ExportError, export_chunks
+from src.mark_detection import answer_sheet, local_student_scores
+from src.previews import PREVIEW_MAX_AGE, preview_file
+from src.archive import archived_seasons, season_of_meet
+from src.tenants import TENANT_ENVIRON_KEY, TenantMiddleware, activate, deactivate, tenant_exists, upload_root
+from src.flows import ParseStep, run_flow
+from src.progress import request_job_id, report_stage, sse_stream
+from src.profiling import install_profiler, list_profiles
+from src.topics import TEAM_EVENTS, build_topic_vocabulary, get_event_courses
+from src.cli import register_commands
+from src.rendering import cached_fragment, configure_templates
+from src.roster import RosterError, import_roster, parse_incorrect_list, split_scores, read_roster_csv, read_roster_json, GRADE_LEVELS
 
 from src.data_manager import (
+    StoreError,
     load_data,
     create_meet,
+    update_meet_date,
+    meet_date,
     get_meet,
     create_event,
     get_event,
@@ -28,14 +40,21 @@ from src.data_manager import (
     update_team_scores
 )
 from src.gpt_services import (
-    parse_topic_list_images,
-    parse_exam_images,
-    parse_single_student_exam_image
+    topic_list_request,
+    exam_images_request,
+    student_exam_request,
+    get_gpt_stats
 )
 from src.dashboard_logic import (
     get_topic_accuracy_across_meets,
     get_event_scores_summary,
-    get_individual_breakdowns
+    get_individual_breakdowns,
+    get_event_topic_accuracy,
+    get_student_history,
+    get_event_item_analysis,
+    get_topic_trends,
+    get_recommendations,
+    MAX_RECOMMENDATIONS
 )
 
 INDIVIDUAL_EVENTS = {
@@ -45,36 +64,417 @@ INDIVIDUAL_EVENTS = {
     "Individual Precalculus",
 }
 
-TEAM_EVENTS = {
-    "Frosh-Soph 2-Person",
-    "Jr-Sr 2-Person",
-    "Frosh-Soph 8-person",
-    "Jr-Sr 8-person",
-    "Calculator Team"
+
+def valid_meet_date(value):
+    """True for an empty date field or an ISO "YYYY-MM-DD" date."""
+    if not value:
+        return True
+    try:
+        meet_date(value)
+    except ValueError:
+        return False
+    return True
+
+
+def submitted_files(field):
+    """
+    What was sent in the form's file field `field`: the files in the request
+    body, and the ids of resumable uploads (src/chunked_uploads.py) completed
+    beforehand, sent as <field>UploadId.
+    """
+    uploaded_files = [f for f in request.files.getlist(field) if f and f.filename]
+    return uploaded_files, request.form.getlist(field + "UploadId")
+
+def save_uploaded_files(uploaded_files, category, upload_ids=()):
+    """
+    Stores the uploaded files and completed resumable uploads by content hash
+    and returns their paths relative to the uploads folder. Files already
+    stored are reused, not re-written.
+    """
+    stored = []
+    for file in uploaded_files:
+        if file and file.filename:
+            stored.append(save_upload(file, category))
+    for upload_id in upload_ids:
+        try:
+            stored.append(claim_upload(upload_id, category))
+        except UploadError as e:
+            flash(f"An upload could not be used: {e}", "error")
+
+    saved_file_paths = []
+    duplicates = 0
+    for relative_path, is_duplicate in stored:
+        duplicates += is_duplicate
+        if relative_path not in saved_file_paths:
+            saved_file_paths.append(relative_path)
+    if duplicates:
+        flash(f"{duplicates} file(s) had already been uploaded and were reused.", "info")
+    return saved_file_paths
+
+# ---------- GPT-backed upload flows ----------
+# Each flow validates the request and saves the files, yields a ParseStep for
+# the model call, then commits. See src/flows.py for how they are driven.
+
+def upload_topic_list_flow(meet_id):
+    meet = get_meet(meet_id)
+    if not meet:
+        flash("Meet not found.", "error")
+        return redirect(url_for("home_page"))
+
+    uploaded_files, upload_ids = submitted_files("files")
+    if not (uploaded_files or upload_ids):
+        flash("No files selected.", "error")
+        return redirect(url_for("view_meet", meet_id=meet_id))
+
+    saved_file_paths = save_uploaded_files(uploaded_files, "topic_list", upload_ids)
+
+    if saved_file_paths:
+        add_topic_list_files(meet_id, saved_file_paths)
+        report_stage("saved", files=len(saved_file_paths))
+        try:
+            parsed_topics = yield ParseStep("topic_list", saved_file_paths, None,
+                                            topic_list_request(saved_file_paths),
+                                            progress_id=request_job_id())
+            report_stage("merged", courses=len(parsed_topics))
+            update_meet_topic_list(meet_id, parsed_topics)
+            report_stage("committed")
+            flash("Topic list uploaded and parsed successfully!", "success")
+        except Exception as e:
+            report_stage("error", message=str(e))
+            flash(f"GPT parse error: {str(e)}", "error")
+
+    return redirect(url_for("view_meet", meet_id=meet_id))
+
+def upload_exam_images_flow(meet_id, event_id):
+    event = get_event(meet_id, event_id)
+    if not event:
+        flash("Event not found.", "error")
+        return redirect(url_for("view_meet", meet_id=meet_id))
+
+    uploaded_files, upload_ids = submitted_files("files")
+    if not (uploaded_files or upload_ids):
+        flash("No exam files selected.", "error")
+        return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+    saved_file_paths = save_uploaded_files(uploaded_files, "exams", upload_ids)
+
+    if saved_file_paths:
+        add_exam_files(meet_id, event_id, saved_file_paths)
+        report_stage("saved", files=len(saved_file_paths))
+        meet = get_meet(meet_id)
+        known_list = meet.topicList if meet else {}
+        event_name = event.eventName
+        # The parse depends on the images and on the vocabulary GPT picks from.
+        parse_context = build_topic_vocabulary(known_list, get_event_courses(event_name) or None)
+        # Questions already streamed back are committed early, so a long exam
+        # shows its first topics before the whole reply is in. If the parse then
+        # fails, the tagging the event had before is put back.
+        previous_topics = [q.to_dict() for q in event.examTopics]
+        committed_partial = []
+
+        def commit_partial(partial):
+            committed_partial.append(True)
+            update_event_exam_topics(meet_id, event_id, partial)
+
+        try:
+            exam_data = yield ParseStep("exam", saved_file_paths, parse_context,
+                                        exam_images_request(saved_file_paths, known_list, event_name=event_name),
+                                        progress_id=request_job_id(), on_partial=commit_partial)
+            report_stage("merged", questions=len(exam_data))
+            update_event_exam_topics(meet_id, event_id, exam_data)
+            if exam_data:
+                max_q = max(q["questionNumber"] for q in exam_data)
+                update_event_num_questions(meet_id, event_id, max_q)
+            report_stage("committed")
+            flash("Exam images uploaded & parsed. Topics assigned!", "success")
+        except Exception as e:
+            if committed_partial:
+                update_event_exam_topics(meet_id, event_id, previous_topics)
+            report_stage("error", message=str(e))
+            flash(f"GPT parse error while uploading exam: {str(e)}", "error")
+
+    return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+def upload_team_scores_flow(meet_id, event_id):
+    event_data = get_event(meet_id, event_id)
+    if not event_data:
+        flash("Event not found.", "error")
+        return redirect(url_for("view_meet", meet_id=meet_id))
+
+    event_name = event_data.eventName
+    if event_name not in TEAM_EVENTS:
+        flash("Not a team event, can't upload single team score.", "error")
+        return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+    score_mode = request.form.get("scoreMode", "manual")
+    correct_qs = []
+    incorrect_qs = []
+
+    if score_mode == "manual":
+        num_q = event_data.numQuestions or 0
+        if num_q < 1:
+            flash("No total # of questions set for this event. Upload exam or set numQuestions manually first!", "error")
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+        inc_set = parse_incorrect_list(request.form.get("incorrectList"), num_q, strict=False)
+        correct_qs, incorrect_qs = split_scores(inc_set, num_q)
+
+        flash(f"Team scores set manually. correct={len(correct_qs)}, incorrect={len(incorrect_qs)}", "success")
+    else:
+        uploaded_files, upload_ids = submitted_files("scoreFile")
+        if not (uploaded_files or upload_ids):
+            flash("No file selected for GPT-based team parse.", "error")
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+        saved_file_paths = save_uploaded_files(uploaded_files[:1], "scores", upload_ids[:1])
+        if not saved_file_paths:
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        relative_path = saved_file_paths[0]
+        add_score_files(meet_id, event_id, [relative_path])
+        report_stage("saved", files=1)
+
+        known_exam_data = event_data.examTopics
+        try:
+            parse_result = yield ParseStep("score_sheet", [relative_path], None,
+                                           student_exam_request(relative_path, known_exam_data),
+                                           progress_id=request_job_id())
+            correct_qs = parse_result.get("correctQuestions", [])
+            incorrect_qs = parse_result.get("incorrectQuestions", [])
+            flash(f"Team GPT parse success. correct={len(correct_qs)}", "success")
+        except Exception as e:
+            report_stage("error", message=str(e))
+            flash(f"GPT parse error for team event: {str(e)}", "error")
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+    update_team_scores(meet_id, event_id, correct_qs, incorrect_qs)
+    report_stage("committed")
+    return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+def upload_single_student_score_flow(meet_id, event_id):
+    event_data = get_event(meet_id, event_id)
+    if not event_data:
+        flash("Event not found.", "error")
+        return redirect(url_for("view_meet", meet_id=meet_id))
+
+    event_name = event_data.eventName
+    is_team_event = event_name in TEAM_EVENTS
+
+    student_name = request.form.get("studentName")
+    grade_level = request.form.get("gradeLevel")
+
+    if not (student_name and grade_level):
+        flash("Missing form data (name or grade).", "error")
+        return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+    if is_team_event:
+        new_participant = {
+            "studentName": student_name,
+            "gradeLevel": grade_level,
+            "correctQuestions": [],
+            "incorrectQuestions": []
+        }
+        add_participant_scores(meet_id, event_id, [new_participant])
+        flash(f"Added {student_name} to team event '{event_name}'.", "success")
+        return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+    score_mode = request.form.get("scoreMode", "manual")
+    correct_qs = []
+    incorrect_qs = []
+
+    if score_mode == "manual":
+        num_q = event_data.numQuestions or 0
+        if num_q < 1:
+            flash("No total # of questions set for this event. Upload exam or set numQuestions first!", "error")
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+        inc_set = parse_incorrect_list(request.form.get("incorrectList"), num_q, strict=False)
+        correct_qs, incorrect_qs = split_scores(inc_set, num_q)
+
+        flash(f"Manually entered data for {student_name}. Correct={len(correct_qs)}, Incorrect={len(incorrect_qs)}", "success")
+    else:
+        uploaded_files, upload_ids = submitted_files("scoreFile")
+        if not (uploaded_files or upload_ids):
+            flash("No file selected for image-based parsing.", "error")
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+        saved_file_paths = save_uploaded_files(uploaded_files[:1], "scores", upload_ids[:1])
+        if not saved_file_paths:
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        relative_path = saved_file_paths[0]
+        add_score_files(meet_id, event_id, [relative_path])
+        report_stage("saved", files=1)
+
+        known_exam_data = event_data.examTopics
+        # Sheets printed from /answer_sheet are usually scored locally; GPT reads the rest.
+        parse_result = local_student_scores(upload_path(relative_path), event_data.numQuestions)
+        if parse_result is not None:
+            report_stage("scored_locally")
+        else:
+            try:
+                parse_result = yield ParseStep("score_sheet", [relative_path], None,
+                                               student_exam_request(relative_path, known_exam_data),
+                                               progress_id=request_job_id())
+            except Exception as e:
+                report_stage("error", message=str(e))
+                flash(f"GPT parse error: {str(e)}", "error")
+                return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        correct_qs = parse_result.get("correctQuestions", [])
+        incorrect_qs = parse_result.get("incorrectQuestions", [])
+        flash(f"Image-based parsing for {student_name} done! Correct={len(correct_qs)}", "success")
+
+    new_participant = {
+        "studentName": student_name,
+        "gradeLevel": grade_level,
+        "correctQuestions": correct_qs,
+        "incorrectQuestions": incorrect_qs
+    }
+    add_participant_scores(meet_id, event_id, [new_participant])
+    report_stage("committed")
+    return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+
+
+# Endpoints whose handlers are flows; the ASGI serving mode awaits their model calls.
+UPLOAD_FLOWS = {
+    "upload_topic_list": upload_topic_list_flow,
+    "upload_exam_images": upload_exam_images_flow,
+    "upload_team_scores": upload_team_scores_flow,
+    "upload_single_student_score": upload_single_student_score_flow,
 }
 
+# ---------- Page sections cached by src/rendering.cached_fragment ----------
+
+def event_analysis_context(meet_id, event):
+    # Sort exam_topics by question number (stored as an int on the model).
+    exam_topics_sorted = sorted(event.examTopics, key=lambda q: q.questionNumber)
+
+    # Debug: print the sorted exam topics on the server console
+    print("Sorted exam topics:", exam_topics_sorted)
+
+    event_topic_stats = get_event_topic_accuracy(meet_id, event.id)
+    sorted_topic_stats = sorted(event_topic_stats.items(), key=lambda x: x[1]["accuracy"])
+
+    return {
+        "exam_topics": exam_topics_sorted,
+        "event_topic_stats": sorted_topic_stats,
+        "chart": {"labels": [t[0] for t in sorted_topic_stats],
+                  "values": [round(t[1]["accuracy"] * 100, 1) for t in sorted_topic_stats]},
+        # Per-question difficulty/discrimination (cached for the whole store).
+        "item_analysis": get_event_item_analysis(event.id),
+    }
+
+def dashboard_stats_context():
+    # Get the global topic accuracy stats
+    topic_accuracy_dict = get_topic_accuracy_across_meets(skip_team_events=False)
+    sorted_topic_accuracy = sorted(topic_accuracy_dict.items(), key=lambda i: i[1]["accuracy"])
+    topic_labels = [t[0] for t in sorted_topic_accuracy]
+    topic_values = [round(t[1]["accuracy"] * 100, 1) for t in sorted_topic_accuracy]
+
+    event_summaries = get_event_scores_summary()
+    event_summaries.sort(key=lambda e: e["totalCorrect"], reverse=True)
+
+    participant_breakdowns = get_individual_breakdowns(skip_team_events=True)
+    participant_breakdowns.sort(key=lambda p: p["totalCorrect"], reverse=True)
+
+    courses = ["Algebra", "Geometry", "Algebra II", "Precalculus"]
+    course_topic_data = {}
+
+    for course in courses:
+        # Get the list of topics for this course from your default topic list.
+        topics_for_course = {}
+        # Filter global topics: must be in this course and have importance ≥ 7.
+        for topic, stats in topic_accuracy_dict.items():
+            if course == topic.split(" - ")[0] and stats.get("importance", 0) >= 7:
+                topics_for_course[topic] = stats
+        # Sort topics from least to highest importance.
+        sorted_topics = sorted(topics_for_course.items(), key=lambda x: x[1]["importance"], reverse=True)
+        labels = [t[0] for t in sorted_topics]
+        values = [round(t[1]["importance"], 1) for t in sorted_topics]
+        course_topic_data[course] = {"labels": labels, "values": values}
+
+    return {
+        "sorted_topic_accuracy": sorted_topic_accuracy,
+        "event_summaries": event_summaries,
+        "participant_breakdowns": participant_breakdowns,
+        "course_topic_data": course_topic_data,
+        # One JSON blob for every chart on the page.
+        "charts": {"topicAccuracy": {"labels": topic_labels, "values": topic_values},
+                   "courses": course_topic_data},
+    }
+
 def create_app():
+    # Startup side effects live here rather than at import time, so importing
+    # this module (tests, short-lived workers) stays cheap.
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.makedirs(upload_root(), exist_ok=True)
+
     app = Flask(__name__,
                 template_folder="../templates",
                 static_folder="../static")
     app.secret_key = os.getenv("FLASK_SECRET_KEY", "some_dev_secret")
+    # Opt-in request profiling (src/profiling.py); None unless PROFILING_TOKEN is set.
+    profiler = install_profiler(app)
+    # /t/<tenant>/... selects a team's store and uploads (see src/tenants.py).
+    app.wsgi_app = TenantMiddleware(app.wsgi_app)
+    configure_templates(app)
+    register_commands(app)
+
+    @app.before_request
+    def select_tenant():
+        tenant_id = request.environ.get(TENANT_ENVIRON_KEY)
+        if tenant_id is not None and not tenant_exists(tenant_id):
+            abort(404)
+        g.tenant_token = activate(tenant_id)
+
+    @app.before_request
+    def refuse_archived_writes():
+        # Archived meets are read-only. Writes to them are refused here, before
+        # an upload is saved or GPT is called; the store would ignore them anyway.
+        meet_id = (request.view_args or {}).get("meet_id")
+        if request.method in ("GET", "HEAD") or meet_id is None or not season_of_meet(meet_id):
+            return None
+        message = "The meet is archived (read-only)."
+        if request.is_json or request.mimetype == "text/csv":
+            return jsonify({"status": "error", "message": message, "errors": [message]}), 409
+        flash(message, "error")
+        event_id = request.view_args.get("event_id")
+        if event_id:
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        return redirect(url_for("view_meet", meet_id=meet_id))
+
+    @app.teardown_request
+    def release_tenant(exc):
+        token = g.pop("tenant_token", None)
+        if token is not None:
+            deactivate(token)
+
+    @app.errorhandler(StoreError)
+    def store_error(e):
+        # Plain text: the templates may load the store again. The file is left for the operator to restore.
+        return Response(f"{e}\nNothing has been written over it; restore it from a backup.",
+                        status=500, mimetype="text/plain")
 
     @app.route("/")
     def home_page():
         data = load_data()
         meets = data["meets"]
-        return render_template("home.html", meets=meets)
+        # Archived seasons are listed from the archive index, without loading them.
+        seasons = [(season, entry["meets"]) for season, entry in reversed(archived_seasons())]
+        return render_template("home.html", meets=meets, seasons=seasons)
 
     @app.route("/add_meet", methods=["GET", "POST"])
     def add_meet_route():
         if request.method == "POST":
             title = request.form.get("title")
-            if title:
-                new_meet_id = create_meet(title)
+            date = request.form.get("date") or None
+            if not title:
+                flash("Please enter a valid meet title.", "error")
+            elif not valid_meet_date(date):
+                flash("Please enter the meet date as YYYY-MM-DD.", "error")
+            else:
+                new_meet_id = create_meet(title, date)
                 flash("Meet created successfully!", "success")
                 return redirect(url_for("view_meet", meet_id=new_meet_id))
-            else:
-                flash("Please enter a valid meet title.", "error")
         return render_template("add_meet.html")
 
     @app.route("/meet/<meet_id>")
@@ -83,7 +483,17 @@ def create_app():
         if not meet:
             flash("Meet not found.", "error")
             return redirect(url_for("home_page"))
-        return render_template("meet.html", meet=meet)
+        return render_template("meet.html", meet=meet, archived=season_of_meet(meet_id))
+
+    @app.route("/meet/<meet_id>/date", methods=["POST"])
+    def update_meet_date_route(meet_id):
+        date = request.form.get("date")
+        if not valid_meet_date(date):
+            flash("Please enter the meet date as YYYY-MM-DD.", "error")
+        elif date:
+            update_meet_date(meet_id, date)
+            flash("Meet date updated.", "success")
+        return redirect(url_for("view_meet", meet_id=meet_id))
 
     @app.route("/meet/<meet_id>/update_topic_list_ajax", methods=["POST"])
     def update_topic_list_ajax(meet_id):
@@ -132,315 +542,227 @@ def create_app():
             flash("Event not found.", "error")
             return redirect(url_for("view_meet", meet_id=meet_id))
 
-        # Retrieve exam topics from the event
-        exam_topics = event.get("examTopics", [])
+        # The tables and chart data are rendered once per store version.
+        analysis = cached_fragment("partials/event_analysis.html", (meet_id, event_id),
+                                   lambda: event_analysis_context(meet_id, event))
+        team_recommendations = get_recommendations()["teams"].get(event.eventName, [])[:5]
 
-        # Sort exam_topics by converting questionNumber to an integer.
-        try:
-            exam_topics_sorted = sorted(exam_topics, key=lambda q: int(q.get("questionNumber", 0)))
-        except Exception as e:
-            print("Error sorting exam topics:", e)
-            exam_topics_sorted = exam_topics  # fallback to unsorted if error occurs
-
-        # Debug: print the sorted exam topics on the server console
-        print("Sorted exam topics:", exam_topics_sorted)
-
-        # (Optional) Compute additional event statistics, charts, etc.
-        event_topic_stats = get_event_topic_accuracy(meet_id, event_id)
-        sorted_topic_stats = sorted(event_topic_stats.items(), key=lambda x: x[1]["accuracy"])
-        chart_labels = [t[0] for t in sorted_topic_stats]
-        chart_values = [round(t[1]["accuracy"] * 100, 1) for t in sorted_topic_stats]
-
-        # Pass the sorted exam topics to the template
         return render_template("event.html",
                             meet_id=meet_id,
+                            archived=season_of_meet(meet_id),
                             event=event,
-                            exam_topics=exam_topics_sorted,
-                            event_topic_stats=sorted_topic_stats,
-                            chart_labels=chart_labels,
-                            chart_values=chart_values)
+                            analysis=analysis,
+                            team_recommendations=team_recommendations)
 
 
 
-    @app.route("/meet/<meet_id>/upload_topic_list", methods=["POST"])
-    def upload_topic_list(meet_id):
+    @app.route("/meet/<meet_id>/event/<event_id>/answer_sheet.png")
+    def answer_sheet_image(meet_id, event_id):
+        """A printable answer sheet for the event, in the layout local scoring reads (src/mark_detection.py)."""
         meet = get_meet(meet_id)
-        if not meet:
-            flash("Meet not found.", "error")
-            return redirect(url_for("home_page"))
-
-        uploaded_files = request.files.getlist("files")
-        if not uploaded_files or all(f.filename == "" for f in uploaded_files):
-            flash("No files selected.", "error")
-            return redirect(url_for("view_meet", meet_id=meet_id))
-
-        saved_file_paths = []
-        topic_list_folder = os.path.join(BASE_UPLOAD_FOLDER, "topic_list", meet_id)
-        os.makedirs(topic_list_folder, exist_ok=True)
-
-        for file in uploaded_files:
-            if file and file.filename:
-                original_filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4()}_{original_filename}"
-                full_path = os.path.join(topic_list_folder, unique_name)
-                file.save(full_path)
-                relative_path = os.path.relpath(full_path, BASE_UPLOAD_FOLDER)
-                saved_file_paths.append(relative_path)
-
-        if saved_file_paths:
-            add_topic_list_files(meet_id, saved_file_paths)
-            try:
-                parsed_topics = parse_topic_list_images(saved_file_paths)
-                update_meet_topic_list(meet_id, parsed_topics)
-                flash("Topic list uploaded and parsed successfully!", "success")
-            except Exception as e:
-                flash(f"GPT parse error: {str(e)}", "error")
-
-        return redirect(url_for("view_meet", meet_id=meet_id))
+        event = meet.find_event(event_id) if meet else None
+        if not event:
+            abort(404)
+        try:
+            sheet = answer_sheet(event.numQuestions or 0, f"{meet.title} - {event.eventName}")
+        except ValueError as e:
+            flash(str(e), "error")
+            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        buffer = io.BytesIO()
+        sheet.save(buffer, "PNG", dpi=(150, 150))
+        return Response(buffer.getvalue(), mimetype="image/png")
 
-    # ----------Upload Exam Images & Parse Question Topics ----------
-    @app.route("/meet/<meet_id>/event/<event_id>/upload_exam", methods=["POST"])
-    def upload_exam_images(meet_id, event_id):
+    @app.route("/image/<size>/<path:relative_path>")
+    def upload_image(size, relative_path):
+        """A thumbnail or web-sized preview of an uploaded image (see src/previews.py)."""
+        try:
+            path, key, is_preview = preview_file(relative_path, size)
+        except (KeyError, FileNotFoundError):
+            abort(404)
+        # Content-addressed uploads never change, so neither do their previews.
+        immutable = content_hash_of(relative_path) is not None
+        response = send_file(path, mimetype="image/jpeg" if is_preview else None, conditional=True,
+                             etag=f"{size}-{key}", last_modified=os.path.getmtime(upload_path(relative_path)),
+                             max_age=PREVIEW_MAX_AGE if immutable else 3600)
+        response.cache_control.immutable = immutable
+        return response
+
+    @app.route("/meet/<meet_id>/event/<event_id>/roster", methods=["GET", "POST"])
+    def roster_entry(meet_id, event_id):
+        """
+        Grid entry for a whole roster. POST takes JSON ({"participants": [...]} or a list),
+        CSV (text/csv body or a rosterFile upload) or the grid form, and commits
+        every participant with one store write.
+        """
         event = get_event(meet_id, event_id)
         if not event:
             flash("Event not found.", "error")
             return redirect(url_for("view_meet", meet_id=meet_id))
-
-        uploaded_files = request.files.getlist("files")
-        if not uploaded_files or all(f.filename == "" for f in uploaded_files):
-            flash("No exam files selected.", "error")
+        if season_of_meet(meet_id):
+            # Only the GET gets here; refuse_archived_writes turns the POST away.
+            flash("The meet is archived (read-only).", "error")
             return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        is_team_event = event.eventName in TEAM_EVENTS
 
-        exam_folder = os.path.join(BASE_UPLOAD_FOLDER, "exams", meet_id, event_id)
-        os.makedirs(exam_folder, exist_ok=True)
-
-        saved_file_paths = []
-        for file in uploaded_files:
-            if file and file.filename:
-                original_filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4()}_{original_filename}"
-                full_path = os.path.join(exam_folder, unique_name)
-                file.save(full_path)
-                relative_path = os.path.relpath(full_path, BASE_UPLOAD_FOLDER)
-                saved_file_paths.append(relative_path)
-
-        if saved_file_paths:
-            add_exam_files(meet_id, event_id, saved_file_paths)
-            from src.data_manager import get_meet
-            meet = get_meet(meet_id)
-            known_list = meet.get("topicList", {}) if meet else {}
-            try:
-                exam_data = parse_exam_images(saved_file_paths, known_list, event_name=event.get("eventName",""))
-                update_event_exam_topics(meet_id, event_id, exam_data)
-                if exam_data:
-                    max_q = max(q["questionNumber"] for q in exam_data)
-                    update_event_num_questions(meet_id, event_id, max_q)
-                flash("Exam images uploaded & parsed. Topics assigned!", "success")
-            except Exception as e:
-                flash(f"GPT parse error while uploading exam: {str(e)}", "error")
+        if request.method == "GET":
+            return render_template("roster.html", meet_id=meet_id, event=event,
+                                   is_team_event=is_team_event, grade_levels=GRADE_LEVELS)
 
+        wants_json = request.is_json or request.mimetype == "text/csv"
+        try:
+            if request.is_json:
+                rows = read_roster_json(request.get_json())
+            elif request.mimetype == "text/csv":
+                rows = read_roster_csv(request.get_data(as_text=True))
+            elif request.files.get("rosterFile") and request.files["rosterFile"].filename:
+                rows = read_roster_csv(request.files["rosterFile"].read().decode("utf-8-sig"))
+            else:
+                rows = [{"studentName": name, "gradeLevel": grade, "incorrectList": incorrect}
+                        for name, grade, incorrect in zip(request.form.getlist("studentName"),
+                                                          request.form.getlist("gradeLevel"),
+                                                          request.form.getlist("incorrectList"))]
+            added, replaced = import_roster(meet_id, event_id, rows, is_team_event)
+        except (RosterError, ValueError) as e:
+            errors = e.errors if isinstance(e, RosterError) else [str(e)]
+            if wants_json:
+                return jsonify({"status": "error", "errors": errors}), 400
+            for message in errors:
+                flash(message, "error")
+            return redirect(url_for("roster_entry", meet_id=meet_id, event_id=event_id))
+
+        if wants_json:
+            return jsonify({"status": "success", "added": added, "replaced": replaced})
+        flash(f"Roster saved. Added {added}, updated {replaced} participant(s).", "success")
         return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
 
+    @app.route("/meet/<meet_id>/upload_topic_list", methods=["POST"])
+    def upload_topic_list(meet_id):
+        return run_flow(upload_topic_list_flow(meet_id))
+
+    # ----------Upload Exam Images & Parse Question Topics ----------
+    @app.route("/meet/<meet_id>/event/<event_id>/upload_exam", methods=["POST"])
+    def upload_exam_images(meet_id, event_id):
+        return run_flow(upload_exam_images_flow(meet_id, event_id))
+
     # ---------- Team Scores (Single set for entire team) ----------
     @app.route("/meet/<meet_id>/event/<event_id>/upload_team_scores", methods=["POST"])
     def upload_team_scores(meet_id, event_id):
-        event_data = get_event(meet_id, event_id)
-        if not event_data:
-            flash("Event not found.", "error")
-            return redirect(url_for("view_meet", meet_id=meet_id))
-
-        event_name = event_data.get("eventName", "")
-        if event_name not in TEAM_EVENTS:
-            flash("Not a team event, can't upload single team score.", "error")
-            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-        score_mode = request.form.get("scoreMode", "manual")
-        correct_qs = []
-        incorrect_qs = []
-
-        if score_mode == "manual":
-            num_q = event_data.get("numQuestions", 0)
-            if num_q < 1:
-                flash("No total # of questions set for this event. Upload exam or set numQuestions manually first!", "error")
-                return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-            inc_str = request.form.get("incorrectList")
-            inc_set = set()
-            if inc_str:
-                for item in inc_str.split(","):
-                    item = item.strip()
-                    if item.isdigit():
-                        q_num = int(item)
-                        if 1 <= q_num <= num_q:
-                            inc_set.add(q_num)
-
-            for q_num in range(1, num_q + 1):
-                if q_num in inc_set:
-                    incorrect_qs.append(q_num)
-                else:
-                    correct_qs.append(q_num)
-
-            flash(f"Team scores set manually. correct={len(correct_qs)}, incorrect={len(incorrect_qs)}", "success")
-        else:
-            uploaded_file = request.files.get("scoreFile")
-            if not uploaded_file or uploaded_file.filename == "":
-                flash("No file selected for GPT-based team parse.", "error")
-                return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-            scores_folder = os.path.join(BASE_UPLOAD_FOLDER, "scores", meet_id, event_id)
-            os.makedirs(scores_folder, exist_ok=True)
-
-            original_filename = secure_filename(uploaded_file.filename)
-            unique_name = f"{uuid.uuid4()}_{original_filename}"
-            full_path = os.path.join(scores_folder, unique_name)
-            uploaded_file.save(full_path)
-
-            relative_path = os.path.relpath(full_path, BASE_UPLOAD_FOLDER)
-            add_score_files(meet_id, event_id, [relative_path])
-
-            known_exam_data = event_data.get("examTopics", [])
-            try:
-                parse_result = parse_single_student_exam_image(relative_path, known_exam_data)
-                correct_qs = parse_result.get("correctQuestions", [])
-                incorrect_qs = parse_result.get("incorrectQuestions", [])
-                flash(f"Team GPT parse success. correct={len(correct_qs)}", "success")
-            except Exception as e:
-                flash(f"GPT parse error for team event: {str(e)}", "error")
-                return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-        update_team_scores(meet_id, event_id, correct_qs, incorrect_qs)
-        return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        return run_flow(upload_team_scores_flow(meet_id, event_id))
 
     # ---------- SINGLE-STUDENT SCORES (INDIVIDUAL EVENTS) ----------
     @app.route("/meet/<meet_id>/event/<event_id>/upload_single_student_score", methods=["POST"])
     def upload_single_student_score(meet_id, event_id):
-        event_data = get_event(meet_id, event_id)
-        if not event_data:
-            flash("Event not found.", "error")
-            return redirect(url_for("view_meet", meet_id=meet_id))
-
-        event_name = event_data.get("eventName", "")
-        is_team_event = event_name in TEAM_EVENTS
-
-        student_name = request.form.get("studentName")
-        grade_level = request.form.get("gradeLevel")
-
-        if not (student_name and grade_level):
-            flash("Missing form data (name or grade).", "error")
-            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-        if is_team_event:
-            new_participant = {
-                "studentName": student_name,
-                "gradeLevel": grade_level,
-                "correctQuestions": [],
-                "incorrectQuestions": []
-            }
-            add_participant_scores(meet_id, event_id, [new_participant])
-            flash(f"Added {student_name} to team event '{event_name}'.", "success")
-            return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-        score_mode = request.form.get("scoreMode", "manual")
-        correct_qs = []
-        incorrect_qs = []
-
-        if score_mode == "manual":
-            num_q = event_data.get("numQuestions", 0)
-            if num_q < 1:
-                flash("No total # of questions set for this event. Upload exam or set event['numQuestions'] first!", "error")
-                return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-            inc_str = request.form.get("incorrectList")
-            inc_set = set()
-            if inc_str:
-                for item in inc_str.split(","):
-                    item = item.strip()
-                    if item.isdigit():
-                        qn = int(item)
-                        if 1 <= qn <= num_q:
-                            inc_set.add(qn)
-
-            for i in range(1, num_q + 1):
-                if i in inc_set:
-                    incorrect_qs.append(i)
-                else:
-                    correct_qs.append(i)
-
-            flash(f"Manually entered data for {student_name}. Correct={len(correct_qs)}, Incorrect={len(incorrect_qs)}", "success")
-        else:
-            uploaded_file = request.files.get("scoreFile")
-            if not uploaded_file or uploaded_file.filename == "":
-                flash("No file selected for image-based parsing.", "error")
-                return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-            scores_folder = os.path.join(BASE_UPLOAD_FOLDER, "scores", meet_id, event_id)
-            os.makedirs(scores_folder, exist_ok=True)
-
-            original_filename = secure_filename(uploaded_file.filename)
-            unique_name = f"{uuid.uuid4()}_{original_filename}"
-            full_path = os.path.join(scores_folder, unique_name)
-            uploaded_file.save(full_path)
-
-            relative_path = os.path.relpath(full_path, BASE_UPLOAD_FOLDER)
-            add_score_files(meet_id, event_id, [relative_path])
-
-            known_exam_data = event_data.get("examTopics", [])
-            try:
-                parse_result = parse_single_student_exam_image(relative_path, known_exam_data)
-                correct_qs = parse_result.get("correctQuestions", [])
-                incorrect_qs = parse_result.get("incorrectQuestions", [])
-                flash(f"Image-based parsing for {student_name} done! Correct={len(correct_qs)}", "success")
-            except Exception as e:
-                flash(f"GPT parse error: {str(e)}", "error")
-                return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
-
-        new_participant = {
-            "studentName": student_name,
-            "gradeLevel": grade_level,
-            "correctQuestions": correct_qs,
-            "incorrectQuestions": incorrect_qs
-        }
-        add_participant_scores(meet_id, event_id, [new_participant])
-        return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
+        return run_flow(upload_single_student_score_flow(meet_id, event_id))
 
     @app.route("/dashboard")
     def dashboard_view():
-        # Get the global topic accuracy stats
-        topic_accuracy_dict = get_topic_accuracy_across_meets(skip_team_events=False)
-        sorted_topic_accuracy = sorted(topic_accuracy_dict.items(), key=lambda i: i[1]["accuracy"])
-        topic_labels = [t[0] for t in sorted_topic_accuracy]
-        topic_values = [round(t[1]["accuracy"] * 100, 1) for t in sorted_topic_accuracy]
-
-        event_summaries = get_event_scores_summary()
-        event_summaries.sort(key=lambda e: e["totalCorrect"], reverse=True)
-
-        participant_breakdowns = get_individual_breakdowns(skip_team_events=True)
-        participant_breakdowns.sort(key=lambda p: p["totalCorrect"], reverse=True)
-
-        courses = ["Algebra", "Geometry", "Algebra II", "Precalculus"]
-        course_topic_data = {}
-
-        for course in courses:
-            # Get the list of topics for this course from your default topic list.
-            topics_for_course = {}
-            # Filter global topics: must be in this course and have importance ≥ 7.
-            for topic, stats in topic_accuracy_dict.items():
-                if course == topic.split(" - ")[0] and stats.get("importance", 0) >= 7:
-                    topics_for_course[topic] = stats
-            # Sort topics from least to highest importance.
-            sorted_topics = sorted(topics_for_course.items(), key=lambda x: x[1]["importance"], reverse=True)
-            labels = [t[0] for t in sorted_topics]
-            values = [round(t[1]["importance"], 1) for t in sorted_topics]
-            course_topic_data[course] = {"labels": labels, "values": values}
-
-        return render_template("dashboard.html",
-                            sorted_topic_accuracy=sorted_topic_accuracy,
-                            topic_accuracy=topic_accuracy_dict,
-                            event_summaries=event_summaries,
-                            participant_breakdowns=participant_breakdowns,
-                            topic_labels=topic_labels,
-                            topic_values=topic_values,
-                            course_topic_data=course_topic_data)
+        # The tables and chart data are rendered once per store version.
+        stats = cached_fragment("partials/dashboard_stats.html", None, dashboard_stats_context)
+        return render_template("dashboard.html", stats=stats)
+
+    @app.route("/student/<student_id>")
+    def view_student(student_id):
+        history = get_student_history(student_id)
+        if not history:
+            flash("Student not found.", "error")
+            return redirect(url_for("dashboard_view"))
+        recommendations = get_recommendations().get("students", {}).get(student_id, [])
+        return render_template("student.html", student=history["student"], events=history["events"],
+                               recommendations=recommendations[:5])
+
+    @app.route("/api/recommendations/student/<student_id>")
+    def student_recommendations_api(student_id):
+        """A student's top practice topics as JSON (?k=<count>, at most MAX_RECOMMENDATIONS)."""
+        k = min(max(1, request.args.get("k", 5, type=int)), MAX_RECOMMENDATIONS)
+        return jsonify(get_recommendations()["students"].get(student_id, [])[:k])
+
+    @app.route("/api/recommendations/team/<event_name>")
+    def team_recommendations_api(event_name):
+        """A team event's top practice topics as JSON (?k=<count>, at most MAX_RECOMMENDATIONS)."""
+        k = min(max(1, request.args.get("k", 5, type=int)), MAX_RECOMMENDATIONS)
+        return jsonify(get_recommendations()["teams"].get(event_name, [])[:k])
+
+    @app.route("/api/topic_trends")
+    def topic_trends_api():
+        """
+        Per-topic accuracy by meet and its moving average, as JSON.
+        Query: ?topic=<label> (repeatable, default all) &window=<meets> (default 3, at most MAX_TREND_WINDOW)
+        """
+        window = request.args.get("window", 3, type=int)
+        topics = tuple(sorted(request.args.getlist("topic"))) or None
+        return jsonify(get_topic_trends(window, topics))
+
+    @app.route("/export/<dataset>.<file_format>")
+    def export_dataset(dataset, file_format):
+        """
+        Streams an analytics table (see src/analytics_export.py) as CSV, JSONL or Parquet.
+        Query: ?season=<2023-24> (repeatable, default all) &individual=1 (leave out team events)
+        """
+        seasons = request.args.getlist("season")
+        try:
+            chunks = export_chunks(dataset, file_format, seasons, request.args.get("individual") == "1")
+        except ExportError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        name = "-".join([dataset] + sorted(seasons))
+        return Response(stream_with_context(chunks), mimetype=MIMETYPES[file_format],
+                        headers={"Content-Disposition": f'attachment; filename="{name}.{file_format}"'})
+
+    # ---------- Resumable uploads (src/chunked_uploads.py) ----------
+    @app.errorhandler(UploadError)
+    def upload_error(e):
+        return jsonify({"status": "error", "message": str(e)}), e.status
+
+    @app.route("/uploads", methods=["POST"])
+    def start_upload():
+        """Opens a resumable upload. JSON body: {"filename", "size", "sha256" (optional)}."""
+        body = request.get_json(silent=True) or {}
+        return jsonify(init_upload(body.get("filename"), body.get("size"), body.get("sha256"))), 201
+
+    @app.route("/uploads/<upload_id>", methods=["GET", "DELETE"])
+    def resumable_upload(upload_id):
+        """The upload's status, with the chunks received so far; DELETE abandons it."""
+        if request.method == "DELETE":
+            abort_upload(upload_id)
+            return jsonify({"status": "success"})
+        return jsonify(upload_status(upload_id))
+
+    @app.route("/uploads/<upload_id>/chunks/<int:index>", methods=["PUT"])
+    def put_upload_chunk(upload_id, index):
+        """One chunk as the request body, with its CRC-32 in the X-Chunk-CRC32 header (hex)."""
+        write_chunk(upload_id, index, request.stream, request.headers.get("X-Chunk-CRC32"))
+        return jsonify({"status": "success", "index": index})
+
+    @app.route("/uploads/<upload_id>/complete", methods=["POST"])
+    def finish_upload(upload_id):
+        """Checks that every chunk arrived; the upload id can then be submitted with an upload form."""
+        return jsonify(complete_upload(upload_id))
+
+    @app.route("/api/gpt_stats")
+    def gpt_stats():
+        """GPT call counters, retry counts and latency percentiles as JSON."""
+        return jsonify(get_gpt_stats())
+
+    @app.route("/progress/<job_id>")
+    def progress_stream(job_id):
+        """Server-sent events with the stages of an upload sent with progressId=<job_id>."""
+        return Response(sse_stream(job_id), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    if profiler is not None:
+        @app.route("/admin/profiles")
+        def profiles_page():
+            """Recently profiled requests. Needs ?token=<PROFILING_TOKEN>."""
+            token = request.args.get("token", "")
+            if not profiler.token_matches(token):
+                abort(404)
+            return render_template("profiles.html", profiles=list_profiles(profiler.profile_dir), token=token)
+
+        @app.route("/admin/profiles/<profile_id>.<ext>")
+        def profile_file(profile_id, ext):
+            """A saved profile's pstats (.prof), collapsed stacks (.folded) or summary (.json)."""
+            if ext not in ("prof", "folded", "json") or not profiler.token_matches(request.args.get("token", "")):
+                abort(404)
+            return send_from_directory(os.path.abspath(profiler.profile_dir), f"{profile_id}.{ext}", as_attachment=True)
 
     # ---------- Delete Routes ----------
     @app.route("/meet/<meet_id>/delete_event/<event_id>", methods=["POST"])
@@ -456,11 +778,12 @@ def create_app():
     def remove_participant(meet_id, event_id):
         student_name = request.form.get("studentName")
         grade_level = request.form.get("gradeLevel")
-        if not (student_name and grade_level):
+        student_id = request.form.get("studentId")
+        if not (student_id or (student_name and grade_level)):
             flash("Missing participant info.", "error")
             return redirect(url_for("view_event", meet_id=meet_id, event_id=event_id))
 
-        ok = delete_participant(meet_id, event_id, student_name, grade_level)
+        ok = delete_participant(meet_id, event_id, student_name, grade_level, student_id=student_id)
         if ok:
             flash("Participant removed successfully!", "success")
         else:
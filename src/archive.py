@@ -0,0 +1,181 @@
+# src/archive.py
+# Cold storage for finished seasons. Archiving (src/seasons.py) moves a
+# season's meets out of the live store into a read-only, gzip-compressed file
+# next to it:
+#   archive/<season>.json.gz   {"season", "meets": [meet dicts as in store.json]}
+#   archive/index.json         {"seasons": { season: {
+#       "file", "meets": [{"id", "title", "date", "events": [{"id", "eventName"}]}],
+#       "topicRollups": { meet_id: { topic label: [correct, attempted] } },
+#       "uploads": [upload paths the season's meets reference],
+#       "aggregates": {...}  # precomputed dashboard numbers, see dashboard_logic.season_aggregates
+#   } } }
+# The index is small and answers the dashboard, trends and student pages on
+# its own; a season's file is only read when one of its meets or events is
+# opened. Both are cached in memory until their file changes.
+
+import datetime
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from src.models import Meet
+from src.tenants import store_file_path
+
+# Seasons run from August to July and are named "2023-24".
+SEASON_START_MONTH = 8
+ARCHIVE_CACHE_SIZE = int(os.getenv("ARCHIVE_CACHE_SIZE", "8"))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def season_of(date):
+    """The season an ISO date falls in, or None for an undated meet."""
+    if not date:
+        return None
+    day = datetime.date.fromisoformat(date)
+    start = day.year if day.month >= SEASON_START_MONTH else day.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def archive_dir():
+    """The archive folder of the active store (tenant)."""
+    return os.path.join(os.path.dirname(store_file_path()), "archive")
+
+
+def _file_version(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def index_version():
+    """Changes whenever the active archive index is rewritten (None without an archive)."""
+    return _file_version(os.path.join(archive_dir(), "index.json"))
+
+
+def _cached(path, load):
+    """load(path), kept until the file changes; at most ARCHIVE_CACHE_SIZE files are held."""
+    key = os.path.abspath(path)
+    version = _file_version(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(key)
+            return entry[1]
+    value = load(path)
+    with _cache_lock:
+        _cache[key] = (version, value)
+        _cache.move_to_end(key)
+        while len(_cache) > ARCHIVE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+
+def _load_index(path):
+    if not os.path.exists(path):
+        return {"seasons": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_season_file(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [Meet.from_dict(m) for m in json.load(f)["meets"]]
+
+
+def read_index():
+    """The archive index (read-only); {"seasons": {}} when nothing is archived."""
+    return _cached(os.path.join(archive_dir(), "index.json"), _load_index)
+
+
+def archived_seasons():
+    """(season, index entry) pairs, oldest season first."""
+    return sorted(read_index()["seasons"].items())
+
+
+def load_season(season):
+    """The archived meets of a season as models.Meet objects (shared, read-only); [] if not archived."""
+    entry = read_index()["seasons"].get(season)
+    if entry is None:
+        return []
+    return _cached(os.path.join(archive_dir(), entry["file"]), _load_season_file)
+
+
+def season_of_meet(meet_id):
+    """The season an archived meet is in, or None if it isn't archived."""
+    for season, entry in archived_seasons():
+        if any(m["id"] == meet_id for m in entry["meets"]):
+            return season
+    return None
+
+
+def season_of_event(event_id):
+    """The season an archived event is in, or None if it isn't archived."""
+    for season, entry in archived_seasons():
+        if any(e["id"] == event_id for m in entry["meets"] for e in m["events"]):
+            return season
+    return None
+
+
+def find_meet(meet_id):
+    """An archived meet, loading only its season's file; None if it isn't archived."""
+    season = season_of_meet(meet_id)
+    if season is None:
+        return None
+    return next((m for m in load_season(season) if m.id == meet_id), None)
+
+
+def archived_meets():
+    """Yields every archived meet, season by season (each season's file is loaded in turn)."""
+    for season, _ in archived_seasons():
+        yield from load_season(season)
+
+
+def meet_summaries():
+    """Meet objects with id, title and date only (no events), for every archived meet, from the index."""
+    return [Meet(m["id"], m["title"], m.get("date"))
+            for _, entry in archived_seasons() for m in entry["meets"]]
+
+
+def archived_upload_paths():
+    return {p for _, entry in archived_seasons() for p in entry.get("uploads", ())}
+
+
+def _replace(path, write):
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_season(season, meets, entry):
+    """
+    Writes a season's archive file and its index entry (`entry` without "file"
+    or "meets", which are filled in here). The file is written before the index,
+    so the index never points at a missing or partial file.
+    """
+    folder = archive_dir()
+    os.makedirs(folder, exist_ok=True)
+    file_name = f"{season}.json.gz"
+
+    def write_file(path):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"season": season, "meets": [m.to_dict() for m in meets]}, f, separators=(",", ":"))
+    _replace(os.path.join(folder, file_name), write_file)
+
+    index = _load_index(os.path.join(folder, "index.json"))
+    index["seasons"][season] = dict(
+        entry,
+        file=file_name,
+        meets=[{"id": m.id, "title": m.title, "date": m.date,
+                "events": [{"id": e.id, "eventName": e.eventName} for e in m.events]} for m in meets],
+    )
+
+    def write_index(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+    _replace(os.path.join(folder, "index.json"), write_index)
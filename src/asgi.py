@@ -0,0 +1,265 @@
+# src/asgi.py
+"""
+Async (ASGI) serving mode.
+
+    pip install uvicorn
+    uvicorn --factory src.asgi:create_asgi_app        (or: python -m src.asgi)
+
+The GPT-backed upload routes (app.UPLOAD_FLOWS) run as flows (see src/flows.py):
+form parsing, file saves and store commits run on a small thread pool, while
+the model call itself is awaited on the event loop with the async OpenAI
+client. An upload waiting on GPT therefore holds no thread, and page views
+keep being served while many uploads are in flight. Every other request is
+handed to the regular Flask WSGI app on the same thread pool.
+"""
+import asyncio
+import contextvars
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from werkzeug.exceptions import HTTPException
+
+from src.app import create_app, UPLOAD_FLOWS
+from src.flows import advance, finish_flow
+from src.progress import tracker, format_sse, KEEPALIVE_SECONDS, JOB_TTL_SECONDS
+from src.tenants import split_tenant_prefix
+
+ASGI_WORKER_THREADS = int(os.getenv("ASGI_WORKER_THREADS", "8"))
+# Request bodies above this size are spooled to a temporary file.
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI http scope; `body` is a file-like object positioned at 0."""
+    script_name = scope.get("root_path", "").encode("utf8").decode("latin1")
+    path_info = scope["path"].encode("utf8").decode("latin1")
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope.get("query_string", b"").decode("ascii"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if name == "CONTENT_LENGTH":
+            environ["CONTENT_LENGTH"] = value
+        elif name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def read_body(receive):
+    """Reads the request body into a spooled temporary file; None if the client disconnected."""
+    body = SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            body.close()
+            return None
+        body.write(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body.seek(0)
+    return body
+
+
+class AsyncUploadApp:
+    """ASGI application wrapping the Flask app; see the module docstring."""
+
+    def __init__(self, flask_app, worker_threads=ASGI_WORKER_THREADS):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="asgi-worker")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        body = await read_body(receive)
+        if body is None:
+            return
+        try:
+            environ = build_environ(scope, body)
+            # Routing below bypasses the app's WSGI middleware, so apply the tenant prefix here.
+            split_tenant_prefix(environ)
+            endpoint, view_args = self._match(environ)
+            if endpoint == "progress_stream":
+                await self._stream_progress(view_args["job_id"], send)
+            elif self._flow_endpoint(environ) is not None:
+                await self._run_flow(environ, send)
+            else:
+                await self._run_wsgi(environ, send)
+        finally:
+            body.close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _match(self, environ):
+        try:
+            return self.flask_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None, {}
+
+    def _flow_endpoint(self, environ):
+        if environ["REQUEST_METHOD"] != "POST":
+            return None
+        endpoint, _ = self._match(environ)
+        return endpoint if endpoint in UPLOAD_FLOWS else None
+
+    async def _stream_progress(self, job_id, send, poll_interval=0.2):
+        """Server-sent progress events for an upload, polled without holding a thread."""
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        })
+        await send({"type": "http.response.body", "body": b"retry: 2000\n\n", "more_body": True})
+        cursor = 0
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < JOB_TTL_SECONDS:
+            events, done = tracker.poll(job_id, cursor)
+            cursor += len(events)
+            chunk = "".join(format_sse(stage, data) for stage, data in events)
+            if not chunk and time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                chunk = ": keep-alive\n\n"
+            if chunk:
+                last_sent = time.monotonic()
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+            if done:
+                break
+            await asyncio.sleep(poll_interval)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _in_thread(self, context, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, fn, *args)
+
+    async def _run_wsgi(self, environ, send):
+        response = {}
+        # Every step runs in one context, so a streamed body (stream_with_context)
+        # still sees its request and tenant while the later chunks are generated.
+        context = contextvars.copy_context()
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+
+        def run():
+            result = self.flask_app(environ, start_response)
+            chunks = iter(result)
+            return result, next(chunks, None), chunks
+
+        def close(result):
+            if hasattr(result, "close"):
+                result.close()
+
+        result, chunk, chunks = await self._in_thread(context, run)
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response["status"],
+                "headers": _encode_headers(response["headers"]),
+            })
+            # Send the body as the app produces it, so streamed exports don't build up in memory.
+            while chunk is not None:
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await self._in_thread(context, next, chunks, None)
+        finally:
+            await self._in_thread(context, close, result)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _run_flow(self, environ, send):
+        app = self.flask_app
+        # The flow's synchronous parts run on pool threads inside one contextvars
+        # context, so the Flask request context pushed in start() stays active.
+        context = contextvars.copy_context()
+        request_ctx = app.request_context(environ)
+        state = {}
+
+        def guarded(fn, *args):
+            try:
+                return fn(*args)
+            except Exception as e:
+                try:
+                    return None, app.handle_user_exception(e)
+                except Exception as unhandled:
+                    return None, app.handle_exception(unhandled)
+
+        def start():
+            request_ctx.push()
+            rv = app.preprocess_request()
+            if rv is not None:
+                return None, rv
+            flow = UPLOAD_FLOWS[request_ctx.request.url_rule.endpoint](**request_ctx.request.view_args)
+            state["flow"] = flow
+            return advance(flow)
+
+        def finish(rv):
+            try:
+                response = app.process_response(app.make_response(finish_flow(rv)))
+                return response.status_code, response.headers.to_wsgi_list(), b"".join(response.iter_encoded())
+            finally:
+                request_ctx.pop()
+
+        step, rv = await self._in_thread(context, guarded, start)
+        while step is not None:
+            try:
+                # Run the awaited parse inside the request's context too.
+                result = await context.run(asyncio.ensure_future, step.arun())
+            except Exception as e:
+                step, rv = await self._in_thread(context, guarded, advance, state["flow"], None, e)
+            else:
+                step, rv = await self._in_thread(context, guarded, advance, state["flow"], result)
+        status, headers, body = await self._in_thread(context, finish, rv)
+        await _send_response(send, status, headers, body)
+
+
+def _encode_headers(headers):
+    return [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers]
+
+
+async def _send_response(send, status, headers, body):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": _encode_headers(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_asgi_app():
+    return AsyncUploadApp(create_app())
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(create_asgi_app(), host="127.0.0.1", port=int(os.getenv("PORT", "5000")))
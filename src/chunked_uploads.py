@@ -0,0 +1,257 @@
+# src/chunked_uploads.py
+# Resumable uploads for big scans over flaky connections. A client opens an
+# upload (init_upload), sends fixed-size chunks in any order, several at once,
+# each with its CRC-32 (write_chunk), and completes it (complete_upload). A
+# dropped connection only costs the chunks that were in flight; the client asks
+# for the upload's status and sends the rest. Every chunk is copied from the
+# request body straight to its offset in a preallocated file, a block at a
+# time, so a request never holds more than one block in memory.
+#
+# An upload form is then submitted with the completed upload's id instead of
+# the file, and claim_upload() moves the file into the content-addressed store
+# (src/upload_store.py) for the flow, without copying it again.
+#
+# Uploads in progress live in uploads/.partial/<upload_id>/: meta.json, the
+# data file and a marker per received chunk, so parallel chunk requests never
+# write to a shared file other than their own part of the data.
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import zlib
+
+from src.tenants import upload_root
+from src.upload_store import CHUNK_SIZE, PARTIAL_DIR, store_file
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(512 * 1024 * 1024)))
+# Uploads untouched for this long are removed by `flask gc-uploads`.
+PARTIAL_MAX_AGE_SECONDS = 24 * 3600
+
+_DATA_FILE = "data"
+_META_FILE = "meta.json"
+_RECEIVED_DIR = "received"
+
+
+class UploadError(ValueError):
+    """A rejected upload request; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _partial_root():
+    return os.path.join(upload_root(), PARTIAL_DIR)
+
+
+def _upload_dir(upload_id):
+    # Ids are uuid4 hex; anything else could point outside .partial/.
+    if not (isinstance(upload_id, str) and len(upload_id) == 32
+            and all(c in "0123456789abcdef" for c in upload_id)):
+        raise UploadError("Unknown upload.", status=404)
+    return os.path.join(_partial_root(), upload_id)
+
+
+def _read_meta(upload_id):
+    try:
+        with open(os.path.join(_upload_dir(upload_id), _META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        raise UploadError("Unknown upload.", status=404)
+
+
+def _write_meta(upload_id, meta):
+    path = os.path.join(_upload_dir(upload_id), _META_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+def _chunk_count(meta):
+    return -(-meta["size"] // meta["chunkSize"])
+
+
+def _received(upload_id):
+    try:
+        return sorted(int(name) for name in os.listdir(os.path.join(_upload_dir(upload_id), _RECEIVED_DIR)))
+    except FileNotFoundError:
+        raise UploadError("Unknown upload.", status=404)
+
+
+def _status(upload_id, meta):
+    status = {
+        "uploadId": upload_id,
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "chunkSize": meta["chunkSize"],
+        "chunks": _chunk_count(meta),
+        "received": _received(upload_id),
+        "complete": meta.get("complete", False),
+    }
+    if status["complete"]:
+        status["sha256"] = meta["sha256"]
+    return status
+
+
+def init_upload(filename, size, sha256=None):
+    """
+    Opens an upload of `size` bytes and preallocates its file. `sha256`, if
+    given, is checked against the assembled file on completion. Returns the
+    upload's status (see upload_status()).
+    """
+    if not filename or not isinstance(filename, str):
+        raise UploadError("A filename is required.")
+    if not isinstance(size, int) or isinstance(size, bool) or size < 1:
+        raise UploadError("The size must be a positive number of bytes.")
+    if size > MAX_UPLOAD_SIZE:
+        raise UploadError(f"Files over {MAX_UPLOAD_SIZE // 2**20} MB are not accepted.", status=413)
+    if sha256 is not None and not (isinstance(sha256, str) and len(sha256) == 64):
+        raise UploadError("sha256 must be 64 hex digits.")
+
+    upload_id = uuid.uuid4().hex
+    directory = _upload_dir(upload_id)
+    os.makedirs(os.path.join(directory, _RECEIVED_DIR))
+    with open(os.path.join(directory, _DATA_FILE), "wb") as f:
+        f.truncate(size)
+    meta = {"filename": filename, "size": size, "chunkSize": UPLOAD_CHUNK_SIZE,
+            "sha256": sha256.lower() if sha256 else None, "created": time.time()}
+    _write_meta(upload_id, meta)
+    return _status(upload_id, meta)
+
+
+def upload_status(upload_id):
+    """
+    {"uploadId", "filename", "size", "chunkSize", "chunks", "received", "complete"}
+    (plus "sha256" once complete); "received" lists the chunk indexes stored so far.
+    """
+    return _status(upload_id, _read_meta(upload_id))
+
+
+def _parse_crc32(checksum):
+    try:
+        return int(checksum, 16)
+    except (TypeError, ValueError):
+        raise UploadError("Each chunk needs its CRC-32 as 8 hex digits (X-Chunk-CRC32).")
+
+
+def write_chunk(upload_id, index, stream, checksum):
+    """
+    Copies chunk `index` from a binary stream to its place in the upload's file,
+    checking its length and CRC-32 (`checksum`, hex). A chunk that fails either
+    check is not marked received and has to be sent again.
+    """
+    meta = _read_meta(upload_id)
+    if meta.get("complete"):
+        raise UploadError("The upload is already complete.", status=409)
+    chunks = _chunk_count(meta)
+    if not 0 <= index < chunks:
+        raise UploadError(f"Chunk {index} is out of range (0-{chunks - 1}).")
+    expected_crc = _parse_crc32(checksum)
+    directory = _upload_dir(upload_id)
+    marker = os.path.join(directory, _RECEIVED_DIR, str(index))
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            if f.read() == f"{expected_crc:08x}":
+                return  # A retry of a chunk whose reply was lost.
+        # Being rewritten: not received until the new bytes check out.
+        os.remove(marker)
+    except FileNotFoundError:
+        pass
+
+    offset = index * meta["chunkSize"]
+    length = min(meta["chunkSize"], meta["size"] - offset)
+    crc = written = 0
+    with open(os.path.join(directory, _DATA_FILE), "r+b") as out:
+        out.seek(offset)
+        while True:
+            block = stream.read(min(CHUNK_SIZE, length + 1 - written))
+            if not block:
+                break
+            written += len(block)
+            if written > length:
+                raise UploadError(f"Chunk {index} is longer than {length} bytes.")
+            crc = zlib.crc32(block, crc)
+            out.write(block)
+    if written != length:
+        raise UploadError(f"Chunk {index} has {written} bytes, expected {length}.")
+    if crc != expected_crc:
+        raise UploadError(f"Chunk {index} does not match its checksum.")
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(f"{crc:08x}")
+
+
+def complete_upload(upload_id):
+    """
+    Checks that every chunk has arrived and hashes the assembled file (against
+    the sha256 given to init_upload(), if any). Returns the upload's status;
+    completing a completed upload again is harmless.
+    """
+    meta = _read_meta(upload_id)
+    if meta.get("complete"):
+        return _status(upload_id, meta)
+    missing = _chunk_count(meta) - len(_received(upload_id))
+    if missing:
+        raise UploadError(f"{missing} chunk(s) have not arrived yet.", status=409)
+
+    digest = hashlib.sha256()
+    with open(os.path.join(_upload_dir(upload_id), _DATA_FILE), "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    sha = digest.hexdigest()
+    if meta["sha256"] and meta["sha256"] != sha:
+        abort_upload(upload_id)
+        raise UploadError("The assembled file does not match its sha256; upload it again.")
+    meta.update(sha256=sha, complete=True)
+    _write_meta(upload_id, meta)
+    return _status(upload_id, meta)
+
+
+def claim_upload(upload_id, category):
+    """
+    Moves a completed upload into the content-addressed store under `category`
+    and forgets the upload. Returns (relative_path, is_duplicate) like
+    upload_store.save_stream(). An upload can be claimed once.
+    """
+    meta = _read_meta(upload_id)
+    if not meta.get("complete"):
+        raise UploadError("The upload is not complete.", status=409)
+    directory = _upload_dir(upload_id)
+    try:
+        stored = store_file(os.path.join(directory, _DATA_FILE), meta["sha256"], meta["filename"], category)
+    except FileNotFoundError:
+        raise UploadError("Unknown upload.", status=404)  # claimed concurrently
+    shutil.rmtree(directory, ignore_errors=True)
+    return stored
+
+
+def abort_upload(upload_id):
+    """Deletes an upload and whatever it has received."""
+    directory = _upload_dir(upload_id)
+    if not os.path.isdir(directory):
+        raise UploadError("Unknown upload.", status=404)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def expire_partial_uploads(max_age=PARTIAL_MAX_AGE_SECONDS, dry_run=False):
+    """Removes uploads (complete or not) that have not been touched for `max_age` seconds; returns their ids."""
+    root = _partial_root()
+    if not os.path.isdir(root):
+        return []
+    cutoff = time.time() - max_age
+    expired = []
+    for upload_id in sorted(os.listdir(root)):
+        directory = os.path.join(root, upload_id)
+        # A received chunk touches received/, completion rewrites meta.json.
+        touched = [os.path.join(directory, name) for name in (_META_FILE, _RECEIVED_DIR)]
+        last_activity = max((os.path.getmtime(p) for p in touched if os.path.exists(p)),
+                            default=os.path.getmtime(directory))
+        if last_activity > cutoff:
+            continue
+        expired.append(upload_id)
+        if not dry_run:
+            shutil.rmtree(directory, ignore_errors=True)
+    return expired
@@ -0,0 +1,153 @@
+# src/cli.py
+# Maintenance commands, registered on the app by create_app(). Run them with
+#   flask --app src.app <command>
+
+import functools
+import os
+
+import click
+
+from src.analytics_export import COLUMNS, FORMATS as EXPORT_FORMATS, ExportError, export_to_file
+from src.archive import archived_seasons, season_of_meet
+from src.chunked_uploads import expire_partial_uploads
+from src.data_manager import convert_store, load_data, get_event
+from src.export import export_site
+from src.rendering import TEMPLATE_CACHE_DIR, precompile_templates
+from src.roster import RosterError, import_roster, read_roster_csv, read_roster_jsonl
+from src.seasons import archive_season, live_seasons
+from src.serialization import FORMATS as STORE_FORMATS
+from src.tenants import create_tenant, list_tenants, tenant_context
+from src.topics import TEAM_EVENTS
+from src.upload_store import collect_garbage
+
+
+def with_tenant(command):
+    """Adds a --tenant option that runs the command against that team's store and uploads."""
+    @click.option("--tenant", default=None, help="Tenant (team) id; default: the single-team store.")
+    @functools.wraps(command)
+    def wrapper(*args, tenant, **kwargs):
+        try:
+            with tenant_context(tenant):
+                return command(*args, **kwargs)
+        except KeyError as e:
+            raise click.ClickException(e.args[0])
+    return wrapper
+
+
+def register_commands(app):
+
+    @app.cli.command("create-tenant")
+    @click.argument("tenant_id")
+    def create_tenant_command(tenant_id):
+        """Create a tenant (team) with an empty store, served under /t/<tenant_id>/."""
+        try:
+            create_tenant(tenant_id)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Created tenant '{tenant_id}'.")
+
+    @app.cli.command("list-tenants")
+    def list_tenants_command():
+        """List the tenants (teams)."""
+        for tenant_id in list_tenants():
+            click.echo(tenant_id)
+
+    @app.cli.command("gc-uploads")
+    @with_tenant
+    @click.option("--dry-run", is_flag=True, help="List the files that would be removed without deleting them.")
+    def gc_uploads(dry_run):
+        """Remove uploaded files no meet or event references any more."""
+        removed = collect_garbage(load_data(), dry_run=dry_run)
+        for path in removed:
+            click.echo(path)
+        expired = expire_partial_uploads(dry_run=dry_run)
+        verb = "Would remove" if dry_run else "Removed"
+        click.echo(f"{verb} {len(removed)} unreferenced file(s) and {len(expired)} abandoned resumable upload(s).")
+
+    @app.cli.command("list-seasons")
+    @with_tenant
+    def list_seasons_command():
+        """List the seasons in the live store and in the archive, with their meet counts."""
+        for season, count in live_seasons(load_data()).items():
+            click.echo(f"{season}  live      {count} meet(s)")
+        for season, entry in archived_seasons():
+            click.echo(f"{season}  archived  {len(entry['meets'])} meet(s)")
+
+    @app.cli.command("archive-season")
+    @click.argument("season")
+    @with_tenant
+    def archive_season_command(season):
+        """Move a finished season's meets (e.g. 2023-24) to compressed, read-only archive storage."""
+        try:
+            moved = archive_season(season)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Archived {moved} meet(s) of the {season} season.")
+
+    @app.cli.command("convert-store")
+    @click.argument("store_format", type=click.Choice(STORE_FORMATS))
+    @with_tenant
+    def convert_store_command(store_format):
+        """Rewrite the store in another format now (later saves use STORE_FORMAT)."""
+        size = convert_store(store_format)
+        click.echo(f"Store rewritten as {store_format} ({size / 1024:.0f} kB).")
+
+    @app.cli.command("precompile-templates")
+    def precompile_templates_command():
+        """Compile every template into the on-disk bytecode cache, so workers start warm."""
+        names = precompile_templates(app)
+        click.echo(f"Compiled {len(names)} template(s) into {TEMPLATE_CACHE_DIR}.")
+
+    @app.cli.command("export-site")
+    @click.argument("out_dir", type=click.Path(file_okay=False))
+    @click.option("--base-path", default="", help="URL prefix the site will be served under, e.g. /team.")
+    @click.option("--full", is_flag=True, help="Re-render every page, not just the ones whose data changed.")
+    @with_tenant
+    def export_site_command(out_dir, base_path, full):
+        """Export a static, read-only snapshot of the site (HTML, JSON data and static files)."""
+        result = export_site(app, out_dir, base_path=base_path, full=full)
+        click.echo(f"Rendered {len(result['rendered'])} page(s), {result['unchanged']} unchanged, "
+                   f"removed {len(result['removed'])}; wrote {result['files']} data/static file(s) to {out_dir}.")
+
+    @app.cli.command("export-data")
+    @click.argument("dataset", type=click.Choice(list(COLUMNS)))
+    @click.argument("out_file", type=click.Path(dir_okay=False))
+    @click.option("--format", "file_format", type=click.Choice(EXPORT_FORMATS),
+                  help="Output format (default: from the file extension).")
+    @click.option("--season", "seasons", multiple=True, help="Only this season, e.g. 2023-24 (repeatable).")
+    @click.option("--individual-only", is_flag=True, help="Leave out team events.")
+    @with_tenant
+    def export_data_command(dataset, out_file, file_format, seasons, individual_only):
+        """Export an analytics table (topic accuracy, event summaries, participants, question outcomes)."""
+        if file_format is None:
+            extension = os.path.splitext(out_file)[1].lstrip(".").lower()
+            file_format = extension if extension in EXPORT_FORMATS else "csv"
+        try:
+            export_to_file(dataset, file_format, out_file, seasons, individual_only)
+        except ExportError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Wrote {dataset} to {out_file} ({file_format}).")
+
+    @app.cli.command("import-roster")
+    @click.argument("meet_id")
+    @click.argument("event_id")
+    @click.argument("roster_file", type=click.File("r", encoding="utf-8-sig"))
+    @click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]),
+                  help="Roster file format (default: from the file extension).")
+    @with_tenant
+    def import_roster_command(meet_id, event_id, roster_file, file_format):
+        """Import an event roster (studentName, gradeLevel, incorrectList) from CSV or JSONL."""
+        event = get_event(meet_id, event_id)
+        if not event:
+            raise click.ClickException("Event not found.")
+        if season_of_meet(meet_id):
+            raise click.ClickException("The meet is archived (read-only).")
+        if file_format is None:
+            file_format = "jsonl" if roster_file.name.endswith((".jsonl", ".ndjson")) else "csv"
+        text = roster_file.read()
+        rows = read_roster_jsonl(text) if file_format == "jsonl" else read_roster_csv(text)
+        try:
+            added, replaced = import_roster(meet_id, event_id, rows, event.eventName in TEAM_EVENTS)
+        except RosterError as e:
+            raise click.ClickException("\n".join(e.errors))
+        click.echo(f"Added {added}, updated {replaced} participant(s).")
@@ -1,121 +1,128 @@
 # src/dashboard_logic.py
 
+import heapq
 import os
 import json
-from src.data_manager import load_data
+from collections import defaultdict
 
-TEAM_EVENTS = {
-    "Frosh-Soph 2-Person",
-    "Jr-Sr 2-Person",
-    "Frosh-Soph 8-person",
-    "Jr-Sr 8-person",
-    "Calculator Team"
-}
+from src.archive import archived_seasons, load_season, meet_summaries, season_of_event
+from src.data_manager import load_data, get_event, get_topic_registry, cached_by_store_version
+from src.rollups import question_topic_ids, tally_topics, topic_trends
+from src.students import student_events
+from src.topics import TEAM_EVENTS, TOPIC_SEPARATOR
 
 
-def get_topic_accuracy_across_meets(skip_team_events=False):
+def topic_importance(accuracy, attempted):
     """
-    Returns a dict: { topic: {"correct": X, "attempted": Y, "accuracy": float, "lost_points": float} }
-    across all meets. If skip_team_events=True, team events are ignored.
+    How much a topic is worth practicing (0-10): high for low accuracy,
+    discounted when there are few attempts to go on.
     """
-    data = load_data()
-    topic_stats = {}
+    return (1 - accuracy**3)*10*(1-(1/(2*(attempted+1))))
+
+
+def _label_topic_stats(registry, correct, attempted):
+    """Maps the id-keyed counters back to { label: {"correct": X, "attempted": Y} } for rendering."""
+    return {
+        registry.label(topic_id): {"correct": correct[topic_id], "attempted": a}
+        for topic_id, a in attempted.items()
+    }
+
+
+def _label_counts(registry, correct, attempted):
+    """Id-keyed counters as { label: [correct, attempted] }, the form kept in the archive index."""
+    return {registry.label(topic_id): [correct[topic_id], a] for topic_id, a in attempted.items()}
+
+
+def _add_label_counts(registry, correct, attempted, counts):
+    """Adds label-keyed [correct, attempted] counts (from the archive index) to id-keyed counters."""
+    for label, (c, a) in counts.items():
+        topic_id = registry.intern(label)
+        correct[topic_id] += c
+        attempted[topic_id] += a
 
-    for meet in data["meets"]:
-        for event in meet["events"]:
-            event_name = event.get("eventName", "")
+
+def _archived_aggregates():
+    """Each archived season's precomputed aggregates (see season_aggregates), oldest first."""
+    return [entry["aggregates"] for _, entry in archived_seasons()]
+
+
+def _tally_meets(registry, meets, skip_team_events):
+    """Per-topic-id (correct, attempted) counters over the meets' scores."""
+    correct = defaultdict(int)
+    attempted = defaultdict(int)
+
+    for meet in meets:
+        for event in meet.events:
+            event_name = event.eventName
             if skip_team_events and event_name in TEAM_EVENTS:
                 continue
 
-            exam_topics = event.get("examTopics", [])
-            q2topics = {}
-            for item in exam_topics:
-                q_num = item["questionNumber"]
-                q2topics[q_num] = item["topics"]
+            q2ids = question_topic_ids(event, registry)
 
             if event_name in TEAM_EVENTS:
-                team_correct = event.get("teamCorrectQuestions", [])
-                team_incorrect = event.get("teamIncorrectQuestions", [])
-                for cq in team_correct:
-                    if cq in q2topics:
-                        for t in q2topics[cq]:
-                            topic_stats.setdefault(t, {"correct": 0, "attempted": 0})
-                            topic_stats[t]["correct"] += 1
-                            topic_stats[t]["attempted"] += 1
-                for iq in team_incorrect:
-                    if iq in q2topics:
-                        for t in q2topics[iq]:
-                            topic_stats.setdefault(t, {"correct": 0, "attempted": 0})
-                            topic_stats[t]["attempted"] += 1
+                tally_topics(correct, attempted, q2ids,
+                              event.teamCorrectQuestions or (),
+                              event.teamIncorrectQuestions or ())
             else:
-                for participant in event.get("participants", []):
-                    correct_qs = participant.get("correctQuestions", [])
-                    incorrect_qs = participant.get("incorrectQuestions", [])
-                    for cq in correct_qs:
-                        if cq in q2topics:
-                            for t in q2topics[cq]:
-                                topic_stats.setdefault(t, {"correct": 0, "attempted": 0})
-                                topic_stats[t]["correct"] += 1
-                                topic_stats[t]["attempted"] += 1
-                    for iq in incorrect_qs:
-                        if iq in q2topics:
-                            for t in q2topics[iq]:
-                                topic_stats.setdefault(t, {"correct": 0, "attempted": 0})
-                                topic_stats[t]["attempted"] += 1
+                for participant in event.participants:
+                    tally_topics(correct, attempted, q2ids,
+                                  participant.correctQuestions,
+                                  participant.incorrectQuestions)
+    return correct, attempted
+
+
+def get_topic_accuracy_across_meets(skip_team_events=False):
+    """
+    Returns a dict: { topic: {"correct": X, "attempted": Y, "accuracy": float, "lost_points": float} }
+    across all meets, archived seasons included. If skip_team_events=True, team events are ignored.
+    Counting runs on interned topic ids; labels are attached at the end.
+    """
+    data = load_data()
+    registry = get_topic_registry(data)
+    correct, attempted = _tally_meets(registry, data["meets"], skip_team_events)
+    for aggregates in _archived_aggregates():
+        _add_label_counts(registry, correct, attempted,
+                          aggregates["topicTotals"]["individual" if skip_team_events else "all"])
+
+    topic_stats = _label_topic_stats(registry, correct, attempted)
 
     # Finalize the accuracy and lost_points for each topic.
     for topic, stats in topic_stats.items():
         c = stats["correct"]
         a = stats["attempted"]
         stats["accuracy"] = float(c) / a if a > 0 else 0.0
-        # Compute importance as (1 - accuracy**2) * attempted.
-        stats["importance"] = (1 - stats["accuracy"]**3)*10*(1-(1/(2*(a+1))))
+        stats["importance"] = topic_importance(stats["accuracy"], a)
 
     return topic_stats
 
 
-def get_event_scores_summary():
-    """
-    Returns a list of event summaries (for the entire dashboard):
-    [
-      {
-        "meetTitle": ...,
-        "eventName": ...,
-        "totalQuestions": ...,
-        "totalCorrect": ...,
-        "totalParticipants": ...
-      },
-      ...
-    ]
-    This now counts correct answers from teamCorrectQuestions for team events,
-    and from participants' correctQuestions for individual events.
-    """
-    data = load_data()
+def event_summaries(meets):
+    """The get_event_scores_summary() rows for the given meets."""
     summaries = []
 
-    for meet in data["meets"]:
-        meet_title = meet["title"]
-        for event in meet["events"]:
-            event_name = event.get("eventName", "Unnamed Event")
+    for meet in meets:
+        meet_title = meet.title
+        for event in meet.events:
+            event_name = event.eventName or "Unnamed Event"
 
             # If you stored examTopics, numQuestions, etc.:
-            exam_topics = event.get("examTopics", [])
+            exam_topics = event.examTopics
             # For display, let's define totalQuestions:
-            # prefer event["numQuestions"] if present, else fall back to len(exam_topics)
-            total_questions = event.get("numQuestions") or len(exam_topics)
+            # prefer event.numQuestions if present, else fall back to len(exam_topics)
+            total_questions = event.numQuestions or len(exam_topics)
 
             # Distinguish team vs. individual
             if event_name in TEAM_EVENTS:
-                # team event => totalCorrect is from event["teamCorrectQuestions"]
-                team_correct = event.get("teamCorrectQuestions", [])
+                # team event => totalCorrect is from event.teamCorrectQuestions
+                team_correct = event.teamCorrectQuestions or ()
                 total_correct = len(team_correct)
-                total_participants = len(event.get("participants", []))  # Just the # people on the team
+                total_participants = len(event.participants)  # Just the # people on the team
             else:
                 # individual event => sum participant correct
                 total_correct = 0
-                participants_list = event.get("participants", [])
+                participants_list = event.participants
                 for participant in participants_list:
-                    total_correct += len(participant.get("correctQuestions", []))
+                    total_correct += len(participant.correctQuestions)
                 total_participants = len(participants_list)
 
             summaries.append({
@@ -129,11 +136,50 @@ def get_event_scores_summary():
     return summaries
 
 
+def get_event_scores_summary():
+    """
+    Returns a list of event summaries (for the entire dashboard):
+    [
+      {
+        "meetTitle": ...,
+        "eventName": ...,
+        "totalQuestions": ...,
+        "totalCorrect": ...,
+        "totalParticipants": ...
+      },
+      ...
+    ]
+    This now counts correct answers from teamCorrectQuestions for team events,
+    and from participants' correctQuestions for individual events.
+    Archived seasons come first, from their precomputed summaries.
+    """
+    summaries = [row for aggregates in _archived_aggregates() for row in aggregates["eventSummaries"]]
+    return summaries + event_summaries(load_data()["meets"])
+
+
+def _student_totals(meets, skip_team_events):
+    """{ student_id: [events, correct, attempted] } over the meets' participants."""
+    totals = defaultdict(lambda: [0, 0, 0])
+    for meet in meets:
+        for event in meet.events:
+            if skip_team_events and event.eventName in TEAM_EVENTS:
+                continue
+            for participant in event.participants:
+                if participant.studentId:
+                    row = totals[participant.studentId]
+                    row[0] += 1
+                    row[1] += len(participant.correctQuestions)
+                    row[2] += len(participant.correctQuestions) + len(participant.incorrectQuestions)
+    return totals
+
+
 def get_individual_breakdowns(skip_team_events=False):
     """
-    Return a list of participants across all meets/events with overall stats, skipping team events if desired.
+    Return a list of registered students with overall stats across all meets/events
+    (archived seasons included), skipping team events if desired.
     e.g. [
       {
+        "studentId": "...",
         "studentName": "...",
         "gradeLevel": "...",
         "meetsEventsParticipated": X,
@@ -144,35 +190,72 @@ def get_individual_breakdowns(skip_team_events=False):
     ]
     """
     data = load_data()
-    participants_map = {}
+    archived = [aggregates["students"] for aggregates in _archived_aggregates()]
+    breakdowns = []
 
-    for meet in data["meets"]:
-        for event in meet["events"]:
-            event_name = event.get("eventName", "")
-            if skip_team_events and event_name in TEAM_EVENTS:
+    for student_id, student in data["students"].items():
+        p_data = {
+            "studentId": student_id,
+            "studentName": student["studentName"],
+            "gradeLevel": student["gradeLevel"],
+            "meetsEventsParticipated": 0,
+            "totalCorrect": 0,
+            "totalQuestionsAttempted": 0
+        }
+        for meet, event, participant in student_events(data, student_id):
+            if skip_team_events and event.eventName in TEAM_EVENTS:
                 continue
+            p_data["meetsEventsParticipated"] += 1
 
-            exam_topics = event.get("examTopics", [])
-            for participant in event.get("participants", []):
-                key = (participant["studentName"], participant["gradeLevel"])
-                if key not in participants_map:
-                    participants_map[key] = {
-                        "studentName": participant["studentName"],
-                        "gradeLevel": participant["gradeLevel"],
-                        "meetsEventsParticipated": 0,
-                        "totalCorrect": 0,
-                        "totalQuestionsAttempted": 0
-                    }
+            correct_qs = participant.correctQuestions
+            incorrect_qs = participant.incorrectQuestions
+            p_data["totalCorrect"] += len(correct_qs)
+            p_data["totalQuestionsAttempted"] += (len(correct_qs) + len(incorrect_qs))
 
-                p_data = participants_map[key]
-                p_data["meetsEventsParticipated"] += 1
+        for students in archived:
+            if student_id in students:
+                n, correct, attempted = students[student_id]["individual" if skip_team_events else "all"]
+                p_data["meetsEventsParticipated"] += n
+                p_data["totalCorrect"] += correct
+                p_data["totalQuestionsAttempted"] += attempted
 
-                correct_qs = participant.get("correctQuestions", [])
-                incorrect_qs = participant.get("incorrectQuestions", [])
-                p_data["totalCorrect"] += len(correct_qs)
-                p_data["totalQuestionsAttempted"] += (len(correct_qs) + len(incorrect_qs))
+        if p_data["meetsEventsParticipated"]:
+            breakdowns.append(p_data)
+
+    return breakdowns
+
+
+def _history_row(meet, event, participant):
+    correct = len(participant.correctQuestions)
+    return {
+        "meetId": meet.id,
+        "meetTitle": meet.title,
+        "eventId": event.id,
+        "eventName": event.eventName,
+        "gradeLevel": participant.gradeLevel,
+        "correct": correct,
+        "attempted": correct + len(participant.incorrectQuestions)
+    }
+
+
+def get_student_history(student_id):
+    """
+    Returns a student's record and the events they competed in, archived seasons
+    first, then in meet order:
+    {"student": {...}, "events": [{"meetId", "meetTitle", "eventId", "eventName",
+                                   "gradeLevel", "correct", "attempted"}, ...]}
+    or None for an unknown student.
+    """
+    data = load_data()
+    student = data["students"].get(student_id)
+    if not student:
+        return None
 
-    return list(participants_map.values())
+    events = [row for aggregates in _archived_aggregates()
+              for row in aggregates["students"].get(student_id, {}).get("history", ())]
+    for meet, event, participant in student_events(data, student_id):
+        events.append(_history_row(meet, event, participant))
+    return {"student": student, "events": events}
 
 def get_event_topic_accuracy(meet_id, event_id):
     """
@@ -180,42 +263,24 @@ def get_event_topic_accuracy(meet_id, event_id):
     for a single event (question-level data).
     Ignores teamCorrectQuestions, because that doesn't map to topics easily.
     """
-    data = load_data()
-    topic_stats = {}
-    the_event = None
-
-    for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for evt in meet["events"]:
-                if evt["id"] == event_id:
-                    the_event = evt
-                    break
+    the_event = get_event(meet_id, event_id)
     if not the_event:
         return {}
 
-    exam_topics = the_event.get("examTopics", [])
-    # map question->topics
-    q2topics = {}
-    for item in exam_topics:
-        q2topics[item["questionNumber"]] = item["topics"]
+    registry = get_topic_registry(load_data())
+    q2ids = question_topic_ids(the_event, registry)
+    correct = defaultdict(int)
+    attempted = defaultdict(int)
 
     # for each participant (individual event), accumulate correctness
     # if it's a team event and you want to skip participant-level data, do so
     # but let's just do what we do for normal question-level participants.
-    for p in the_event.get("participants", []):
-        correct_qs = p.get("correctQuestions", [])
-        incorrect_qs = p.get("incorrectQuestions", [])
-        for cq in correct_qs:
-            if cq in q2topics:
-                for t in q2topics[cq]:
-                    topic_stats.setdefault(t, {"correct": 0, "attempted": 0})
-                    topic_stats[t]["correct"] += 1
-                    topic_stats[t]["attempted"] += 1
-        for iq in incorrect_qs:
-            if iq in q2topics:
-                for t in q2topics[iq]:
-                    topic_stats.setdefault(t, {"correct": 0, "attempted": 0})
-                    topic_stats[t]["attempted"] += 1
+    for p in the_event.participants:
+        tally_topics(correct, attempted, q2ids,
+                      p.correctQuestions,
+                      p.incorrectQuestions)
+
+    topic_stats = _label_topic_stats(registry, correct, attempted)
 
     # finalize accuracy
     for t, stats in topic_stats.items():
@@ -224,3 +289,313 @@ def get_event_topic_accuracy(meet_id, event_id):
         stats["accuracy"] = c / a if a > 0 else 0.0
 
     return topic_stats
+
+
+# ---------- Item analysis ----------
+
+# Questions answered correctly by fewer than this share of students are "hard",
+# and items discriminating below this point-biserial are flagged for review.
+HARD_P_VALUE = 0.3
+LOW_DISCRIMINATION = 0.2
+
+
+def _question_sums(participants):
+    """
+    One pass over an event's participants, accumulating per question the
+    sufficient statistics for difficulty and discrimination:
+    [attempted, correct, sum(T), sum(T^2), sum(T | correct)], T = a student's total correct.
+    """
+    sums = defaultdict(lambda: [0, 0, 0, 0, 0])
+    for p in participants:
+        correct_qs = p.correctQuestions
+        total = len(correct_qs)
+        total_sq = total * total
+        for q in correct_qs:
+            s = sums[q]
+            s[0] += 1
+            s[1] += 1
+            s[2] += total
+            s[3] += total_sq
+            s[4] += total
+        for q in p.incorrectQuestions:
+            s = sums[q]
+            s[0] += 1
+            s[2] += total
+            s[3] += total_sq
+    return sums
+
+
+def _item_stats(n, n1, sum_t, sum_t2, sum_t1):
+    """
+    Difficulty (p-value: share correct) and corrected point-biserial discrimination,
+    i.e. the correlation of the item with the rest score (total minus the item).
+    Discrimination is None when it is undefined (everyone right/wrong, no spread).
+    """
+    p_value = n1 / n
+    n0 = n - n1
+    discrimination = None
+    if n1 and n0:
+        # Rest score R = T - x; its sums follow from the totals' sums.
+        sum_r = sum_t - n1
+        sum_r2 = sum_t2 - 2 * sum_t1 + n1
+        variance = sum_r2 / n - (sum_r / n) ** 2
+        if variance > 1e-12:
+            mean_r1 = sum_t1 / n1 - 1
+            mean_r0 = (sum_t - sum_t1) / n0
+            discrimination = (mean_r1 - mean_r0) / variance ** 0.5 * (p_value * (1 - p_value)) ** 0.5
+    return p_value, discrimination
+
+
+def _roll_up_topics(questions, rollup=None):
+    """Adds questions' stats to per-topic-id sums: [questions, attempted, sum(p*n), sum(r*n), n with r]."""
+    rollup = rollup if rollup is not None else defaultdict(lambda: [0, 0, 0.0, 0.0, 0])
+    for q in questions:
+        for topic_id in q["topicIds"]:
+            r = rollup[topic_id]
+            r[0] += 1
+            r[1] += q["attempted"]
+            r[2] += q["pValue"] * q["attempted"]
+            if q["discrimination"] is not None:
+                r[3] += q["discrimination"] * q["attempted"]
+                r[4] += q["attempted"]
+    return rollup
+
+
+def _label_rollup(registry, rollup):
+    """Attempt-weighted mean difficulty/discrimination per topic label, hardest first."""
+    topics = {
+        registry.label(topic_id): {
+            "questions": r[0],
+            "attempted": r[1],
+            "pValue": r[2] / r[1] if r[1] else 0.0,
+            "discrimination": r[3] / r[4] if r[4] else None,
+        }
+        for topic_id, r in rollup.items()
+    }
+    return dict(sorted(topics.items(), key=lambda item: item[1]["pValue"]))
+
+
+@cached_by_store_version
+def get_item_analysis(season=None):
+    """
+    Item analysis for every individual event in the live store (or, given a
+    `season`, in that archived season), computed in one pass per event and
+    cached until the store changes:
+    {
+      "events": { event_id: {
+          "questions": [{"questionNumber", "attempted", "pValue", "discrimination",
+                         "hard", "lowDiscrimination", "topics"}, ...],
+          "topics": { topic: {"questions", "attempted", "pValue", "discrimination"} } } },
+      "topics": { topic: {...} }   # the same rollup across all meets
+    }
+    Team events are skipped: they have one score set, not per-student outcomes.
+    """
+    data = load_data()
+    registry = get_topic_registry(data)
+    events = {}
+    overall = defaultdict(lambda: [0, 0, 0.0, 0.0, 0])
+
+    for meet in (load_season(season) if season else data["meets"]):
+        for event in meet.events:
+            if event.eventName in TEAM_EVENTS:
+                continue
+            q2ids = question_topic_ids(event, registry)
+            questions = []
+            for q, (n, n1, sum_t, sum_t2, sum_t1) in sorted(_question_sums(event.participants).items()):
+                p_value, discrimination = _item_stats(n, n1, sum_t, sum_t2, sum_t1)
+                topic_ids = q2ids.get(q, ())
+                questions.append({
+                    "questionNumber": q,
+                    "attempted": n,
+                    "pValue": p_value,
+                    "discrimination": discrimination,
+                    "hard": p_value < HARD_P_VALUE,
+                    "lowDiscrimination": discrimination is not None and discrimination < LOW_DISCRIMINATION,
+                    "topicIds": topic_ids,
+                    "topics": [registry.label(t) for t in topic_ids],
+                })
+            events[event.id] = {
+                "questions": questions,
+                "topics": _label_rollup(registry, _roll_up_topics(questions)),
+            }
+            _roll_up_topics(questions, overall)
+
+    return {"events": events, "topics": _label_rollup(registry, overall)}
+
+
+def get_event_item_analysis(event_id):
+    """The get_item_analysis() entry for one event (empty if it has no scored participants)."""
+    analysis = get_item_analysis()["events"].get(event_id)
+    if analysis is None:
+        season = season_of_event(event_id)
+        if season is not None:
+            analysis = get_item_analysis(season)["events"].get(event_id)
+    return analysis or {"questions": [], "topics": {}}
+
+
+# Longest moving-average window /api/topic_trends accepts, in meets.
+MAX_TREND_WINDOW = 12
+
+
+def get_topic_trends(window=3, topics=None):
+    """
+    Per-topic accuracy by meet (date order) with a moving average over `window`
+    meets (1..MAX_TREND_WINDOW), read from the per-meet topic rollups. `topics`
+    is an optional tuple of topic labels to keep. Archived meets are included
+    from the archive index.
+    """
+    trends = _all_topic_trends(min(max(1, window), MAX_TREND_WINDOW))
+    if topics:
+        # Filtered per call: caching every requested topic combination would grow without bound.
+        wanted = set(topics)
+        trends = dict(trends, topics={label: series for label, series in trends["topics"].items()
+                                      if label in wanted})
+    return trends
+
+
+@cached_by_store_version
+def _all_topic_trends(window):
+    data = load_data()
+    archived_rollups = {}
+    for _, entry in archived_seasons():
+        archived_rollups.update(entry["topicRollups"])
+    if archived_rollups:
+        data = dict(data, meets=meet_summaries() + data["meets"],
+                    topicRollups={**archived_rollups, **data["topicRollups"]})
+    return topic_trends(data, window=window)
+
+
+# ---------- Practice recommendations ----------
+
+# Prior strength, in attempts, of the team average a scope's accuracy is shrunk toward.
+SHRINKAGE_ATTEMPTS = 5
+MAX_RECOMMENDATIONS = 10
+
+
+def _rank_topics(registry, correct, attempted, prior, topic_courses, k):
+    """
+    Top-k topics by importance for one scope. Accuracy is shrunk toward the
+    team-wide `prior` accuracy, so a topic seen twice isn't ranked on two answers;
+    topics of the scope's courses it never attempted are ranked on the prior alone.
+    """
+    courses = {topic_courses[t] for t in attempted}
+
+    def scored():
+        for topic_id, (prior_correct, prior_attempted) in prior.items():
+            if topic_courses[topic_id] not in courses:
+                continue
+            team_accuracy = prior_correct / prior_attempted
+            a = attempted.get(topic_id, 0)
+            accuracy = (correct.get(topic_id, 0) + SHRINKAGE_ATTEMPTS * team_accuracy) / (a + SHRINKAGE_ATTEMPTS)
+            yield topic_importance(accuracy, a), topic_id, accuracy, a
+
+    return [
+        {
+            "topic": registry.label(topic_id),
+            "importance": importance,
+            "accuracy": accuracy,
+            "rawAccuracy": correct.get(topic_id, 0) / a if a else None,
+            "attempted": a,
+        }
+        for importance, topic_id, accuracy, a in heapq.nlargest(k, scored())
+    ]
+
+
+def _practice_counts(registry, meets):
+    """
+    Per-topic-id counters for recommendations over the meets: (student_correct,
+    student_attempted, team_correct, team_attempted, all_correct, all_attempted),
+    the per-student and per-team ones keyed by student id / event name first.
+    """
+    student_correct = defaultdict(lambda: defaultdict(int))
+    student_attempted = defaultdict(lambda: defaultdict(int))
+    team_correct = defaultdict(lambda: defaultdict(int))
+    team_attempted = defaultdict(lambda: defaultdict(int))
+    all_correct = defaultdict(int)
+    all_attempted = defaultdict(int)
+
+    for meet in meets:
+        for event in meet.events:
+            if not event.examTopics:
+                continue
+            q2ids = question_topic_ids(event, registry)
+            event_name = event.eventName
+            if event_name in TEAM_EVENTS:
+                outcomes = [(team_correct[event_name], team_attempted[event_name],
+                             event.teamCorrectQuestions or (), event.teamIncorrectQuestions or ())]
+            else:
+                outcomes = [(student_correct[p.studentId], student_attempted[p.studentId],
+                             p.correctQuestions, p.incorrectQuestions)
+                            for p in event.participants if p.studentId]
+            for correct, attempted, correct_qs, incorrect_qs in outcomes:
+                tally_topics(correct, attempted, q2ids, correct_qs, incorrect_qs)
+                tally_topics(all_correct, all_attempted, q2ids, correct_qs, incorrect_qs)
+    return student_correct, student_attempted, team_correct, team_attempted, all_correct, all_attempted
+
+
+@cached_by_store_version
+def get_recommendations(k=MAX_RECOMMENDATIONS):
+    """
+    Top-k practice topics for every student and every team event type, from one
+    pass over the store plus the archived seasons' precomputed counts, cached
+    until it changes:
+    {"students": {student_id: [rec, ...]}, "teams": {eventName: [rec, ...]}}
+    with rec = {"topic", "importance", "accuracy", "rawAccuracy", "attempted"}.
+    """
+    data = load_data()
+    registry = get_topic_registry(data)
+    (student_correct, student_attempted, team_correct, team_attempted,
+     all_correct, all_attempted) = _practice_counts(registry, data["meets"])
+    for aggregates in _archived_aggregates():
+        practice = aggregates["practice"]
+        for scope_correct, scope_attempted, scopes in (
+                (student_correct, student_attempted, practice["students"]),
+                (team_correct, team_attempted, practice["teams"])):
+            for scope, counts in scopes.items():
+                _add_label_counts(registry, scope_correct[scope], scope_attempted[scope], counts)
+                _add_label_counts(registry, all_correct, all_attempted, counts)
+
+    prior = {t: (all_correct[t], a) for t, a in all_attempted.items() if a}
+    topic_courses = {t: registry.label(t).split(TOPIC_SEPARATOR)[0] for t in all_attempted}
+    return {
+        "students": {sid: _rank_topics(registry, student_correct[sid], attempted, prior, topic_courses, k)
+                     for sid, attempted in student_attempted.items()},
+        "teams": {name: _rank_topics(registry, team_correct[name], attempted, prior, topic_courses, k)
+                  for name, attempted in team_attempted.items()},
+    }
+
+
+# ---------- Archived seasons ----------
+
+def season_aggregates(data, meets):
+    """
+    What the dashboard, student pages and recommendations need from a season's
+    meets, precomputed for the archive index (src/archive.py) so they don't
+    load the season's file. Topic counts are keyed by label.
+    """
+    registry = get_topic_registry(data)
+    students = defaultdict(lambda: {"all": [0, 0, 0], "individual": [0, 0, 0], "history": []})
+    for skip_team_events, key in ((False, "all"), (True, "individual")):
+        for student_id, totals in _student_totals(meets, skip_team_events).items():
+            students[student_id][key] = totals
+    for meet in meets:
+        for event in meet.events:
+            for participant in event.participants:
+                if participant.studentId:
+                    students[participant.studentId]["history"].append(_history_row(meet, event, participant))
+
+    student_correct, student_attempted, team_correct, team_attempted, _, _ = _practice_counts(registry, meets)
+    return {
+        "topicTotals": {
+            "all": _label_counts(registry, *_tally_meets(registry, meets, False)),
+            "individual": _label_counts(registry, *_tally_meets(registry, meets, True)),
+        },
+        "eventSummaries": event_summaries(meets),
+        "students": dict(students),
+        "practice": {
+            "students": {sid: _label_counts(registry, student_correct[sid], attempted)
+                         for sid, attempted in student_attempted.items()},
+            "teams": {name: _label_counts(registry, team_correct[name], attempted)
+                      for name, attempted in team_attempted.items()},
+        },
+    }
@@ -1,28 +1,190 @@
 # src/data_manager.py
 
+import contextlib
+import contextvars
+import copy
+import datetime
+import functools
 import json
 import os
+import threading
 import uuid
+from collections import OrderedDict
+
+from src.archive import find_meet as find_archived_meet, index_version
+from src.models import Event, ExamQuestion, Meet, Participant, question_array
+from src.serialization import LazyMeets, StoreError, encode_store, read_store_file
+from src.rollups import apply_topic_delta, event_topic_counts, rebuild_topic_rollups
+from src.students import attach_students, detach_event, index_remove, migrate_students
+from src.tenants import DEFAULT_STORE_PATH as STORE_FILE_PATH, store_file_path
+from src.topics import TEAM_EVENTS, build_topic_registry, get_event_courses
 
-STORE_FILE_PATH = os.path.join("data", "store.json")
 DEFAULT_TOPIC_LIST_PATH = os.path.join("data", "topic_list.json")
 
+# Parsed stores are kept in memory, keyed by the store file's absolute path
+# (one per tenant), so page views don't re-parse the JSON on every request.
+# At most STORE_CACHE_SIZE stores are held; the least recently used one is
+# dropped first. An entry is only reused while its file is unchanged (see
+# store_version()).
+STORE_CACHE_SIZE = int(os.getenv("STORE_CACHE_SIZE", "8"))
+_loaded_stores = OrderedDict()
+_cache_lock = threading.Lock()
+# True inside a mutator, which gets its own copy of the store to modify.
+_writing = contextvars.ContextVar("writing_store", default=False)
+
+
+def _read_store(path):
+    if not os.path.exists(path):
+        return {"meets": [], "students": {}, "studentIndex": {}, "topicRollups": {}}
+    try:
+        return read_store_file(path)
+    except StoreError as e:
+        # Never fall back to an empty store here: a migration or mutator would save it over the file.
+        print(f"Error decoding the store {path}: {e}")
+        raise
+
+def _migrate(data):
+    """Adds the derived tables (student registry, topic rollups) a store is missing."""
+    changed = migrate_students(data)
+    if "topicRollups" not in data:
+        rebuild_topic_rollups(data, get_topic_registry(data), TEAM_EVENTS)
+        changed = True
+    return changed
+
+def _remember_store(path, version, data):
+    with _cache_lock:
+        _loaded_stores[path] = (version, data)
+        _loaded_stores.move_to_end(path)
+        while len(_loaded_stores) > STORE_CACHE_SIZE:
+            _loaded_stores.popitem(last=False)
+
+def _cached_store(path, version):
+    with _cache_lock:
+        entry = _loaded_stores.get(path)
+        if entry is None or entry[0] != version:
+            return None
+        _loaded_stores.move_to_end(path)
+        return entry[1]
 
 def load_data():
-    if not os.path.exists(STORE_FILE_PATH):
-        return {"meets": []}
-    with open(STORE_FILE_PATH, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            data = {"meets": []}
-    if "meets" not in data:
-        data["meets"] = []
+    """
+    The active tenant's store. Outside the mutators the parsed store is shared
+    between requests until the file changes, so callers must not modify it;
+    mutators get a private copy to modify and save.
+    """
+    path = store_file_path()
+    writing = _writing.get()
+    version = store_version()
+    if not writing:
+        data = _cached_store(os.path.abspath(path), version)
+        if data is not None:
+            return data
+    data = _read_store(path)
+    if "studentIndex" not in data or "topicRollups" not in data:
+        # Stores written before these tables existed get them on first load.
+        with _store_lock:
+            data = _read_store(path)
+            if _migrate(data):
+                save_data(data)
+        # save_data() shared the migrated copy; a mutator needs its own.
+        return _read_store(path) if writing else data
+    if not writing:
+        _remember_store(os.path.abspath(path), version, data)
     return data
 
-def save_data(data):
-    with open(STORE_FILE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def save_data(data, store_format=None):
+    # Write to a temporary file and swap it in, so a concurrent load_data()
+    # never sees a half-written store (and binary snapshots already loaded keep
+    # their mapping of the old file). The format defaults to serialization.STORE_FORMAT.
+    path = store_file_path()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_store(data, store_format))
+    os.replace(tmp_path, path)
+    # The saved copy becomes the shared one; mutators save as their last step.
+    _remember_store(os.path.abspath(path), store_version(), data)
+
+# Serializes the load -> modify -> save sequence of the mutators below, so
+# concurrent requests in one process (threaded or ASGI serving) don't lose updates.
+_store_lock = threading.RLock()
+
+def mutation(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _store_lock:
+            token = _writing.set(True)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _writing.reset(token)
+    return wrapper
+
+@mutation
+def convert_store(store_format):
+    """Rewrites the active store in `store_format` (see src/serialization.py); returns its new size in bytes."""
+    save_data(load_data(), store_format)
+    return os.path.getsize(store_file_path())
+
+def store_version():
+    """
+    Token that changes whenever the active store file is rewritten (save_data
+    swaps in a new file), used to key caches of data derived from the store.
+    """
+    try:
+        st = os.stat(store_file_path())
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def store_cache(caches):
+    """
+    The dict in `caches` (an OrderedDict keyed by store path) for the active
+    store, emptied whenever that store or its season archive changes. Like the
+    parsed stores, at most STORE_CACHE_SIZE stores keep an entry.
+    """
+    path = os.path.abspath(store_file_path())
+    version = (store_version(), index_version())
+    with _cache_lock:
+        cache = caches.get(path)
+        if cache is None or cache["version"] != version:
+            cache = caches[path] = {"version": version}
+        caches.move_to_end(path)
+        while len(caches) > max(STORE_CACHE_SIZE, 1):
+            caches.popitem(last=False)
+        return cache
+
+def cached_by_store_version(func):
+    """Caches func's result per arguments (and per tenant store) until the store changes."""
+    caches = OrderedDict()
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        cache = store_cache(caches)
+        if args not in cache:
+            cache[args] = func(*args)
+        return cache[args]
+    return wrapper
+
+@contextlib.contextmanager
+def _rolled_up(data, meet_id, event):
+    """Moves the meet's topic rollup by the change the block makes to `event`'s scores."""
+    registry = get_topic_registry(data)
+    before = event_topic_counts(event, registry, TEAM_EVENTS)
+    yield
+    apply_topic_delta(data, meet_id, before, event_topic_counts(event, registry, TEAM_EVENTS))
+
+def _as_participant(p):
+    """Participant records arrive from routes and importers as dicts."""
+    return p if isinstance(p, Participant) else Participant.from_dict(p)
+
+def _as_dict(q):
+    return q.to_dict() if isinstance(q, ExamQuestion) else q
+
+def _extend_unique(paths, new_paths):
+    """Appends the paths not already recorded (re-uploads of the same file are linked once)."""
+    for path in new_paths:
+        if path not in paths:
+            paths.append(path)
 
 def load_default_topic_list():
     """Loads the default topic list from data/topic_list.json."""
@@ -35,140 +197,238 @@ def load_default_topic_list():
                 print("Error decoding the default topic list JSON.")
     return {}
 
-def create_meet(title):
+# Each store path keeps one topic registry and the topic lists it was built
+# from, and _registry_checks records the store versions it is up to date with.
+_topic_registries = OrderedDict()
+_registry_checks = OrderedDict()
+_registry_lock = threading.Lock()
+
+def get_topic_registry(data):
+    """
+    Topic registry over the default topic list and every meet's topicList.
+    The default list is registered first so its topics keep the same ids.
+    The registry is checked against `data` once per store version and only
+    extended with the topic lists that changed since (rebuilt if a meet is gone).
+    """
+    checked = store_cache(_registry_checks)
+    registry = checked.get("registry")
+    if registry is None:
+        with _registry_lock:
+            registry = checked["registry"] = _update_topic_registry(os.path.abspath(store_file_path()), data)
+    return registry
+
+def _update_topic_registry(path, data):
+    registry, seen = _topic_registries.get(path, (None, {}))
+    topic_lists = {meet.id: meet.topicList or {} for meet in data["meets"]}
+    if registry is None or not seen.keys() <= topic_lists.keys():
+        registry, seen = build_topic_registry([load_default_topic_list()]), {}
+    for meet_id, topic_list in topic_lists.items():
+        if seen.get(meet_id) != topic_list:
+            registry.add_topic_list(topic_list)
+            seen[meet_id] = copy.deepcopy(topic_list)
+    _topic_registries[path] = (registry, seen)
+    _topic_registries.move_to_end(path)
+    while len(_topic_registries) > max(STORE_CACHE_SIZE, 1):
+        _topic_registries.popitem(last=False)
+    return registry
+
+def meet_date(value):
+    """
+    A meet date as "YYYY-MM-DD". Raises ValueError for anything that isn't an
+    ISO date, so seasons (archive.season_of) can always be worked out.
+    """
+    return datetime.date.fromisoformat(str(value).strip()).isoformat()
+
+@mutation
+def create_meet(title, date=None):
+    """Creates a meet; `date` is an ISO "YYYY-MM-DD" string (default: today). Raises ValueError for a bad date."""
+    date = meet_date(date) if date else datetime.date.today().isoformat()
     data = load_data()
     new_meet_id = str(uuid.uuid4())
-    new_meet = {
-        "id": new_meet_id,
-        "title": title,
+    new_meet = Meet(
+        new_meet_id,
+        title,
+        date=date,
         # Initialize topicList with the default from topic_list.json.
-        "topicList": load_default_topic_list(),
-        "topicListUploads": [],
-        "events": []
-    }
+        topicList=load_default_topic_list(),
+    )
     data["meets"].append(new_meet)
     save_data(data)
     return new_meet_id
 
 
-def get_meet(meet_id):
+@mutation
+def update_meet_date(meet_id, date):
+    """Sets a meet's ISO "YYYY-MM-DD" date. Raises ValueError for a bad date."""
+    date = meet_date(date)
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            return meet
-    return None
+        if meet.id == meet_id:
+            meet.date = date
+            save_data(data)
+            return
 
 
+def _live_meet(data, meet_id):
+    meets = data["meets"]
+    if isinstance(meets, LazyMeets):
+        # Binary snapshot: look the id up in its index so only this meet is decoded.
+        ids = meets.ids()
+        return meets[ids.index(meet_id)] if meet_id in ids else None
+    return next((meet for meet in meets if meet.id == meet_id), None)
+
+
+def get_meet(meet_id):
+    """A live meet, or an archived one (read-only, loaded from its season's archive file)."""
+    return _live_meet(load_data(), meet_id) or find_archived_meet(meet_id)
+
+
+@mutation
 def create_event(meet_id, event_name):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
+        if meet.id == meet_id:
             new_event_id = str(uuid.uuid4())
-            new_event = {
-                "id": new_event_id,
-                "eventName": event_name,
-                "examTopics": [],
-                "participants": [],
-                "examImagePaths": [],
-                "scoreImagePaths": []
-            }
-            meet["events"].append(new_event)
+            meet.events.append(Event(new_event_id, event_name))
             save_data(data)
             return new_event_id
     return None
 
 
+def get_student(student_id):
+    return load_data()["students"].get(student_id)
+
+
 def get_event(meet_id, event_id):
-    data = load_data()
-    for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    return event
-    return None
+    meet = get_meet(meet_id)
+    return meet.find_event(event_id) if meet else None
 
 
+@mutation
 def add_topic_list_files(meet_id, file_paths):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            if "topicListUploads" not in meet:
-                meet["topicListUploads"] = []
-            meet["topicListUploads"].extend(file_paths)
+        if meet.id == meet_id:
+            _extend_unique(meet.topicListUploads, file_paths)
             save_data(data)
             return
 
 
+@mutation
 def add_exam_files(meet_id, event_id, file_paths):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    if "examImagePaths" not in event:
-                        event["examImagePaths"] = []
-                    event["examImagePaths"].extend(file_paths)
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    _extend_unique(event.examImagePaths, file_paths)
                     save_data(data)
                     return
 
 
+@mutation
 def add_score_files(meet_id, event_id, file_paths):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    if "scoreImagePaths" not in event:
-                        event["scoreImagePaths"] = []
-                    event["scoreImagePaths"].extend(file_paths)
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    _extend_unique(event.scoreImagePaths, file_paths)
                     save_data(data)
                     return
 
 
+@mutation
 def update_meet_topic_list(meet_id, parsed_topics):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            meet["topicList"] = parsed_topics
+        if meet.id == meet_id:
+            meet.topicList = parsed_topics
             save_data(data)
             return
 
 
+@mutation
 def update_event_exam_topics(meet_id, event_id, exam_topics):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    event["examTopics"] = exam_topics
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    # Snap GPT's topic strings onto canonical topics so near-duplicates
+                    # don't split the statistics.
+                    registry = get_topic_registry(data)
+                    courses = get_event_courses(event.eventName)
+                    snapped = registry.snap_exam_topics([_as_dict(q) for q in exam_topics], courses)
+                    with _rolled_up(data, meet_id, event):
+                        event.examTopics = [ExamQuestion.from_dict(q) for q in snapped]
                     save_data(data)
                     return
 
 
+@mutation
 def add_participant_scores(meet_id, event_id, participant_scores):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    event["participants"].extend(participant_scores)
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    participant_scores = [_as_participant(p) for p in participant_scores]
+                    attach_students(data, meet_id, event_id, participant_scores)
+                    with _rolled_up(data, meet_id, event):
+                        event.participants.extend(participant_scores)
                     save_data(data)
                     return
-                
+
+@mutation
+def set_participant_scores(meet_id, event_id, participant_scores):
+    """
+    Adds a batch of participants with one store write, replacing any existing
+    participant that is the same registered student (re-entering a roster
+    updates it instead of duplicating students).
+    Returns (added, replaced) counts, or None if the event wasn't found.
+    """
+    data = load_data()
+    for meet in data["meets"]:
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    participants = event.participants
+                    participant_scores = [_as_participant(p) for p in participant_scores]
+                    attach_students(data, meet_id, event_id, participant_scores)
+                    index = {p.studentId: i for i, p in enumerate(participants)}
+                    added = replaced = 0
+                    with _rolled_up(data, meet_id, event):
+                        for p in participant_scores:
+                            key = p.studentId
+                            if key in index:
+                                participants[index[key]] = p
+                                replaced += 1
+                            else:
+                                index[key] = len(participants)
+                                participants.append(p)
+                                added += 1
+                    save_data(data)
+                    return added, replaced
+    return None
+
+@mutation
 def update_team_scores(meet_id, event_id, correct_qs, incorrect_qs):
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    event["teamCorrectQuestions"] = correct_qs
-                    event["teamIncorrectQuestions"] = incorrect_qs
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    with _rolled_up(data, meet_id, event):
+                        event.teamCorrectQuestions = question_array(correct_qs)
+                        event.teamIncorrectQuestions = question_array(incorrect_qs)
                     save_data(data)
                     return
 
 
 # -------------- OPTIONAL DELETE FUNCTIONS ---------------
 
+@mutation
 def delete_event(meet_id, event_id):
     """
     Removes the event from the specified meet.
@@ -176,31 +436,44 @@ def delete_event(meet_id, event_id):
     """
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for i, event in enumerate(meet["events"]):
-                if event["id"] == event_id:
-                    meet["events"].pop(i)
+        if meet.id == meet_id:
+            for i, event in enumerate(meet.events):
+                if event.id == event_id:
+                    detach_event(data, meet_id, event)
+                    removed = event_topic_counts(event, get_topic_registry(data), TEAM_EVENTS)
+                    apply_topic_delta(data, meet_id, removed, {})
+                    meet.events.pop(i)
                     save_data(data)
                     return True
     return False
 
 
-def delete_participant(meet_id, event_id, student_name, grade_level):
+@mutation
+def delete_participant(meet_id, event_id, student_name, grade_level, student_id=None):
     """
     Removes a participant from the event's participants array,
-    matching both studentName and gradeLevel.
+    matching the studentId if given, else both studentName and gradeLevel.
     Returns True if found & removed, False otherwise.
     """
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    participants = event.get("participants", [])
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    participants = event.participants
                     for i, p in enumerate(participants):
-                        if (p.get("studentName") == student_name and
-                            p.get("gradeLevel") == grade_level):
-                            participants.pop(i)
+                        if student_id:
+                            matches = p.studentId == student_id
+                        else:
+                            matches = (p.studentName == student_name and
+                                       p.gradeLevel == grade_level)
+                        if matches:
+                            with _rolled_up(data, meet_id, event):
+                                participants.pop(i)
+                            # The same student may have been entered twice; keep the
+                            # index entry while another of their records is left.
+                            if p.studentId and not any(q.studentId == p.studentId for q in participants):
+                                index_remove(data, p.studentId, meet_id, event_id)
                             save_data(data)
                             return True
     return False
@@ -208,16 +481,17 @@ def delete_participant(meet_id, event_id, student_name, grade_level):
 
 # data_manager.py
 
+@mutation
 def update_event_num_questions(meet_id, event_id, num_questions):
     """
     Store num_questions in the event so participants can skip re-entering it for manual scoring.
     """
     data = load_data()
     for meet in data["meets"]:
-        if meet["id"] == meet_id:
-            for event in meet["events"]:
-                if event["id"] == event_id:
-                    event["numQuestions"] = num_questions
+        if meet.id == meet_id:
+            for event in meet.events:
+                if event.id == event_id:
+                    event.numQuestions = num_questions
                     save_data(data)
                     return
 
@@ -0,0 +1,159 @@
+# src/export.py
+# Static snapshot of the site for read-only viewing: the home page, dashboard,
+# every meet, event and student page rendered to <url>/index.html, the topic
+# trend data as JSON files and a copy of static/, so any plain file server
+# can serve the season without running Python.
+#
+# Re-exports are incremental: each page has a fingerprint of the data it
+# shows, kept in the output's manifest, and only pages whose fingerprint
+# changed are rendered again. Pages of deleted meets/events are removed.
+
+import hashlib
+import json
+import os
+
+from src.archive import archived_meets, archived_seasons
+from src.dashboard_logic import get_recommendations, get_student_history, get_topic_trends
+from src.data_manager import load_data
+from src.tenants import TENANT_ENVIRON_KEY, current_tenant
+from src.topics import TEAM_EVENTS
+
+MANIFEST_NAME = ".export-manifest.json"
+# The moving-average windows offered on the dashboard's trend chart.
+TREND_WINDOWS = (2, 3, 5)
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=list).encode("utf-8")).hexdigest()
+
+
+def _site_fingerprint(app, base_path):
+    """Changes with any template or static file, so a template edit re-renders every page."""
+    digest = hashlib.sha256(base_path.encode("utf-8"))
+    for folder in (app.template_folder, app.static_folder):
+        root = os.path.join(app.root_path, folder)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                digest.update(os.path.relpath(path, root).encode("utf-8"))
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def snapshot_pages(data):
+    """Yields (url, data the page shows) for every page in the snapshot, archived meets included."""
+    meets = data["meets"]
+    seasons = archived_seasons()
+    recommendations = get_recommendations()
+    yield "/", [[(m.id, m.title, m.date) for m in meets], [(s, e["meets"]) for s, e in seasons]]
+    yield "/dashboard", [[m.to_dict() for m in meets], [e["aggregates"] for _, e in seasons]]
+    for meet in [*meets, *archived_meets()]:
+        yield f"/meet/{meet.id}", [meet.title, meet.date, meet.topicList,
+                                   [(e.id, e.eventName) for e in meet.events]]
+        for event in meet.events:
+            team = recommendations["teams"].get(event.eventName) if event.eventName in TEAM_EVENTS else None
+            yield f"/meet/{meet.id}/event/{event.id}", [event.to_dict(), team]
+    for student_id, student in data.get("students", {}).items():
+        history = get_student_history(student_id)["events"]
+        yield f"/student/{student_id}", [student, history, recommendations["students"].get(student_id)]
+
+
+def _page_path(out_dir, url):
+    return os.path.join(out_dir, *url.strip("/").split("/"), "index.html")
+
+
+def _write_if_changed(path, content):
+    """Writes bytes to path unless it already holds them; returns True if written."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _remove_page(out_dir, url):
+    path = _page_path(out_dir, url)
+    if os.path.exists(path):
+        os.remove(path)
+    # Drop directories the page leaves empty, up to the output root.
+    folder = os.path.dirname(path)
+    while os.path.abspath(folder) != os.path.abspath(out_dir) and not os.listdir(folder):
+        os.rmdir(folder)
+        folder = os.path.dirname(folder)
+
+
+def _copy_static(app, out_dir):
+    copied = 0
+    source = os.path.join(app.root_path, app.static_folder)
+    for dirpath, _, filenames in os.walk(source):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                content = f.read()
+            copied += _write_if_changed(os.path.join(out_dir, "static", os.path.relpath(path, source)), content)
+    return copied
+
+
+def export_site(app, out_dir, base_path="", full=False):
+    """
+    Exports the static snapshot into out_dir. `base_path` is the URL prefix
+    the snapshot will be served under ("" for the web root); `full` re-renders
+    every page. Returns {"rendered": [urls], "unchanged": n, "removed": [urls],
+    "files": n} where files counts JSON data and static files written.
+    Pages are rendered with `app` switched to static mode, so pass an app that
+    isn't serving requests at the same time (the export-site command does).
+    """
+    base_path = base_path.rstrip("/")
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {}
+    if not full and os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    site = _site_fingerprint(app, base_path)
+    if manifest.get("site") != site:
+        manifest = {}
+    old_pages = manifest.get("pages", {})
+
+    data = load_data()
+    # Pages are rendered from the active tenant's store.
+    environ = {"SCRIPT_NAME": base_path}
+    if current_tenant() is not None:
+        environ[TENANT_ENVIRON_KEY] = current_tenant()
+    pages = {}
+    rendered = []
+    client = app.test_client()
+    app.jinja_env.globals["static_export"] = True
+    try:
+        for url, shown in snapshot_pages(data):
+            fingerprint = _digest(shown)
+            pages[url] = fingerprint
+            if old_pages.get(url) == fingerprint and os.path.exists(_page_path(out_dir, url)):
+                continue
+            response = client.get(url, environ_base=environ)
+            if response.status_code != 200:
+                raise RuntimeError(f"Rendering {url} failed with status {response.status_code}")
+            _write_if_changed(_page_path(out_dir, url), response.get_data())
+            rendered.append(url)
+    finally:
+        app.jinja_env.globals["static_export"] = False
+
+    removed = [url for url in old_pages if url not in pages]
+    for url in removed:
+        _remove_page(out_dir, url)
+
+    files = _copy_static(app, out_dir)
+    for window in TREND_WINDOWS:
+        content = json.dumps(get_topic_trends(window)).encode("utf-8")
+        files += _write_if_changed(os.path.join(out_dir, "api", "topic_trends", f"window-{window}.json"), content)
+
+    _write_if_changed(manifest_path, json.dumps({"site": site, "pages": pages}, indent=2).encode("utf-8"))
+    return {"rendered": rendered, "unchanged": len(pages) - len(rendered), "removed": removed, "files": files}
@@ -0,0 +1,111 @@
+# src/flows.py
+# The GPT-backed upload handlers are written as generator "flows": they do the
+# request validation and file saving, `yield` a ParseStep for the model call,
+# receive its result (or have its exception thrown in at the yield), then
+# commit and return the response. The same flow is driven synchronously by the
+# Flask routes (run_flow) and asynchronously by the ASGI serving mode (src/asgi.py).
+
+import asyncio
+import contextvars
+import time
+
+from src.progress import tracker, report_stage
+from src.upload_store import lookup_cached_parse, store_cached_parse
+
+# Minimum seconds between early commits of partial results.
+PARTIAL_COMMIT_INTERVAL = 2.0
+
+
+class ParseStep:
+    """
+    A cached GPT parse a flow waits on: `gpt_request` is a gpt_services.GPTRequest.
+    Progress is reported under `progress_id`; `on_partial(result)`, if given,
+    is called with the partial results of a streamed reply (at most every
+    PARTIAL_COMMIT_INTERVAL seconds) so they can be committed early.
+    """
+
+    def __init__(self, kind, relative_paths, context, gpt_request, progress_id=None, on_partial=None):
+        self.kind = kind
+        self.relative_paths = relative_paths
+        self.context = context
+        self.gpt_request = gpt_request
+        self.progress_id = progress_id
+        self.on_partial = on_partial
+
+    def _progress_callback(self, commit_partial):
+        if not self.progress_id and not self.on_partial:
+            return None
+        last_commit = [0.0]
+
+        def on_progress(stage, **data):
+            tracker.report(self.progress_id, stage, **data)
+            if stage == "partial" and self.on_partial:
+                now = time.monotonic()
+                if now - last_commit[0] >= PARTIAL_COMMIT_INTERVAL:
+                    last_commit[0] = now
+                    commit_partial(data["result"])
+        return on_progress
+
+    def run(self):
+        result = lookup_cached_parse(self.kind, self.relative_paths, self.context)
+        if result is not None:
+            tracker.report(self.progress_id, "cache_hit")
+            return result
+        result = self.gpt_request.run(self._progress_callback(self.on_partial))
+        store_cached_parse(self.kind, self.relative_paths, self.context, result)
+        return result
+
+    async def arun(self):
+        result = await asyncio.to_thread(lookup_cached_parse, self.kind, self.relative_paths, self.context)
+        if result is not None:
+            tracker.report(self.progress_id, "cache_hit")
+            return result
+
+        loop = asyncio.get_running_loop()
+        pending = []
+
+        def commit_partial(partial):
+            # Store writes happen off the event loop; skip if the previous one is
+            # still running, a later partial result includes this one.
+            if pending and not pending[-1].done():
+                return
+            pending.append(loop.run_in_executor(None, contextvars.copy_context().run, self.on_partial, partial))
+
+        try:
+            result = await self.gpt_request.arun(self._progress_callback(commit_partial))
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        await asyncio.to_thread(store_cached_parse, self.kind, self.relative_paths, self.context, result)
+        return result
+
+
+def advance(flow, outcome=None, error=None):
+    """
+    Resumes a flow with the previous step's result (or exception).
+    Returns (step, None) while the flow waits on a step, (None, response) once it is done.
+    """
+    try:
+        step = flow.throw(error) if error is not None else flow.send(outcome)
+    except StopIteration as stop:
+        return None, stop.value
+    return step, None
+
+
+def finish_flow(response):
+    """Reports the end of the current request's upload to its progress stream."""
+    report_stage("done", location=getattr(response, "location", None))
+    return response
+
+
+def run_flow(flow):
+    """Drives a flow to completion, running its parse steps synchronously."""
+    step, response = advance(flow)
+    while step is not None:
+        try:
+            result = step.run()
+        except Exception as e:
+            step, response = advance(flow, error=e)
+        else:
+            step, response = advance(flow, outcome=result)
+    return finish_flow(response)
@@ -0,0 +1,27 @@
+# src/gpt_schemas.py
+# Pydantic response schemas for the GPT calls. Kept in their own module so that
+# pydantic is only imported the first time a GPT call is made.
+from pydantic import BaseModel
+
+
+class StudentScores(BaseModel):
+    correctQuestions: list[int]
+    incorrectQuestions: list[int]
+
+
+class QuestionTopicIds(BaseModel):
+    questionNumber: int
+    topicIds: list[int]
+
+
+class ExamTopicIds(BaseModel):
+    questions: list[QuestionTopicIds]
+
+
+class CourseTopics(BaseModel):
+    course: str
+    topics: list[str]
+
+
+class TopicListResponse(BaseModel):
+    courses: list[CourseTopics]
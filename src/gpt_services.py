@@ -1,222 +1,478 @@
 # src/gpt_services.py
 import os
+import asyncio
 import base64
-import json
-from openai import OpenAI
-from pydantic import BaseModel
+import random
+import threading
+import time
+from collections import deque
 
-from dotenv import load_dotenv
-load_dotenv()
+from src.upload_store import upload_path
+from src.topics import COURSES, build_topic_vocabulary, format_vocabulary_for_prompt, get_event_courses
 
+# The OpenAI client (and the openai/pydantic imports behind it) is created on the
+# first GPT call rather than at import time, so importing the app stays cheap.
+_client = None
+_async_client = None
 
-class StudentScores(BaseModel):
-    correctQuestions: list[int]
-    incorrectQuestions: list[int]
+# Every call gets a per-attempt timeout and an overall deadline (seconds) and is
+# retried with exponential backoff on transient provider errors.
+GPT_MODEL = "gpt-4o"
+GPT_ATTEMPT_TIMEOUT = float(os.getenv("GPT_ATTEMPT_TIMEOUT", "60"))
+GPT_CALL_DEADLINE = float(os.getenv("GPT_CALL_DEADLINE", "150"))
+GPT_MAX_ATTEMPTS = int(os.getenv("GPT_MAX_ATTEMPTS", "3"))
+GPT_BACKOFF_BASE = 1.0
+GPT_BACKOFF_MAX = 10.0
 
 
-# Initialize the client with your API key (loaded from .env or environment variables).
-api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key)
+class GPTServiceError(Exception):
+    """Raised when a GPT call fails or returns a reply that doesn't match its schema."""
 
-# We define a helper to find which courses an event covers
-def get_event_courses(event_name):
+
+class GPTUnavailableError(GPTServiceError):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+def get_client():
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        # The API key is read from the environment (create_app loads .env).
+        # Retries are handled by call_gpt(), not by the SDK.
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _client
+
+
+def get_async_client():
+    """Return the shared AsyncOpenAI client (used by the ASGI serving mode)."""
+    global _async_client
+    if _async_client is None:
+        from openai import AsyncOpenAI
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _async_client
+
+
+def _transient_errors():
+    import openai
+    return (openai.APITimeoutError, openai.APIConnectionError,
+            openai.RateLimitError, openai.InternalServerError)
+
+
+class CircuitBreaker:
+    """
+    Fails fast once the provider looks down: after `failure_threshold`
+    consecutive failed calls the circuit opens for `reset_timeout` seconds,
+    then a single trial call is let through (half-open) to probe recovery.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+circuit_breaker = CircuitBreaker()
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _record(call_name, **counts):
+    with _stats_lock:
+        stats = _stats.setdefault(call_name, {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "timeouts": 0, "rejected": 0, "latencies_ms": deque(maxlen=200),
+        })
+        latency_ms = counts.pop("latency_ms", None)
+        if latency_ms is not None:
+            stats["latencies_ms"].append(latency_ms)
+        for key, value in counts.items():
+            stats[key] += value
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 1)
+
+
+def get_gpt_stats():
+    """
+    Counters and recent latency percentiles per GPT call, e.g.
+    { "circuit": "closed", "calls": { "parse_exam_images": {"calls": 3, "retries": 1, ..., "p95_ms": 8123.4} } }
     """
-    Return a list of courses for the given event name.
-    For example:
-      "Individual Algebra" -> ["Algebra"]
-      "Frosh-Soph 2-Person" -> ["Algebra", "Geometry"]
-      ...
+    with _stats_lock:
+        calls = {}
+        for call_name, stats in _stats.items():
+            latencies = sorted(stats["latencies_ms"])
+            summary = {k: v for k, v in stats.items() if k != "latencies_ms"}
+            summary["p50_ms"] = _percentile(latencies, 50)
+            summary["p95_ms"] = _percentile(latencies, 95)
+            summary["max_ms"] = round(latencies[-1], 1) if latencies else None
+            calls[call_name] = summary
+    return {"circuit": circuit_breaker.state, "calls": calls}
+
+
+def _attempt_timeout(deadline):
+    return min(GPT_ATTEMPT_TIMEOUT, max(deadline - time.monotonic(), 1.0))
+
+
+def _check_circuit(call_name):
+    if not circuit_breaker.allow():
+        _record(call_name, rejected=1)
+        raise GPTUnavailableError("The GPT service is temporarily unavailable; please try again shortly.")
+
+
+def _on_success(call_name, started):
+    circuit_breaker.record_success()
+    _record(call_name, calls=1, successes=1, latency_ms=(time.monotonic() - started) * 1000)
+
+
+def _on_error(call_name, started, attempt, deadline, e):
+    """
+    Records a failed attempt. Returns the backoff (seconds) before the next
+    attempt, or raises GPTServiceError when the call should not be retried.
+    """
+    latency_ms = (time.monotonic() - started) * 1000
+    if not isinstance(e, _transient_errors()):
+        # The provider answered, but with something unusable (refusal, schema mismatch, 4xx).
+        circuit_breaker.record_success()
+        _record(call_name, calls=1, failures=1, latency_ms=latency_ms)
+        raise GPTServiceError(f"{call_name} failed: {e}") from e
+
+    _record(call_name, calls=1, latency_ms=latency_ms, timeouts=int("Timeout" in type(e).__name__))
+    backoff = min(GPT_BACKOFF_MAX, GPT_BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+    if attempt == GPT_MAX_ATTEMPTS or time.monotonic() + backoff >= deadline:
+        circuit_breaker.record_failure()
+        _record(call_name, failures=1)
+        raise GPTServiceError(f"{call_name} failed after {attempt} attempt(s): {e}") from e
+    print(f"Transient GPT error in {call_name} (attempt {attempt}), retrying in {backoff:.1f}s:", e)
+    _record(call_name, retries=1)
+    return backoff
+
+
+def call_gpt(call_name, request):
+    """
+    Runs `request(client)` under the circuit breaker, a per-attempt timeout,
+    an overall deadline and exponential-backoff retries on transient errors.
+    `request` returns the parsed result; GPTServiceError is raised on failure.
     """
-    # You can expand or rename these as you like
-    if "Algebra" in event_name and "II" not in event_name:
-        return ["Algebra"]
-    if "Geometry" in event_name:
-        return ["Geometry"]
-    if "Algebra II" in event_name:
-        return ["Algebra II"]
-    if "Precalculus" in event_name:
-        return ["Precalculus"]
-    if "Frosh-Soph" in event_name:
-        return ["Algebra", "Geometry"]
-    if "Jr-Sr" in event_name:
-        return ["Algebra II", "Precalculus"]
-    if "Calculator" in event_name:
-        return ["Algebra", "Geometry", "Algebra II", "Precalculus"]
-    # fallback
-    return []
+    _check_circuit(call_name)
+    deadline = time.monotonic() + GPT_CALL_DEADLINE
+    for attempt in range(1, GPT_MAX_ATTEMPTS + 1):
+        client = get_client().with_options(timeout=_attempt_timeout(deadline))
+        started = time.monotonic()
+        try:
+            result = request(client)
+        except Exception as e:
+            time.sleep(_on_error(call_name, started, attempt, deadline, e))
+        else:
+            _on_success(call_name, started)
+            return result
+
+
+async def acall_gpt(call_name, request):
+    """call_gpt() for the async client: `request(client)` is awaited and backoff doesn't block the loop."""
+    _check_circuit(call_name)
+    deadline = time.monotonic() + GPT_CALL_DEADLINE
+    for attempt in range(1, GPT_MAX_ATTEMPTS + 1):
+        client = get_async_client().with_options(timeout=_attempt_timeout(deadline))
+        started = time.monotonic()
+        try:
+            result = await request(client)
+        except Exception as e:
+            await asyncio.sleep(_on_error(call_name, started, attempt, deadline, e))
+        else:
+            _on_success(call_name, started)
+            return result
+
+
+def _parsed_message(response):
+    message = response.choices[0].message
+    print("GPT Response:", message.content)
+    if message.parsed is None:
+        raise GPTServiceError(message.refusal or "empty reply")
+    return message.parsed
+
+
+# Minimum seconds between "tokens" progress reports while a reply streams in.
+TOKEN_REPORT_INTERVAL = 0.5
+
+
+class _StreamWatcher:
+    """Turns streamed content deltas into throttled "tokens" and "partial" progress reports."""
+
+    def __init__(self, gpt_request, on_progress):
+        self.gpt_request = gpt_request
+        self.on_progress = on_progress
+        self.last_report = 0.0
+        self.partial_count = 0
+
+    def __call__(self, event):
+        if event.type != "content.delta":
+            return
+        now = time.monotonic()
+        if now - self.last_report >= TOKEN_REPORT_INTERVAL:
+            self.last_report = now
+            self.on_progress("tokens", chars=len(event.snapshot))
+        if isinstance(event.parsed, dict):
+            partial = self.gpt_request.partial_result(event.parsed)
+            if partial and len(partial) > self.partial_count:
+                self.partial_count = len(partial)
+                self.on_progress("partial", result=partial)
+
+
+def _no_progress(stage, **data):
+    pass
+
+
+class GPTRequest:
+    """
+    A prepared structured-output call: one user message built by
+    `build_content()`, answered with the `schema_name` schema from gpt_schemas
+    and turned into the caller's result by `postprocess(parsed)`.
+    It can be run synchronously (run) or awaited (arun).
+
+    run/arun take an optional `on_progress(stage, **data)` callback. When it is
+    given and the request has a `partial_result(partial_dict)` function, the
+    reply is streamed and the results completed so far are reported as
+    "partial" stages while the model is still writing.
+    """
+
+    def __init__(self, call_name, schema_name, build_content, postprocess, temperature=None,
+                 partial_result=None):
+        self.call_name = call_name
+        self.schema_name = schema_name
+        self.build_content = build_content
+        self.postprocess = postprocess
+        self.temperature = temperature
+        self.partial_result = partial_result
+
+    def _kwargs(self, content_list):
+        from src import gpt_schemas
+        kwargs = {
+            "model": GPT_MODEL,
+            "messages": [{"role": "user", "content": content_list}],
+            "response_format": getattr(gpt_schemas, self.schema_name),
+        }
+        if self.temperature is not None:
+            kwargs["temperature"] = self.temperature
+        return kwargs
+
+    def run(self, on_progress=None):
+        streaming = on_progress is not None and self.partial_result is not None
+        on_progress = on_progress or _no_progress
+        on_progress("preprocessing")
+        kwargs = self._kwargs(self.build_content())
+
+        def request(client):
+            on_progress("model_call_started")
+            if not streaming:
+                return _parsed_message(client.beta.chat.completions.parse(**kwargs))
+            watch = _StreamWatcher(self, on_progress)
+            with client.beta.chat.completions.stream(**kwargs) as stream:
+                for event in stream:
+                    watch(event)
+                return _parsed_message(stream.get_final_completion())
+
+        return self.postprocess(call_gpt(self.call_name, request))
+
+    async def arun(self, on_progress=None):
+        streaming = on_progress is not None and self.partial_result is not None
+        on_progress = on_progress or _no_progress
+        on_progress("preprocessing")
+        # Reading and encoding the images is blocking file IO.
+        kwargs = self._kwargs(await asyncio.to_thread(self.build_content))
+
+        async def request(client):
+            on_progress("model_call_started")
+            if not streaming:
+                return _parsed_message(await client.beta.chat.completions.parse(**kwargs))
+            watch = _StreamWatcher(self, on_progress)
+            async with client.beta.chat.completions.stream(**kwargs) as stream:
+                async for event in stream:
+                    watch(event)
+                return _parsed_message(await stream.get_final_completion())
+
+        return self.postprocess(await acall_gpt(self.call_name, request))
+
+
+def _image_content(path):
+    """Reads an upload (relative to uploads/) as an image_url content part."""
+    with open(upload_path(path), "rb") as f:
+        b64_str = base64.b64encode(f.read()).decode("utf-8")
+    return {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{b64_str}"}}
+
+
+def topic_list_request(file_paths):
+    """GPTRequest behind parse_topic_list_images()."""
+    def build_content():
+        content_list = [
+            {
+                "type": "text",
+                "text": (
+                    f"Please parse these images into the topics of each course ({', '.join(COURSES)}). "
+                    "Do not skip any topics. Topics are organized by course in vertical columns in the images."
+                ),
+            }
+        ]
+        content_list.extend(_image_content(path) for path in file_paths)
+        return content_list
+
+    def postprocess(parsed):
+        topic_list = {course: [] for course in COURSES}
+        for entry in parsed.courses:
+            topic_list.setdefault(entry.course, []).extend(entry.topics)
+        return topic_list
+
+    return GPTRequest("parse_topic_list_images", "TopicListResponse", build_content, postprocess)
+
 
 def parse_topic_list_images(file_paths):
     """
-    Sends the uploaded topic list images to GPT-4o-mini, asking for a JSON structure:
+    Sends the uploaded topic list images to GPT-4o, returning:
     {
       "Algebra": [...],
       "Geometry": [...],
       "Algebra II": [...],
       "Precalculus": [...]
     }
+    Raises GPTServiceError if the call fails.
     """
+    return topic_list_request(file_paths).run()
 
-    # 1. Build the "content" array with text + images as data URLs
-    content_list = [
-        {
-            "type": "text",
-            "text": (
-                "Please parse these images into a JSON with the following format:\n"
-                "{\n"
-                "  \"Algebra\": [],\n"
-                "  \"Geometry\": [],\n"
-                "  \"Algebra II\": [],\n"
-                "  \"Precalculus\": []\n"
-                "}\n\n"
-                "Do not skip any topics. Topics are organized by course in vertical columns in the images. Return valid JSON only. No extra commentary."
-            ),
-        }
-    ]
-
-    for path in file_paths:
-        # Convert to absolute path under 'uploads/'
-        full_path = os.path.join("uploads", path)
-        # Read & base64-encode
-        with open(full_path, "rb") as f:
-            b64_str = base64.b64encode(f.read()).decode("utf-8")
-        # Append as an image_url content
-        content_list.append(
-            {
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/png;base64,{b64_str}"
-                }
-            }
-        )
 
-    # 2. Make the call
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "user",
-                    "content": content_list
-                }
-            ],
-            #max_tokens=700  # Adjust if needed
+def exam_images_request(file_paths, known_topic_list, event_name=""):
+    """GPTRequest behind parse_exam_images()."""
+    # Determine courses related to the exam based on the event name.
+    courses = get_event_courses(event_name)
+    courses_str = ", ".join(courses) if courses else "various"
+
+    vocabulary = build_topic_vocabulary(known_topic_list, courses or None)
+    if not vocabulary:
+        # None of the event's courses are in the list; let GPT pick from all of it.
+        vocabulary = build_topic_vocabulary(known_topic_list)
+
+    def build_content():
+        user_text = (
+            f"These are images of an exam on {courses_str}. "
+            "For each question, list the ids of all topics the question and its solution require, "
+            "using only ids from this numbered topic list:\n"
+            f"{format_vocabulary_for_prompt(vocabulary)}"
         )
-        # 3. GPT response
-        assistant_reply = response.choices[0].message.content
-        print("GPT Response:", assistant_reply)
-
-
-        # Strip any markdown code block formatting
-        clean_response = assistant_reply.strip()
-        if clean_response.startswith('```'):
-            # Remove opening ```json or ``` and closing ```
-            clean_response = clean_response.split('\n', 1)[1] if '\n' in clean_response else clean_response[3:]
-            clean_response = clean_response.rsplit('\n', 1)[0] if '\n' in clean_response else clean_response[:-3]
-            clean_response = clean_response.strip()
-            print(f"Cleaned response: {clean_response[:200]}...")  # Print first 200 chars
-        assistant_reply = clean_response
-
-        # 4. Parse as JSON
-        parsed_data = json.loads(assistant_reply)
-        return parsed_data
-    except Exception as e:
-        print("Error calling GPT for parse_topic_list_images:", e)
-        return {
-            "Algebra": [],
-            "Geometry": [],
-            "Algebra II": [],
-            "Precalculus": []
-        }
+        # Build the content list with text and image parts.
+        content_list = [{"type": "text", "text": user_text}]
+        content_list.extend(_image_content(path) for path in file_paths)
+        return content_list
+
+    def postprocess(parsed):
+        return topic_ids_to_exam_topics(parsed.questions, vocabulary)
+
+    def partial_result(partial):
+        # Every question but the last one in a partial reply is complete.
+        from src.gpt_schemas import QuestionTopicIds
+        complete = []
+        for question in (partial.get("questions") or [])[:-1]:
+            try:
+                complete.append(QuestionTopicIds.model_validate(question))
+            except ValueError:
+                continue
+        return topic_ids_to_exam_topics(complete, vocabulary)
+
+    return GPTRequest("parse_exam_images", "ExamTopicIds", build_content, postprocess,
+                      temperature=0.2, partial_result=partial_result)
 
 
 def parse_exam_images(file_paths, known_topic_list, event_name=""):
     """
     Parses exam images and returns a JSON structure that maps each question to a set of 2-4 topics.
-    
+
     The function:
       1. Determines which courses are relevant to the event based on its name.
-      2. Filters the known_topic_list to only include topics from those courses.
-      3. Converts the images to base64.
-      4. Constructs a prompt for GPT to tag each exam question with relevant topics.
-    
+      2. Numbers the known topics of those courses (see topics.build_topic_vocabulary).
+      3. Sends the compact numbered vocabulary and the images to GPT, which answers
+         with topic ids through a structured-output schema.
+      4. Maps the ids back to canonical "Course - topic" labels.
+
     Returns a JSON structure (list of dicts) with each dict containing:
       "questionNumber": <number>,
       "topics": [list of topics]
+    Raises GPTServiceError if the call fails.
     """
-    # Determine courses related to the exam based on the event name.
-    courses = get_event_courses(event_name)
-    courses_str = ", ".join(courses) if courses else "various"
-    
-    # Filter the known_topic_list to only include keys (courses) in the list 'courses'
-    filtered_known_topic_list = {
-        course: topics for course, topics in known_topic_list.items() if course in courses
-    }
+    return exam_images_request(file_paths, known_topic_list, event_name).run()
 
-    # Convert each image file to a base64 string.
-    images_b64 = []
-    for path in file_paths:
-        full_path = os.path.join("uploads", path)
-        with open(full_path, "rb") as f:
-            b64_data = base64.b64encode(f.read()).decode("utf-8")
-            images_b64.append({"filename": path, "content_b64": b64_data})
-    
-    # System prompt for GPT.
-    system_prompt = (
-        "You are an AI that reads exam images (provided as base64 strings), "
-        "Return valid JSON only.\n"
-    )
-    print(filtered_known_topic_list)
-    # Build a user prompt that includes:
-    # - The courses relevant to this exam.
-    # - A description of the task.
-    # - An example of the expected JSON output.
-    # - The filtered known topic list.
-    user_text = (
-        f"This exam is on the {courses_str} topics. We also have a known topic list to guide labeling.\n"
-        "Please identify each question (questionNumber) and identify all of the topics the question and solution require, returning valid JSON only. Do not make up topics, but use verbatim only those from the list. Prefix the topics with what course they are from.\n"
-        "Example:\n"
-        "[\n  {\"questionNumber\": 1, \"topics\": [\"Algebra - percents, percent of change\", \"Geometry - similarity\"]},\n  ...\n]\n\n"
-        f"Known topic list for reference: {json.dumps(filtered_known_topic_list)}"
-    )
-    
-    # Build the content list with text and image parts.
-    content_list = [
-        {"type": "text", "text": system_prompt + user_text},
-    ]
-    for path in file_paths:
-        full_path = os.path.join("uploads", path)
-        with open(full_path, "rb") as f:
-            b64_str = base64.b64encode(f.read()).decode("utf-8")
-        content_list.append({
-            "type": "image_url",
-            "image_url": {"url": f"data:image/png;base64,{b64_str}"}
-        })
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "user", "content": content_list}
-            ],
-            temperature=0.2
-        )
-        assistant_reply = response.choices[0].message.content
-        print("GPT Response:", assistant_reply)
-        
-        # Optionally, strip markdown formatting if necessary.
-        clean_response = assistant_reply.strip()
-        if clean_response.startswith("```"):
-            clean_response = clean_response.split('\n', 1)[1].rsplit('\n', 1)[0].strip()
-        parsed_data = json.loads(clean_response)
-        if '-' not in parsed_data[0]['topics'][0]:
-            # force prefix onto each topic
-            for question in parsed_data:
-                question['topics'] = [f"{courses[0]} - {topic}" for topic in question['topics']]
-        return parsed_data
-    except Exception as e:
-        print("Error calling GPT for parse_exam_images:", e)
-        return []
 
+def topic_ids_to_exam_topics(questions, vocabulary):
+    """
+    Maps GPT's [{questionNumber, topicIds}] answer back to the stored examTopics
+    shape, [{"questionNumber": n, "topics": ["Course - topic", ...]}].
+    Ids outside the vocabulary are dropped.
+    """
+    exam_topics = []
+    for question in questions:
+        topics = []
+        for topic_id in question.topicIds:
+            label = vocabulary.get(topic_id)
+            if label and label not in topics:
+                topics.append(label)
+        exam_topics.append({"questionNumber": question.questionNumber, "topics": topics})
+    return exam_topics
+
+
+def student_exam_request(file_path, known_exam_data):
+    """GPTRequest behind parse_single_student_exam_image()."""
+    def build_content():
+        return [
+            {
+                "type": "text",
+                "text": ("Here is a graded student answer sheet. The question is correct if there is a check and/or a c next to it. If there is an x, it is incorrect. The number of questions correct should match the number correct listed at the top right. Respond with a json."
+                )
+            },
+            _image_content(file_path),
+        ]
+
+    return GPTRequest("parse_single_student_exam_image", "StudentScores", build_content,
+                      lambda parsed: parsed.model_dump(), temperature=0)
 
 
 def parse_single_student_exam_image(file_path, known_exam_data):
@@ -230,65 +486,6 @@ def parse_single_student_exam_image(file_path, known_exam_data):
       "correctQuestions": [1, 2, 5],
       "incorrectQuestions": [3],
     }
+    Raises GPTServiceError if the call fails.
     """
-
-    # Convert file path to base64
-    full_path = os.path.join("uploads", file_path)
-    with open(full_path, "rb") as f:
-        b64_str = base64.b64encode(f.read()).decode("utf-8")
-
-    # Build the content array (text + image)
-    content_list = [
-        {
-            "type": "text",
-            "text": ("Here is a graded student answer sheet. The question is correct if there is a check and/or a c next to it. If there is an x, it is incorrect. The number of questions correct should match the number correct listed at the top right. Respond with a json."
-            )
-        },
-        # {
-        #     "type": "text",
-        #     "text": f"known_exam_data:\n{json.dumps(known_exam_data)}"
-        # },
-        {
-            "type": "image_url",
-            "image_url": {
-                "url": f"data:image/png;base64,{b64_str}"
-            }
-        }
-    ]
-
-    try:
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "user",
-                    "content": content_list
-                }
-            ],
-            response_format = StudentScores,
-            temperature = 0
-        )
-        assistant_reply = response.choices[0].message.content
-        print("GPT Response:", assistant_reply)
-
-        # Strip any markdown formatting
-        clean_response = assistant_reply.strip()
-        if clean_response.startswith("```"):
-            # Remove opening ```... and trailing ```
-            parts = clean_response.split("\n", 1)
-            if len(parts) > 1:
-                clean_response = parts[1]
-            # Remove the last block if it ends with ```
-            if "```" in clean_response:
-                clean_response = clean_response.split("```", 1)[0]
-            clean_response = clean_response.strip()
-
-        parsed_data = json.loads(clean_response)
-        return parsed_data
-    except Exception as e:
-        print("Error calling GPT for parse_single_student_exam_image:", e)
-        # Return a default if GPT fails
-        return {
-            "correctQuestions": [],
-            "incorrectQuestions": [],
-        }
\ No newline at end of file
+    return student_exam_request(file_path, known_exam_data).run()
@@ -0,0 +1,460 @@
+# src/mark_detection.py
+# Local scoring of single-student answer sheets, without a model call. The
+# sheets are printed from answer_sheet() in a fixed layout: a frame, a
+# "Correct" box at the top right where the grader writes the total, and one
+# row per question (printed number, answer line, and a column on the right for
+# the grader's check, "c" or "x"). score_sheet():
+#   1. binarizes the image (Otsu's threshold) and straightens it (the small
+#      rotation whose horizontal ink profile is sharpest),
+#   2. finds the printed frame and maps the layout onto it,
+#   3. finds the question rows from the ink of the printed numbers,
+#   4. classifies the ink in each row's mark cell as a check, "c", "x" or
+#      blank by correlating it with drawn templates,
+#   5. reads the total in the Correct box the same way, digit by digit.
+# local_student_scores() only accepts a sheet whose rows were all classified
+# confidently and whose correct count matches a readable total; otherwise
+# the caller falls back to the GPT parse. Needs numpy and Pillow; without
+# them every sheet goes to GPT. They're imported on first use, not when the
+# app starts.
+
+import math
+import os
+
+# numpy and Pillow modules, set by _load_dependencies().
+np = Image = ImageDraw = ImageFilter = ImageFont = ImageOps = None
+
+# LOCAL_SCORING=0 sends every sheet to GPT.
+LOCAL_SCORING = os.getenv("LOCAL_SCORING", "1") != "0"
+# Least margin between a mark's correct (check, c) and incorrect (x) readings for it to count as read.
+MIN_CONFIDENCE = float(os.getenv("LOCAL_SCORING_MIN_CONFIDENCE", "0.1"))
+
+# Printed sheet: US letter at 150 dpi; the frame and everything in it are
+# placed in fractions of the page (frame) so they survive scanning at any size.
+SHEET_SIZE = (1275, 1650)
+FRAME = (0.06, 0.045, 0.94, 0.955)
+# Inside the frame, as (left, top, right, bottom) fractions of its width and height.
+TOTAL_BOX = (0.70, 0.02, 0.96, 0.08)
+QUESTION_AREA = (0.0, 0.12, 1.0, 0.98)
+NUMBER_COLUMN = (0.02, 0.11)
+ANSWER_COLUMN = (0.14, 0.55)
+MARK_COLUMN = (0.60, 0.92)
+MAX_QUESTIONS = 40
+
+# Images are scored at this width; larger scans and photos are scaled down first.
+WORK_WIDTH = 850
+_TEMPLATE_SIZE = 20
+
+# Strokes of each mark and digit as polylines in a unit box (y down). The
+# templates are drawn from them; they're also handy for rendering test sheets.
+MARK_STROKES = {
+    "check": [[(0.0, 0.55), (0.35, 1.0), (1.0, 0.0)]],
+    "c": [[(math.cos(a) * 0.5 + 0.5, -math.sin(a) * 0.5 + 0.5)
+           for a in (math.radians(d) for d in range(45, 316, 15))]],
+    "x": [[(0.0, 0.0), (1.0, 1.0)], [(1.0, 0.0), (0.0, 1.0)]],
+}
+DIGIT_STROKES = {
+    0: [[(0.5 + 0.45 * math.sin(math.radians(d)), 0.5 - 0.5 * math.cos(math.radians(d)))
+         for d in range(0, 361, 20)]],
+    1: [[(0.3, 0.2), (0.55, 0.0), (0.55, 1.0)]],
+    2: [[(0.1, 0.25), (0.3, 0.05), (0.7, 0.05), (0.9, 0.25), (0.85, 0.45), (0.1, 1.0), (0.95, 1.0)]],
+    3: [[(0.1, 0.1), (0.5, 0.0), (0.85, 0.15), (0.85, 0.35), (0.45, 0.5), (0.9, 0.65), (0.9, 0.85),
+         (0.5, 1.0), (0.1, 0.9)]],
+    4: [[(0.7, 1.0), (0.7, 0.0), (0.05, 0.7), (0.95, 0.7)]],
+    5: [[(0.9, 0.0), (0.15, 0.0), (0.1, 0.45), (0.6, 0.4), (0.9, 0.6), (0.85, 0.9), (0.5, 1.0), (0.1, 0.9)]],
+    6: [[(0.8, 0.05), (0.4, 0.1), (0.15, 0.45), (0.1, 0.75), (0.3, 1.0), (0.7, 1.0), (0.9, 0.8),
+         (0.8, 0.55), (0.45, 0.5), (0.15, 0.7)]],
+    7: [[(0.05, 0.0), (0.95, 0.0), (0.4, 1.0)]],
+    8: [[(0.5, 0.5), (0.15, 0.3), (0.2, 0.05), (0.5, 0.0), (0.8, 0.05), (0.85, 0.3), (0.5, 0.5),
+         (0.1, 0.72), (0.2, 0.97), (0.5, 1.0), (0.8, 0.97), (0.9, 0.72), (0.5, 0.5)]],
+    9: [[(0.85, 0.35), (0.6, 0.5), (0.25, 0.45), (0.1, 0.25), (0.3, 0.02), (0.7, 0.02), (0.88, 0.2),
+         (0.85, 0.35), (0.8, 1.0)]],
+}
+_CORRECT_MARKS = ("check", "c")
+
+_templates = {}
+
+
+def _load_dependencies():
+    """Imports numpy and Pillow on first use. Returns False if either is missing."""
+    global np, Image, ImageDraw, ImageFilter, ImageFont, ImageOps
+    if np is None:
+        try:
+            import numpy
+            from PIL import Image as image, ImageDraw as draw, ImageFilter as image_filter, ImageFont as font
+            from PIL import ImageOps as ops
+        except ImportError:  # optional, for local scoring
+            return False
+        Image, ImageDraw, ImageFilter, ImageFont, ImageOps = image, draw, image_filter, font, ops
+        np = numpy  # last: np set means all of them are
+    return True
+
+
+def available():
+    """True when local scoring is enabled and numpy and Pillow are installed."""
+    return LOCAL_SCORING and _load_dependencies()
+
+
+def draw_strokes(draw, strokes, box, width):
+    """Draws unit-box polylines (MARK_STROKES / DIGIT_STROKES) into `box` on an ImageDraw."""
+    x0, y0, x1, y1 = box
+    for line in strokes:
+        points = [(x0 + x * (x1 - x0), y0 + y * (y1 - y0)) for x, y in line]
+        draw.line(points, fill=0, width=width, joint="curve")
+
+
+def frame_box(size):
+    """The printed frame's pixel box on a page of `size`."""
+    w, h = size
+    return (FRAME[0] * w, FRAME[1] * h, FRAME[2] * w, FRAME[3] * h)
+
+
+def layout_box(frame, region):
+    """Pixel box of a layout region (fractions of the frame) inside `frame`."""
+    fx0, fy0, fx1, fy1 = frame
+    fw, fh = fx1 - fx0, fy1 - fy0
+    return (fx0 + region[0] * fw, fy0 + region[1] * fh, fx0 + region[2] * fw, fy0 + region[3] * fh)
+
+
+def question_row_box(frame, num_questions, index, columns=(0.0, 1.0)):
+    """Pixel box of question row `index` (0-based) as printed, limited to `columns` of the frame."""
+    left, top, right, bottom = layout_box(frame, (columns[0], QUESTION_AREA[1], columns[1], QUESTION_AREA[3]))
+    row_h = (bottom - top) / num_questions
+    return (left, top + index * row_h, right, top + (index + 1) * row_h)
+
+
+def answer_sheet(num_questions, title=""):
+    """A blank answer sheet for `num_questions` questions (1..MAX_QUESTIONS) as a Pillow image."""
+    if not _load_dependencies():
+        raise ValueError("Answer sheets need Pillow and numpy (pip install pillow numpy).")
+    if not 1 <= num_questions <= MAX_QUESTIONS:
+        raise ValueError(f"Answer sheets have 1 to {MAX_QUESTIONS} questions.")
+    page = Image.new("L", SHEET_SIZE, 255)
+    draw = ImageDraw.Draw(page)
+    frame = frame_box(SHEET_SIZE)
+    draw.rectangle(frame, outline=0, width=4)
+
+    small = ImageFont.load_default(size=22)
+    header = layout_box(frame, (0.02, 0.02, 0.68, 0.08))
+    draw.text((header[0], header[1]), f"{title}\nName: ______________________   Grade: ________",
+              fill=0, font=small, spacing=10)
+    total = layout_box(frame, TOTAL_BOX)
+    draw.text((total[0] - 100, (total[1] + total[3]) / 2), "Correct:", fill=0, font=small, anchor="lm")
+    draw.rectangle(total, outline=0, width=3)
+
+    row_h = question_row_box(frame, num_questions, 0)[3] - question_row_box(frame, num_questions, 0)[1]
+    number_font = ImageFont.load_default(size=max(12, min(28, int(row_h * 0.55))))
+    for i in range(num_questions):
+        nx0, ny0, nx1, ny1 = question_row_box(frame, num_questions, i, NUMBER_COLUMN)
+        draw.text((nx1, (ny0 + ny1) / 2), f"{i + 1}.", fill=0, font=number_font, anchor="rm")
+        ax0, _, ax1, ay1 = question_row_box(frame, num_questions, i, ANSWER_COLUMN)
+        draw.line([(ax0, ay1 - row_h * 0.2), (ax1, ay1 - row_h * 0.2)], fill=0, width=2)
+    return page
+
+
+# ---------- Image processing ----------
+
+def _load_gray(path):
+    image = Image.open(path)
+    # Let JPEG decoding scale down on the fly; phone photos are far larger than needed.
+    image.draft("L", (WORK_WIDTH * 2, WORK_WIDTH * 3))
+    image = ImageOps.exif_transpose(image).convert("L")
+    if image.width > WORK_WIDTH:
+        image = image.resize((WORK_WIDTH, round(image.height * WORK_WIDTH / image.width)), Image.BILINEAR)
+    return image
+
+
+def _otsu_threshold(gray):
+    hist = np.bincount(np.asarray(gray).ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(hist)
+    mean = np.cumsum(hist * levels)
+    total = weight[-1]
+    between = (mean[-1] * weight - mean * total) ** 2 / np.maximum(weight * (total - weight), 1)
+    return int(np.argmax(between))
+
+
+def _straighten(ink):
+    """Rotates the ink image (white on black, "L") by the angle that sharpens its row profile most."""
+    def sharpness(angle):
+        profile = np.asarray(ink.rotate(angle, resample=Image.NEAREST), dtype=np.float64).sum(axis=1)
+        return float(np.square(profile).sum())
+
+    best = max((a for a in range(-4, 5)), key=sharpness)
+    best = max((best + a / 4 for a in range(-3, 4)), key=sharpness)
+    return ink.rotate(best, resample=Image.BILINEAR) if best else ink
+
+
+def _find_frame(ink):
+    """(left, top, right, bottom) of the printed frame, from the rows/columns that are mostly ink; or None."""
+    h, w = ink.shape
+    rows = np.flatnonzero(ink.mean(axis=1) > 0.5)
+    cols = np.flatnonzero(ink.mean(axis=0) > 0.5)
+    if len(rows) < 2 or len(cols) < 2 or rows[-1] - rows[0] < h / 2 or cols[-1] - cols[0] < w / 2:
+        return None
+    return (cols[0], rows[0], cols[-1], rows[-1])
+
+
+def _runs(mask, min_length=1):
+    """(start, end) of the runs of True in a 1-D mask, end exclusive."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return [(s, e) for s, e in zip(edges[::2], edges[1::2]) if e - s >= min_length]
+
+
+def _slice(ink, box):
+    x0, y0, x1, y1 = (int(round(v)) for v in box)
+    return ink[max(y0, 0):y1, max(x0, 0):x1]
+
+
+def _trimmed_bbox(cell):
+    """Bounding box of the ink in a cell, ignoring the outermost 1% of ink on each side (specks)."""
+    ys, xs = np.nonzero(cell)
+    if len(xs) == 0:
+        return None
+    x0, x1 = np.percentile(xs, (1, 99))
+    y0, y1 = np.percentile(ys, (1, 99))
+    return int(x0), int(y0), int(x1) + 1, int(y1) + 1
+
+
+def _shape_vector(cell):
+    """The ink in a cell, cropped, centred on a square, scaled and blurred to a unit vector (or None)."""
+    bbox = _trimmed_bbox(cell)
+    if bbox is None:
+        return None
+    x0, y0, x1, y1 = bbox
+    crop = cell[y0:y1, x0:x1]
+    side = max(crop.shape) + 2
+    square = np.zeros((side, side), dtype=np.uint8)
+    oy, ox = (side - crop.shape[0]) // 2, (side - crop.shape[1]) // 2
+    square[oy:oy + crop.shape[0], ox:ox + crop.shape[1]] = crop * 255
+    small = Image.fromarray(square).resize((_TEMPLATE_SIZE, _TEMPLATE_SIZE), Image.BOX)
+    vector = np.asarray(small.filter(ImageFilter.GaussianBlur(1)), dtype=np.float64).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def _build_templates(strokes_by_label, aspects, widths, angles):
+    labels = []
+    vectors = []
+    for label, strokes in strokes_by_label.items():
+        for aspect in aspects:
+            for width in widths:
+                for angle in angles:
+                    canvas = Image.new("L", (96, 96), 255)
+                    w, h = (60 * aspect, 60) if aspect <= 1 else (60, 60 / aspect)
+                    draw_strokes(ImageDraw.Draw(canvas), strokes, (48 - w / 2, 48 - h / 2, 48 + w / 2, 48 + h / 2), width)
+                    canvas = canvas.rotate(angle, fillcolor=255)
+                    vector = _shape_vector(np.asarray(canvas) < 128)
+                    labels.append(label)
+                    vectors.append(vector)
+    return labels, np.array(vectors)
+
+
+def _get_templates(kind):
+    if kind not in _templates:
+        if kind == "marks":
+            _templates[kind] = _build_templates(MARK_STROKES, (0.8, 1.0, 1.3), (4, 8), (-12, 0, 12))
+        else:
+            _templates[kind] = _build_templates(DIGIT_STROKES, (0.5, 0.7), (5, 9), (-8, 0, 8))
+    return _templates[kind]
+
+
+def _class_scores(vector, kind):
+    """{label: best correlation with that label's templates}."""
+    labels, matrix = _get_templates(kind)
+    best = {}
+    for label, score in zip(labels, matrix @ vector):
+        best[label] = max(best.get(label, -1.0), float(score))
+    return best
+
+
+# ---------- Scoring ----------
+
+def _question_rows(ink, frame):
+    """(top, bottom) of each question row, from the ink bands of the printed numbers."""
+    x0, y0, x1, y1 = layout_box(frame, (NUMBER_COLUMN[0], QUESTION_AREA[1], NUMBER_COLUMN[1], QUESTION_AREA[3]))
+    column = _slice(ink, (x0, y0, x1, y1))
+    bands = [(s, e) for s, e in _merge_runs(_runs(column.sum(axis=1) >= 2), 2) if e - s >= 3]
+    centers = [int(y0) + (s + e) / 2 for s, e in bands]
+    if len(centers) < 2:
+        return []
+    rows = []
+    for i, center in enumerate(centers):
+        above = (center - centers[i - 1]) / 2 if i else (centers[1] - centers[0]) / 2
+        below = (centers[i + 1] - center) / 2 if i + 1 < len(centers) else above
+        rows.append((center - above, center + below))
+    return rows
+
+
+def _components(mask):
+    """Connected ink components (8-neighbour) of a small boolean image, as lists of (y, x)."""
+    remaining = set(zip(*(a.tolist() for a in np.nonzero(mask))))
+    components = []
+    while remaining:
+        stack = [remaining.pop()]
+        component = []
+        while stack:
+            y, x = stack.pop()
+            component.append((y, x))
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    neighbour = (y + dy, x + dx)
+                    if neighbour in remaining:
+                        remaining.remove(neighbour)
+                        stack.append(neighbour)
+        components.append(component)
+    return components
+
+
+def _mark_cell(ink, box):
+    """
+    The grader's mark for one row: the ink components whose centre is in the
+    row, taken from a window a row taller each way so marks that stick out of
+    the row stay whole, and neighbouring rows' marks stay out. Specks much
+    smaller than the largest stroke are dropped.
+    """
+    x0, top, x1, bottom = box
+    height = bottom - top
+    window_top = max(int(round(top - height)), 0)
+    window = _slice(ink, (x0, window_top, x1, bottom + height))
+    components = [c for c in _components(window)
+                  if top <= window_top + sum(y for y, _ in c) / len(c) < bottom]
+    cell = np.zeros_like(window)
+    if components:
+        largest = max(len(c) for c in components)
+        for component in components:
+            if len(component) >= largest * 0.15:
+                ys, xs = zip(*component)
+                cell[list(ys), list(xs)] = True
+    return cell
+
+
+def _read_mark(cell, row_height):
+    """("check" | "c" | "x" | "blank", confidence) for one mark cell."""
+    ink = int(cell.sum())
+    # A mark is a stroke or two about a row high; a few specks aren't one.
+    if ink < 0.5 * row_height:
+        return "blank", 1.0 - ink / (0.5 * row_height) * 0.5
+    vector = _shape_vector(cell)
+    if vector is None:
+        return "blank", 1.0
+    ys = np.flatnonzero(cell.any(axis=1))
+    if ys[-1] - ys[0] > 1.3 * row_height:
+        # Taller than any one mark: it runs into a neighbouring row's mark.
+        return "x", 0.0
+    scores = _class_scores(vector, "marks")
+    label = max(scores, key=scores.get)
+    # A check and a "c" both mean correct; what matters is how clearly it isn't an x (or vice versa).
+    confidence = abs(max(scores[m] for m in _CORRECT_MARKS) - scores["x"])
+    if ink < 1.2 * row_height:
+        # Between a speck and a stroke: not sure it's a mark at all.
+        confidence = min(confidence, 0.0)
+    return label, confidence
+
+
+def _merge_runs(runs, max_gap):
+    """Joins (start, end) runs separated by at most max_gap (a stroke broken by noise or a thin pen)."""
+    merged = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _read_total(ink, frame):
+    """
+    The number written in the Correct box, or None when it's empty. Digits are
+    read as the closest templates; the caller only trusts the total when it
+    agrees with the marks, so a misread digit sends the sheet to GPT.
+    """
+    x0, y0, x1, y1 = layout_box(frame, TOTAL_BOX)
+    inset_x, inset_y = (x1 - x0) * 0.06, (y1 - y0) * 0.18
+    box = _slice(ink, (x0 + inset_x, y0 + inset_y, x1 - inset_x, y1 - inset_y))
+    digits = []
+    for start, end in _merge_runs(_runs(box.sum(axis=0) > 0), 2):
+        vector = _shape_vector(box[:, start:end])
+        if vector is not None and end - start >= 2:
+            scores = _class_scores(vector, "digits")
+            digits.append(str(max(scores, key=scores.get)))
+    return int("".join(digits)) if digits else None
+
+
+class SheetResult:
+    """What score_sheet() read from a sheet; `reason` says why it isn't usable (None if it is)."""
+
+    __slots__ = ("correctQuestions", "incorrectQuestions", "confidence", "total", "reason")
+
+    def __init__(self, correctQuestions=(), incorrectQuestions=(), confidence=0.0, total=None, reason=None):
+        self.correctQuestions = list(correctQuestions)
+        self.incorrectQuestions = list(incorrectQuestions)
+        self.confidence = confidence
+        self.total = total
+        self.reason = reason
+
+    def scores(self):
+        """The StudentScores shape the GPT parse returns."""
+        return {"correctQuestions": self.correctQuestions, "incorrectQuestions": self.incorrectQuestions}
+
+
+def score_sheet(path, num_questions=None):
+    """
+    Reads an answer sheet image. `num_questions`, when known, must match the
+    number of rows found. The result's reason is set when the sheet can't be
+    trusted: no frame, wrong row count, an unclear mark or total, or a total
+    that disagrees with the marks.
+    """
+    if not _load_dependencies():
+        raise ValueError("Local scoring needs Pillow and numpy (pip install pillow numpy).")
+    gray = _load_gray(path)
+    threshold = _otsu_threshold(gray)
+    ink_image = _straighten(gray.point(lambda v: 255 if v < threshold else 0))
+    ink = np.asarray(ink_image) > 127
+
+    frame = _find_frame(ink)
+    if frame is None:
+        return SheetResult(reason="no sheet frame found")
+    rows = _question_rows(ink, frame)
+    if not rows or (num_questions and len(rows) != num_questions):
+        return SheetResult(reason=f"found {len(rows)} question rows, expected {num_questions or 'at least 2'}")
+
+    mark_x0, _, mark_x1, _ = layout_box(frame, (MARK_COLUMN[0], 0, MARK_COLUMN[1], 1))
+    correct, incorrect = [], []
+    confidence = 1.0
+    for number, (top, bottom) in enumerate(rows, start=1):
+        label, mark_confidence = _read_mark(_mark_cell(ink, (mark_x0, top, mark_x1, bottom)), bottom - top)
+        confidence = min(confidence, mark_confidence)
+        if label in _CORRECT_MARKS:
+            correct.append(number)
+        elif label == "x":
+            incorrect.append(number)
+
+    total = _read_total(ink, frame)
+    result = SheetResult(correct, incorrect, confidence, total)
+    if confidence < MIN_CONFIDENCE:
+        result.reason = f"unclear mark (confidence {confidence:.2f})"
+    elif total is None:
+        result.reason = "no total written"
+    elif total != len(correct):
+        result.reason = f"{len(correct)} marked correct but the total says {total}"
+    return result
+
+
+def local_student_scores(path, num_questions=None):
+    """
+    The StudentScores dict for an answer sheet scored locally, or None when the
+    sheet should go to GPT instead (local scoring unavailable or not confident).
+    """
+    if not available():
+        return None
+    try:
+        result = score_sheet(path, num_questions)
+    except (OSError, ValueError) as e:
+        print(f"Local scoring of {path} failed: {e}")
+        return None
+    if result.reason:
+        print(f"Local scoring of {path} not used: {result.reason}")
+        return None
+    return result.scores()
@@ -0,0 +1,165 @@
+# src/models.py
+# Typed in-memory model of the meets in the store. load_data() builds these
+# objects from store.json and save_data() writes them back with the same JSON
+# schema, so the file format doesn't change.
+#
+# Attribute names follow the JSON keys (camelCase) so templates and the rest of
+# the code read `event.eventName` the same way the file spells it. Classes use
+# __slots__, and question-number lists are array('H') (2 bytes per question)
+# instead of lists of Python ints. Keys this module doesn't know are kept in
+# `extra` and written back unchanged.
+
+from array import array
+
+
+def question_array(values=()):
+    """Question numbers as a compact unsigned 16-bit array (non-question numbers are dropped)."""
+    return array("H", (q for q in values if 0 < q < 65536))
+
+
+def _extra(d, known):
+    extra = {k: v for k, v in d.items() if k not in known}
+    return extra or None
+
+
+class ExamQuestion:
+    __slots__ = ("questionNumber", "topics")
+
+    def __init__(self, questionNumber, topics=()):
+        self.questionNumber = int(questionNumber)
+        self.topics = list(topics)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["questionNumber"], d.get("topics", ()))
+
+    def to_dict(self):
+        return {"questionNumber": self.questionNumber, "topics": list(self.topics)}
+
+    def __repr__(self):
+        return f"ExamQuestion({self.questionNumber}, {self.topics!r})"
+
+
+class Participant:
+    __slots__ = ("studentId", "studentName", "gradeLevel", "correctQuestions", "incorrectQuestions", "extra")
+
+    _KEYS = frozenset(__slots__)
+
+    def __init__(self, studentName, gradeLevel, correctQuestions=(), incorrectQuestions=(),
+                 studentId=None, extra=None):
+        self.studentId = studentId
+        self.studentName = studentName
+        self.gradeLevel = gradeLevel
+        self.correctQuestions = question_array(correctQuestions)
+        self.incorrectQuestions = question_array(incorrectQuestions)
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["studentName"], d["gradeLevel"], d.get("correctQuestions", ()),
+                   d.get("incorrectQuestions", ()), d.get("studentId"), _extra(d, cls._KEYS))
+
+    def to_dict(self):
+        d = dict(self.extra) if self.extra else {}
+        if self.studentId is not None:
+            d["studentId"] = self.studentId
+        d["studentName"] = self.studentName
+        d["gradeLevel"] = self.gradeLevel
+        d["correctQuestions"] = self.correctQuestions.tolist()
+        d["incorrectQuestions"] = self.incorrectQuestions.tolist()
+        return d
+
+
+class Event:
+    __slots__ = ("id", "eventName", "numQuestions", "examTopics", "participants",
+                 "examImagePaths", "scoreImagePaths", "teamCorrectQuestions",
+                 "teamIncorrectQuestions", "extra")
+
+    _KEYS = frozenset(__slots__)
+
+    def __init__(self, id, eventName, numQuestions=None, examTopics=(), participants=(),
+                 examImagePaths=(), scoreImagePaths=(), teamCorrectQuestions=None,
+                 teamIncorrectQuestions=None, extra=None):
+        self.id = id
+        self.eventName = eventName
+        # None until an exam is parsed or the count is set.
+        self.numQuestions = numQuestions
+        self.examTopics = list(examTopics)
+        self.participants = list(participants)
+        self.examImagePaths = list(examImagePaths)
+        self.scoreImagePaths = list(scoreImagePaths)
+        # None until the team's score is entered (team events only).
+        self.teamCorrectQuestions = None if teamCorrectQuestions is None else question_array(teamCorrectQuestions)
+        self.teamIncorrectQuestions = None if teamIncorrectQuestions is None else question_array(teamIncorrectQuestions)
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            d["id"], d.get("eventName", ""), d.get("numQuestions"),
+            [ExamQuestion.from_dict(q) for q in d.get("examTopics", ())],
+            [Participant.from_dict(p) for p in d.get("participants", ())],
+            d.get("examImagePaths", ()), d.get("scoreImagePaths", ()),
+            d.get("teamCorrectQuestions"), d.get("teamIncorrectQuestions"),
+            _extra(d, cls._KEYS),
+        )
+
+    def to_dict(self):
+        d = dict(self.extra) if self.extra else {}
+        d["id"] = self.id
+        d["eventName"] = self.eventName
+        if self.numQuestions is not None:
+            d["numQuestions"] = self.numQuestions
+        d["examTopics"] = [q.to_dict() for q in self.examTopics]
+        d["participants"] = [p.to_dict() for p in self.participants]
+        d["examImagePaths"] = list(self.examImagePaths)
+        d["scoreImagePaths"] = list(self.scoreImagePaths)
+        if self.teamCorrectQuestions is not None:
+            d["teamCorrectQuestions"] = self.teamCorrectQuestions.tolist()
+        if self.teamIncorrectQuestions is not None:
+            d["teamIncorrectQuestions"] = self.teamIncorrectQuestions.tolist()
+        return d
+
+    def find_participant(self, student_id):
+        for participant in self.participants:
+            if participant.studentId == student_id:
+                return participant
+        return None
+
+
+class Meet:
+    __slots__ = ("id", "title", "date", "topicList", "topicListUploads", "events", "extra")
+
+    _KEYS = frozenset(__slots__)
+
+    def __init__(self, id, title, date=None, topicList=None, topicListUploads=(), events=(), extra=None):
+        self.id = id
+        self.title = title
+        self.date = date
+        self.topicList = topicList if topicList is not None else {}
+        self.topicListUploads = list(topicListUploads)
+        self.events = list(events)
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["id"], d.get("title", ""), d.get("date"), d.get("topicList"),
+                   d.get("topicListUploads", ()), [Event.from_dict(e) for e in d.get("events", ())],
+                   _extra(d, cls._KEYS))
+
+    def to_dict(self):
+        d = dict(self.extra) if self.extra else {}
+        d["id"] = self.id
+        d["title"] = self.title
+        if self.date is not None:
+            d["date"] = self.date
+        d["topicList"] = self.topicList
+        d["topicListUploads"] = list(self.topicListUploads)
+        d["events"] = [e.to_dict() for e in self.events]
+        return d
+
+    def find_event(self, event_id):
+        for event in self.events:
+            if event.id == event_id:
+                return event
+        return None
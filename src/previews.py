@@ -0,0 +1,156 @@
+# src/previews.py
+# Downscaled copies of uploaded images for reviewing them on the meet and event
+# pages: a small thumbnail and a web-sized preview of each scan. They are made
+# on first request and cached on disk under uploads/.previews/<size>/, named
+# after the source's content hash, so a re-uploaded scan reuses them and a
+# preview never goes stale. The cache is kept under PREVIEW_CACHE_MAX_MB by
+# deleting the least recently served previews.
+#
+# Needs Pillow, imported on the first preview rather than at app startup;
+# without it (or for a file Pillow can't read) the original file is served
+# instead.
+
+import hashlib
+import math
+import os
+import tempfile
+import threading
+
+from src.tenants import upload_root
+from src.upload_store import PREVIEW_CACHE_DIR, content_hash_of, upload_path
+
+# Longest side in pixels and JPEG quality. Thumbnails are shown at about half
+# their size, so they stay sharp on high-density screens.
+SIZES = {"thumb": (320, 70), "preview": (1600, 82)}
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_MB", "256")) * 1024 * 1024
+# Seconds browsers may keep the preview of a content-addressed upload without asking again.
+PREVIEW_MAX_AGE = 365 * 24 * 3600
+# Eviction deletes down to this share of the limit, so it doesn't run on every new preview.
+_EVICT_TO = 0.9
+
+# Bytes in each preview cache folder, counted once per process and kept up to date.
+_cache_bytes = {}
+_cache_lock = threading.Lock()
+
+# Pillow modules, set by _load_pillow().
+Image = ImageOps = None
+
+
+def _load_pillow():
+    """Imports Pillow on first use. Returns False if it isn't installed."""
+    global Image, ImageOps
+    if Image is None:
+        try:
+            from PIL import Image as image, ImageOps as ops
+        except ImportError:  # optional, for previews
+            return False
+        ImageOps = ops
+        Image = image  # last: Image set means both are
+    return True
+
+
+def _source_key(relative_path, source):
+    """The content hash of a content-addressed upload; for legacy uuid paths, one of its path and mtime."""
+    sha = content_hash_of(relative_path)
+    if sha:
+        return sha
+    stat = os.stat(source)
+    return hashlib.sha256(f"{relative_path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8")).hexdigest()
+
+
+def _cache_root():
+    return os.path.join(upload_root(), PREVIEW_CACHE_DIR)
+
+
+def _render(source, target, max_side, quality):
+    with Image.open(source) as image:
+        # JPEG decodes at 1/2, 1/4 or 1/8 scale directly: much faster for phone photos.
+        scale = min(1.0, max_side / max(image.size))
+        image.draft(image.mode, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def _cache_entries(root):
+    """(mtime, size, path) of every cached preview."""
+    entries = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if not name.startswith("."):
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _count_and_evict(root, added):
+    """Adds a new preview's size to the cache total and evicts the least recently served ones past the limit."""
+    with _cache_lock:
+        if root in _cache_bytes:
+            _cache_bytes[root] += added
+        else:
+            _cache_bytes[root] = sum(size for _, size, _ in _cache_entries(root))
+        if _cache_bytes[root] <= PREVIEW_CACHE_MAX_BYTES:
+            return
+        entries = sorted(_cache_entries(root))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= PREVIEW_CACHE_MAX_BYTES * _EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        _cache_bytes[root] = total
+
+
+def preview_file(relative_path, size):
+    """
+    Path of the `size` ("thumb" or "preview") version of a stored upload, made
+    now if it isn't cached. Returns (path, source_key, is_preview); is_preview
+    is False when the original is returned instead (no Pillow, or not an image
+    Pillow reads). Raises KeyError for an unknown size and FileNotFoundError
+    for a path that isn't an upload.
+    """
+    max_side, quality = SIZES[size]
+    parts = os.path.normpath(relative_path).split(os.sep)
+    # Only uploads: not the caches or partial uploads next to them, nor anything outside uploads/.
+    if os.path.isabs(relative_path) or any(part.startswith(".") for part in parts):
+        raise FileNotFoundError(relative_path)
+    source = upload_path(relative_path)
+    if not os.path.isfile(source):
+        raise FileNotFoundError(relative_path)
+    key = _source_key(relative_path, source)
+    if not _load_pillow():
+        return source, key, False
+
+    root = _cache_root()
+    target = os.path.join(root, size, key[:2], key + ".jpg")
+    if os.path.exists(target):
+        try:
+            os.utime(target)  # recently served: evicted last
+            return target, key, True
+        except FileNotFoundError:
+            pass  # evicted just now
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        _render(source, target, max_side, quality)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # Not an image Pillow can read (UnidentifiedImageError is an OSError).
+        return source, key, False
+    _count_and_evict(root, os.path.getsize(target))
+    return target, key, True
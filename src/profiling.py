@@ -0,0 +1,275 @@
+# src/profiling.py
+# On-demand profiling of single requests in production. It is off unless
+# PROFILING_TOKEN is set, and then the middleware is installed but only
+# profiles a request that carries the token, as ?profile=<token> or an
+# X-Profile-Token header. Without the setting nothing is installed, so
+# requests pay nothing for it.
+#
+# A profiled request runs under cProfile, and a sampling thread records its
+# call stacks at the same time. Both cover routing, templates and a streamed
+# body. Each profile is saved under PROFILE_DIR as three files:
+#   <id>.prof    pstats, for `python -m pstats` or snakeviz
+#   <id>.folded  collapsed stacks, for flamegraph.pl or speedscope
+#   <id>.json    the request, its status and duration, the time spent in
+#                load_data, JSON decoding, dashboard aggregation, templates
+#                and GPT calls, and the top functions
+# /admin/profiles?token=<token> lists the recent profiles.
+
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+# Older profiles are deleted beyond this many.
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+# Seconds between stack samples. The sampler needs the GIL, so a CPU-bound
+# request is sampled about every sys.getswitchinterval() (5 ms) at best.
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.001"))
+PROFILE_HEADER = "HTTP_X_PROFILE_TOKEN"
+PROFILE_PARAM = "profile"
+ADMIN_PATH = "/admin/profiles"
+TOP_FUNCTIONS = 25
+
+
+def _in_file(suffix, *names):
+    suffix = suffix.replace("/", os.sep)
+    return lambda filename, name: filename.endswith(suffix) and (not names or name in names)
+
+
+def _in_package(package):
+    marker = os.sep + package + os.sep
+    return lambda filename, name: marker in filename
+
+
+def _any(*predicates):
+    return lambda filename, name: any(p(filename, name) for p in predicates)
+
+
+# Where a request's time goes, each as inclusive time of the matching
+# functions: a category's time includes whatever it calls, so load_data's
+# includes its JSON decoding.
+CATEGORIES = {
+    "load_data": _in_file("src/data_manager.py", "load_data"),
+    "json_decode": _any(_in_file("json/decoder.py"), _in_file("json/__init__.py", "load", "loads"),
+                        _in_file("src/serialization.py", "loads", "read_store_file"),
+                        lambda filename, name: name in ("<built-in method orjson.loads>",
+                                                        "<method 'decode' of 'json.decoder.JSONDecoder' objects>")),
+    "dashboard_logic": _in_file("src/dashboard_logic.py"),
+    "templates": _any(_in_package("jinja2"), lambda filename, name: filename.endswith(".html")),
+    "gpt": _any(_in_file("src/gpt_services.py"), _in_package("openai")),
+}
+
+
+def _called_only_from(stats, inside):
+    """`inside` plus every function called only from functions in it, transitively."""
+    inside = set(inside)
+    changed = True
+    while changed:
+        changed = False
+        for func, (_, _, _, _, callers) in stats.stats.items():
+            if func not in inside and callers and all(caller in inside for caller in callers):
+                inside.add(func)
+                changed = True
+    return inside
+
+
+def category_times(stats):
+    """Seconds spent in each of CATEGORIES, from a pstats.Stats."""
+    total_time = max((cumulative for _, _, _, cumulative, _ in stats.stats.values()), default=0.0)
+    times = {}
+    for category, predicate in CATEGORIES.items():
+        members = {func for func in stats.stats if predicate(func[0], func[2])}
+        # A call into the category from code it called itself (a url_for() in a
+        # template that renders another template) is already counted.
+        inside = _called_only_from(stats, members)
+        total = 0.0
+        for func in members:
+            callers = stats.stats[func][4]
+            if not callers:
+                total += stats.stats[func][3]
+            for caller, caller_stats in callers.items():
+                if caller not in inside:
+                    total += caller_stats[3]
+        times[category] = min(total, total_time)
+    return times
+
+
+def _short_path(filename):
+    for marker in ("site-packages" + os.sep, os.getcwd() + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StackSampler(threading.Thread):
+    """Counts the collapsed call stacks of one thread, below the frame running `root_code`."""
+
+    def __init__(self, thread_id, root_code, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.root_code = root_code
+        self.interval = interval
+        self.counts = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _top_functions(stats, limit=TOP_FUNCTIONS):
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        label = name if filename == "~" else f"{name} ({_short_path(filename)}:{line})"
+        rows.append({"function": label, "calls": calls, "ownTime": own, "cumulativeTime": cumulative})
+    rows.sort(key=lambda row: row["cumulativeTime"], reverse=True)
+    return rows[:limit]
+
+
+def _prune(profile_dir, keep):
+    profiles = sorted(name[:-5] for name in os.listdir(profile_dir) if name.endswith(".json"))
+    for profile_id in profiles[:max(0, len(profiles) - keep)]:
+        for ext in ("json", "prof", "folded"):
+            try:
+                os.remove(os.path.join(profile_dir, f"{profile_id}.{ext}"))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(profile_dir=None):
+    """The saved profiles' summaries, newest first."""
+    profile_dir = profile_dir or PROFILE_DIR
+    if not os.path.isdir(profile_dir):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(profile_dir), reverse=True):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(profile_dir, name), "r", encoding="utf-8") as f:
+                    summaries.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue  # being written or pruned
+    return summaries
+
+
+class ProfilingMiddleware:
+    """WSGI middleware that profiles the requests carrying the token (see the module comment)."""
+
+    def __init__(self, wsgi_app, token, profile_dir=None):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.profile_dir = profile_dir or PROFILE_DIR
+
+    def token_matches(self, value):
+        return bool(value) and hmac.compare_digest(value.encode("utf-8"), self.token.encode("utf-8"))
+
+    def _requested(self, environ):
+        if environ.get("PATH_INFO", "").startswith(ADMIN_PATH):
+            return False
+        if self.token_matches(environ.get(PROFILE_HEADER, "")):
+            return True
+        query = environ.get("QUERY_STRING", "")
+        return PROFILE_PARAM + "=" in query and self.token_matches(dict(parse_qsl(query)).get(PROFILE_PARAM))
+
+    def __call__(self, environ, start_response):
+        if not self._requested(environ):
+            return self.wsgi_app(environ, start_response)
+        return self._profiled(environ, start_response)
+
+    def _profiled(self, environ, start_response):
+        # The token stays out of the app's view and out of the saved profile.
+        query = [(k, v) for k, v in parse_qsl(environ.get("QUERY_STRING", ""), keep_blank_values=True)
+                 if k != PROFILE_PARAM]
+        environ["QUERY_STRING"] = urlencode(query)
+        environ.pop(PROFILE_HEADER, None)
+        profile_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        response = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            response["status"] = status
+            return start_response(status, headers + [("X-Profile-Id", profile_id)], exc_info)
+
+        def run():
+            # The whole body is produced here, so a streamed response is profiled too.
+            result = self.wsgi_app(environ, capture_start_response)
+            try:
+                return list(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+
+        sampler = _StackSampler(threading.get_ident(), run.__code__, PROFILE_SAMPLE_INTERVAL)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            body = profiler.runcall(run)
+        finally:
+            duration = time.perf_counter() - started
+            sampler.stop()
+            self._save(profile_id, environ, response.get("status", "500"), duration, profiler, sampler.counts)
+        return body
+
+    def _save(self, profile_id, environ, status, duration, profiler, stack_counts):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, profile_id)
+        profiler.dump_stats(base + ".prof")
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in sorted(stack_counts.items()):
+                f.write(f"{stack} {count}\n")
+        stats = pstats.Stats(profiler)
+        summary = {
+            "id": profile_id,
+            "created": time.time(),
+            "method": environ.get("REQUEST_METHOD"),
+            "path": environ.get("SCRIPT_NAME", "") + environ.get("PATH_INFO", ""),
+            "query": environ.get("QUERY_STRING", ""),
+            "status": int(str(status).split(" ", 1)[0]),
+            "duration": duration,
+            "samples": sum(stack_counts.values()),
+            "categories": category_times(stats),
+            "topFunctions": _top_functions(stats),
+        }
+        with open(base + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        os.replace(base + ".json.tmp", base + ".json")
+        _prune(self.profile_dir, PROFILE_KEEP)
+        logger.info("Profiled %s %s in %.0fms: %s.prof", summary["method"], summary["path"], duration * 1000, base)
+
+
+def install_profiler(app):
+    """
+    Wraps app.wsgi_app in ProfilingMiddleware if PROFILING_TOKEN is set;
+    otherwise does nothing. Returns the middleware or None.
+    """
+    token = os.getenv("PROFILING_TOKEN")
+    if not token:
+        return None
+    middleware = ProfilingMiddleware(app.wsgi_app, token)
+    app.wsgi_app = middleware
+    return middleware
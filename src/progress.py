@@ -0,0 +1,107 @@
+# src/progress.py
+# In-memory progress reporting for long-running uploads. The upload form sends
+# a client-generated `progressId`; the upload flow reports stages under that id
+# and the browser follows them over server-sent events (/progress/<id>).
+
+import json
+import threading
+import time
+
+# Forget jobs this long after their last update.
+JOB_TTL_SECONDS = 600
+KEEPALIVE_SECONDS = 15
+
+# Stages reported by the upload flows, in order.
+STAGES = ("saved", "cache_hit", "preprocessing", "model_call_started", "tokens", "partial",
+          "merged", "committed", "done", "error")
+
+
+class _Job:
+    __slots__ = ("events", "done", "updated")
+
+    def __init__(self):
+        self.events = []
+        self.done = False
+        self.updated = time.monotonic()
+
+
+class ProgressTracker:
+    """Thread-safe store of per-job event lists, with blocking and polling readers."""
+
+    def __init__(self, ttl=JOB_TTL_SECONDS):
+        self.ttl = ttl
+        self._jobs = {}
+        self._cond = threading.Condition()
+
+    def _job(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            now = time.monotonic()
+            for stale_id in [j for j, v in self._jobs.items() if now - v.updated > self.ttl]:
+                del self._jobs[stale_id]
+            job = self._jobs[job_id] = _Job()
+        return job
+
+    def report(self, job_id, stage, **data):
+        if not job_id:
+            return
+        with self._cond:
+            job = self._job(job_id)
+            if job.done:
+                return
+            job.events.append((stage, data))
+            job.updated = time.monotonic()
+            if stage in ("done", "error"):
+                job.done = True
+            self._cond.notify_all()
+
+    def poll(self, job_id, cursor):
+        """Returns (events after `cursor`, finished) without blocking."""
+        with self._cond:
+            job = self._job(job_id)
+            return job.events[cursor:], job.done
+
+    def wait(self, job_id, cursor, timeout):
+        """Like poll(), but blocks up to `timeout` seconds for new events."""
+        with self._cond:
+            job = self._job(job_id)
+            self._cond.wait_for(lambda: job.done or len(job.events) > cursor, timeout=timeout)
+            return job.events[cursor:], job.done
+
+
+tracker = ProgressTracker()
+
+
+def format_sse(stage, data):
+    return f"event: {stage}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_stream(job_id, max_seconds=JOB_TTL_SECONDS):
+    """Generator of server-sent-event text for a job, ending when it finishes."""
+    cursor = 0
+    deadline = time.monotonic() + max_seconds
+    yield "retry: 2000\n\n"
+    while time.monotonic() < deadline:
+        events, done = tracker.wait(job_id, cursor, timeout=KEEPALIVE_SECONDS)
+        cursor += len(events)
+        for stage, data in events:
+            yield format_sse(stage, data)
+        if done:
+            return
+        if not events:
+            yield ": keep-alive\n\n"
+
+
+# ---------- Helpers for request handlers ----------
+
+def request_job_id():
+    """The progressId sent with the current upload form, if any."""
+    from flask import g, request
+    if "progress_id" not in g:
+        g.progress_id = request.form.get("progressId") or request.args.get("progressId")
+    return g.progress_id
+
+
+def report_stage(stage, **data):
+    """Reports a stage for the current request's upload, if it has a progressId."""
+    tracker.report(request_job_id(), stage, **data)
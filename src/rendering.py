@@ -0,0 +1,50 @@
+# src/rendering.py
+# Template rendering helpers: an on-disk Jinja bytecode cache, so a new worker
+# loads compiled templates instead of re-parsing them, and fragment caching for
+# the large store-derived sections of the dashboard and event pages.
+
+import os
+from collections import OrderedDict
+
+from flask import render_template, request
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+from src.data_manager import store_cache
+
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join("data", "template_cache"))
+
+
+def configure_templates(app):
+    """Points the app's Jinja environment at the bytecode cache. Call before the first render."""
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    app.jinja_options = {**app.jinja_options,
+                         "bytecode_cache": FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)}
+    # True while src/export.py renders the static snapshot (editing controls are hidden).
+    app.jinja_env.globals["static_export"] = False
+
+
+def precompile_templates(app):
+    """Compiles every template into the bytecode cache; returns the template names."""
+    names = app.jinja_env.list_templates(extensions=["html"])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+# One fragment cache per tenant store, see data_manager.store_cache().
+_fragments = OrderedDict()
+
+
+def cached_fragment(template_name, key, build_context):
+    """
+    Renders `template_name` with the dict from build_context() and caches the
+    HTML per `key` until the active store changes. On a hit build_context
+    isn't called, so the fragment's data isn't recomputed either.
+    """
+    fragments = store_cache(_fragments)
+    # url_for() output depends on where the app is mounted.
+    cache_key = (template_name, key, request.script_root)
+    if cache_key not in fragments:
+        fragments[cache_key] = Markup(render_template(template_name, **build_context()))
+    return fragments[cache_key]
@@ -0,0 +1,118 @@
+# src/rollups.py
+# Per-(meet, topic) score rollups. The store keeps
+#   data["topicRollups"] = { meet_id: { topic label: [correct, attempted] } }
+# and data_manager's score mutators update it with the change in the touched
+# event's counts, so topic trends over the season are read from the rollups
+# instead of rescanning every participant.
+
+from collections import defaultdict
+
+
+def question_topic_ids(event, registry):
+    """Maps questionNumber -> tuple of interned topic ids for an event's examTopics."""
+    return {
+        item.questionNumber: tuple(dict.fromkeys(registry.intern(t) for t in item.topics))
+        for item in event.examTopics
+    }
+
+
+def tally_topics(correct, attempted, q2ids, correct_qs, incorrect_qs):
+    """Adds one set of correct/incorrect question numbers to per-topic-id counters."""
+    for cq in correct_qs:
+        for topic_id in q2ids.get(cq, ()):
+            correct[topic_id] += 1
+            attempted[topic_id] += 1
+    for iq in incorrect_qs:
+        for topic_id in q2ids.get(iq, ()):
+            attempted[topic_id] += 1
+
+
+def event_topic_counts(event, registry, team_events):
+    """
+    { topic label: [correct, attempted] } contributed by one event: the team's
+    question set for team events, every participant's for individual events.
+    """
+    if not event.examTopics:
+        return {}
+    q2ids = question_topic_ids(event, registry)
+    correct = defaultdict(int)
+    attempted = defaultdict(int)
+    if event.eventName in team_events:
+        tally_topics(correct, attempted, q2ids,
+                     event.teamCorrectQuestions or (),
+                     event.teamIncorrectQuestions or ())
+    else:
+        for participant in event.participants:
+            tally_topics(correct, attempted, q2ids,
+                         participant.correctQuestions,
+                         participant.incorrectQuestions)
+    return {registry.label(t): [correct[t], a] for t, a in attempted.items()}
+
+
+def apply_topic_delta(data, meet_id, before, after):
+    """Moves a meet's rollup from an event's `before` counts to its `after` counts."""
+    rollup = data.setdefault("topicRollups", {}).setdefault(meet_id, {})
+    for counts, sign in ((before, -1), (after, 1)):
+        for label, (c, a) in counts.items():
+            row = rollup.setdefault(label, [0, 0])
+            row[0] += sign * c
+            row[1] += sign * a
+    for label in [label for label, row in rollup.items() if row[1] <= 0]:
+        del rollup[label]
+
+
+def rebuild_topic_rollups(data, registry, team_events):
+    """Recomputes every meet's rollup from the raw scores (migration / repair)."""
+    data["topicRollups"] = {}
+    for meet in data["meets"]:
+        data["topicRollups"][meet.id] = {}
+        for event in meet.events:
+            apply_topic_delta(data, meet.id, {}, event_topic_counts(event, registry, team_events))
+
+
+def meets_in_date_order(data):
+    """Meets sorted by date; undated meets (from before dates existed) come first, in store order."""
+    return sorted(data["meets"], key=lambda meet: meet.date or "")
+
+
+def topic_trends(data, window=3, topics=None):
+    """
+    Per-topic accuracy per meet (in date order) and its attempt-weighted moving
+    average over the last `window` meets where the topic was tested:
+    {
+      "meets": [{"id", "title", "date"}, ...],
+      "topics": { label: {"correct": [...], "attempted": [...],
+                          "accuracy": [... or None], "movingAverage": [... or None]} }
+    }
+    Reads only the rollups and meet metadata.
+    """
+    meets = meets_in_date_order(data)
+    rollups = data.get("topicRollups", {})
+    labels = set()
+    for meet in meets:
+        labels.update(rollups.get(meet.id, {}))
+    if topics:
+        labels &= set(topics)
+
+    series = {}
+    for label in sorted(labels):
+        correct, attempted, accuracy, moving = [], [], [], []
+        recent = []
+        for meet in meets:
+            c, a = rollups.get(meet.id, {}).get(label, (0, 0))
+            correct.append(c)
+            attempted.append(a)
+            if a:
+                accuracy.append(c / a)
+                recent = (recent + [(c, a)])[-window:]
+                moving.append(sum(rc for rc, _ in recent) / sum(ra for _, ra in recent))
+            else:
+                accuracy.append(None)
+                moving.append(None)
+        series[label] = {"correct": correct, "attempted": attempted,
+                         "accuracy": accuracy, "movingAverage": moving}
+
+    return {
+        "meets": [{"id": m.id, "title": m.title, "date": m.date} for m in meets],
+        "topics": series,
+    }
@@ -0,0 +1,160 @@
+# src/roster.py
+# Bulk score entry: a whole event roster (name, grade, incorrect questions) is
+# parsed from JSON, CSV or JSONL, validated against the event's numQuestions
+# and turned into participant records that are committed with a single write.
+
+import csv
+import io
+import json
+import re
+
+from src.data_manager import get_event, set_participant_scores
+from src.students import normalize_name
+
+GRADE_LEVELS = ("freshman", "sophomore", "junior", "senior")
+
+# Column names accepted in roster CSV headers (lower-cased), per field.
+COLUMN_ALIASES = {
+    "studentName": ("studentname", "student name", "name", "student"),
+    "gradeLevel": ("gradelevel", "grade level", "grade"),
+    "incorrectList": ("incorrectlist", "incorrect list", "incorrect", "incorrectquestions", "missed"),
+}
+
+_SEPARATORS = re.compile(r"[,;\s]+")
+
+
+class RosterError(ValueError):
+    """A roster that can't be imported; `errors` lists one message per bad row."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def parse_incorrect_list(value, num_questions, strict=True):
+    """
+    Parses incorrect question numbers from "3,7 10" style text or a list of ints.
+    With strict=False, entries that aren't question numbers in 1..num_questions
+    are skipped (the single-student form's behavior); otherwise they raise ValueError.
+    """
+    if value is None:
+        items = []
+    elif isinstance(value, str):
+        items = [item for item in _SEPARATORS.split(value.strip()) if item]
+    elif isinstance(value, (list, tuple, set)):
+        items = list(value)
+    else:
+        items = [value]
+
+    incorrect = set()
+    for item in items:
+        text = str(item).strip()
+        if text.isdigit() and 1 <= int(text) <= num_questions:
+            incorrect.add(int(text))
+        elif strict:
+            raise ValueError(f"'{text}' is not a question number between 1 and {num_questions}")
+    return incorrect
+
+
+def split_scores(incorrect, num_questions):
+    """Returns (correct_qs, incorrect_qs): every question 1..num_questions not incorrect is correct."""
+    correct_qs = [q for q in range(1, num_questions + 1) if q not in incorrect]
+    return correct_qs, sorted(incorrect)
+
+
+def _normalize_row(row):
+    """Maps a CSV/JSON row's keys onto studentName/gradeLevel/incorrectList."""
+    lowered = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    normalized = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in (field.lower(),) + aliases:
+            if alias in lowered:
+                normalized[field] = lowered[alias]
+                break
+    return normalized
+
+
+def read_roster_csv(text):
+    """Roster rows from CSV text with a header row (studentName, gradeLevel, incorrectList)."""
+    return [_normalize_row(row) for row in csv.DictReader(io.StringIO(text))]
+
+
+def read_roster_jsonl(text):
+    """Roster rows from JSON Lines text, one participant object per line."""
+    return [_normalize_row(json.loads(line)) for line in text.splitlines() if line.strip()]
+
+
+def read_roster_json(payload):
+    """Roster rows from a JSON payload: a list of rows or {"participants": [...]}."""
+    rows = payload.get("participants", []) if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise RosterError(["Expected a list of participants."])
+    return [_normalize_row(row) if isinstance(row, dict) else {} for row in rows]
+
+
+def build_participants(rows, num_questions, is_team_event=False):
+    """
+    Validates roster rows and builds participant records.
+    Rows without a name are skipped (blank grid lines). Raises RosterError
+    listing every invalid row, so nothing is committed from a bad roster.
+    """
+    participants = []
+    errors = []
+    seen = set()
+    if not is_team_event and num_questions < 1:
+        raise RosterError(["No total # of questions set for this event. Upload exam or set numQuestions first!"])
+
+    for line_number, row in enumerate(rows, start=1):
+        student_name = str(row.get("studentName") or "").strip()
+        grade_level = str(row.get("gradeLevel") or "").strip().lower()
+        if not student_name:
+            continue
+        if grade_level not in GRADE_LEVELS:
+            errors.append(f"Row {line_number} ({student_name}): grade must be one of {', '.join(GRADE_LEVELS)}")
+            continue
+        # Names match like attach_students() matches them, so "Ann" and "ann " are one student.
+        key = (normalize_name(student_name), grade_level)
+        if key in seen:
+            errors.append(f"Row {line_number} ({student_name}): listed more than once")
+            continue
+        seen.add(key)
+
+        if is_team_event:
+            # Team events are scored once for the team; participants carry no questions.
+            correct_qs, incorrect_qs = [], []
+        else:
+            try:
+                incorrect = parse_incorrect_list(row.get("incorrectList"), num_questions)
+            except ValueError as e:
+                errors.append(f"Row {line_number} ({student_name}): {e}")
+                continue
+            correct_qs, incorrect_qs = split_scores(incorrect, num_questions)
+
+        participants.append({
+            "studentName": student_name,
+            "gradeLevel": grade_level,
+            "correctQuestions": correct_qs,
+            "incorrectQuestions": incorrect_qs
+        })
+
+    if errors:
+        raise RosterError(errors)
+    return participants
+
+
+def import_roster(meet_id, event_id, rows, is_team_event=False):
+    """
+    Validates roster rows against the event and commits them in one write.
+    Returns (added, replaced) participant counts; raises RosterError.
+    """
+    event = get_event(meet_id, event_id)
+    if not event:
+        raise RosterError(["Event not found."])
+    participants = build_participants(rows, event.numQuestions or 0, is_team_event)
+    if not participants:
+        raise RosterError(["No participants to import."])
+    counts = set_participant_scores(meet_id, event_id, participants)
+    if counts is None:
+        # get_event also finds archived meets, which can't be written to.
+        raise RosterError(["The event is archived (read-only) or no longer exists."])
+    return counts
@@ -0,0 +1,65 @@
+# src/seasons.py
+# Archiving finished seasons: a season's meets move out of the live store into
+# the compressed cold storage of src/archive.py, so the store that every
+# request parses (and every edit rewrites) only holds the current season.
+# Archived meets stay viewable, read-only; the dashboard, trends, student
+# pages and recommendations read their precomputed numbers from the index.
+
+import datetime
+import re
+from collections import Counter
+
+from src.archive import load_season, read_index, season_of, write_season
+from src.dashboard_logic import season_aggregates
+from src.data_manager import load_data, mutation, save_data
+from src.students import detach_event
+
+
+def live_seasons(data):
+    """{season: number of meets} for the live store's dated meets."""
+    return dict(sorted(Counter(season_of(m.date) for m in data["meets"] if m.date).items()))
+
+
+@mutation
+def archive_season(season):
+    """
+    Moves every live meet dated in `season` (e.g. "2023-24") to the archive,
+    merging with meets archived from that season earlier. Raises ValueError for
+    the current season or one with no live meets. Returns the number of meets moved.
+    """
+    if not re.fullmatch(r"\d{4}-\d{2}", season):
+        raise ValueError(f"Seasons are named like 2023-24, not '{season}'.")
+    if season >= season_of(datetime.date.today().isoformat()):
+        raise ValueError(f"Season {season} isn't finished yet.")
+    data = load_data()
+    meets = [m for m in data["meets"] if m.date and season_of(m.date) == season]
+    if not meets:
+        raise ValueError(f"No live meets in season {season}.")
+    moved = {m.id for m in meets}
+    season_meets = [m for m in load_season(season) if m.id not in moved] + meets
+    season_meets.sort(key=lambda m: m.date or "")
+
+    # Meets archived earlier keep the rollups recorded for them then.
+    rollups = dict(read_index()["seasons"].get(season, {}).get("topicRollups", {}))
+    uploads = set()
+    for meet in season_meets:
+        uploads.update(meet.topicListUploads)
+        for event in meet.events:
+            uploads.update(event.examImagePaths)
+            uploads.update(event.scoreImagePaths)
+        if meet.id in moved:
+            rollups[meet.id] = data["topicRollups"].get(meet.id, {})
+    write_season(season, season_meets, {
+        "topicRollups": rollups,
+        "uploads": sorted(uploads),
+        "aggregates": season_aggregates(data, season_meets),
+    })
+
+    # The archive is complete; now drop the season from the live store.
+    for meet in meets:
+        for event in meet.events:
+            detach_event(data, meet.id, event)
+        data["topicRollups"].pop(meet.id, None)
+    data["meets"] = [m for m in data["meets"] if m.id not in moved]
+    save_data(data)
+    return len(meets)
@@ -0,0 +1,183 @@
+# src/serialization.py
+# Store file formats. save_data() writes the format named by STORE_FORMAT and
+# load_data() detects the format of the file it finds, so switching formats
+# only takes one save (any edit):
+#   json    compact JSON (the default)
+#   pretty  indented JSON, the original layout, for reading the file by hand
+#   binary  a length-prefixed snapshot: magic, a JSON header with everything
+#           but the meets plus an index of (meet id, offset, length), then one
+#           JSON record per meet. The file is memory-mapped and each meet is
+#           decoded the first time it's used; re-saving copies the records of
+#           meets that were never decoded without re-encoding them.
+# JSON is encoded and parsed with orjson when it's installed, else the stdlib.
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import MutableSequence
+
+from src.models import Meet
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+STORE_FORMAT = os.getenv("STORE_FORMAT", "json")
+FORMATS = ("json", "pretty", "binary")
+BINARY_MAGIC = b"MTSTORE\x01"
+_LENGTH = struct.Struct("<I")
+# What a malformed record raises while it's decoded into models.
+_DECODE_ERRORS = (ValueError, KeyError, TypeError, AttributeError, IndexError, struct.error)
+
+
+class StoreError(Exception):
+    """The store file exists but can't be decoded (or one of its meet records can't)."""
+
+
+def dumps(value, pretty=False):
+    """JSON-encodes value to UTF-8 bytes (compact unless pretty)."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(value, indent=2).encode("utf-8")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(buffer):
+    """Parses JSON from bytes; raises ValueError on malformed input."""
+    if orjson is not None:
+        return orjson.loads(buffer)
+    return json.loads(buffer)
+
+
+class LazyMeets(MutableSequence):
+    """
+    The meets of a binary snapshot as a list of models.Meet, each decoded from
+    the mapped file on first access. Supports the list operations the store
+    code uses (iteration, indexing, append, pop, del).
+    """
+
+    def __init__(self, buffer, base, entries, path=None):
+        self._buffer = buffer
+        self._base = base
+        self._path = path
+        # Per meet: [meet id, offset, length] of its record in the file (None for meets added since).
+        self._records = [list(entry) for entry in entries]
+        self._meets = [None] * len(self._records)
+
+    def _decode(self, i):
+        meet = self._meets[i]
+        if meet is None:
+            meet_id, offset, length = self._records[i]
+            start = self._base + offset
+            try:
+                meet = Meet.from_dict(loads(self._buffer[start:start + length]))
+            except _DECODE_ERRORS as e:
+                # Decoded on first use, deep inside a request: fail like a store that doesn't load.
+                raise StoreError(f"Meet {meet_id} in the store {self._path} could not be decoded: {e!r}") from e
+            self._meets[i] = meet
+        return meet
+
+    def __len__(self):
+        return len(self._meets)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._decode(j) for j in range(len(self))[i]]
+        return self._decode(range(len(self))[i])
+
+    def __setitem__(self, i, meet):
+        if isinstance(i, slice):
+            raise TypeError("LazyMeets doesn't support slice assignment")
+        self._meets[i] = meet
+        self._records[i] = None
+
+    def __delitem__(self, i):
+        del self._meets[i]
+        del self._records[i]
+
+    def insert(self, i, meet):
+        self._meets.insert(i, meet)
+        self._records.insert(i, None)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def ids(self):
+        """Meet ids in order, without decoding any meet."""
+        return [record[0] if record else meet.id for record, meet in zip(self._records, self._meets)]
+
+    def encoded(self):
+        """Yields (meet id, JSON record) per meet, reusing the mapped bytes of meets never decoded."""
+        for record, meet in zip(self._records, self._meets):
+            if meet is None:
+                meet_id, offset, length = record
+                start = self._base + offset
+                yield meet_id, self._buffer[start:start + length]
+            else:
+                yield meet.id, dumps(meet.to_dict())
+
+
+def _encode_binary(data):
+    meets = data["meets"]
+    records = meets.encoded() if isinstance(meets, LazyMeets) else ((m.id, dumps(m.to_dict())) for m in meets)
+    index = []
+    chunks = []
+    offset = 0
+    for meet_id, record in records:
+        index.append([meet_id, offset, len(record)])
+        chunks.append(record)
+        offset += len(record)
+    header = dumps({"store": {k: v for k, v in data.items() if k != "meets"}, "meetIndex": index})
+    return b"".join([BINARY_MAGIC, _LENGTH.pack(len(header)), header, *chunks])
+
+
+def encode_store(data, store_format=None):
+    """The store (meets as models.Meet) serialized in `store_format` (default STORE_FORMAT)."""
+    store_format = store_format or STORE_FORMAT
+    if store_format == "binary":
+        return _encode_binary(data)
+    if store_format not in FORMATS:
+        raise ValueError(f"Unknown store format '{store_format}' (expected one of {', '.join(FORMATS)})")
+    meets = data["meets"]
+    if isinstance(meets, LazyMeets):
+        meets = list(meets)
+    return dumps(dict(data, meets=[m.to_dict() for m in meets]), pretty=store_format == "pretty")
+
+
+def detect_format(head):
+    """"binary" or "json" from a file's first bytes (pretty and compact JSON read the same)."""
+    return "binary" if head.startswith(BINARY_MAGIC) else "json"
+
+
+def read_store_file(path):
+    """
+    Reads a store file in any format. Returns the store dict with "meets" as
+    models.Meet objects (a LazyMeets over the mapped file for binary
+    snapshots). Raises StoreError if the file is malformed; a binary
+    snapshot's meet records raise it when they're first used.
+    """
+    with open(path, "rb") as f:
+        if detect_format(f.read(len(BINARY_MAGIC))) == "json":
+            f.seek(0)
+            try:
+                data = loads(f.read())
+                data["meets"] = [Meet.from_dict(meet) for meet in data.get("meets", [])]
+            except _DECODE_ERRORS as e:
+                raise StoreError(f"The store {path} could not be decoded: {e!r}") from e
+            return data
+        # The mapping stays valid after the file is replaced by a later save.
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    start = len(BINARY_MAGIC) + _LENGTH.size
+    try:
+        (header_length,) = _LENGTH.unpack_from(buffer, len(BINARY_MAGIC))
+        header = loads(buffer[start:start + header_length])
+        data = header["store"]
+        index = [(meet_id, int(offset), int(length)) for meet_id, offset, length in header["meetIndex"]]
+    except _DECODE_ERRORS as e:
+        raise StoreError(f"The store {path} could not be decoded (truncated or malformed snapshot): {e!r}") from e
+    data["meets"] = LazyMeets(buffer, start + header_length, index, path)
+    return data
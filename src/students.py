@@ -0,0 +1,128 @@
+# src/students.py
+# Student registry. Every participant record carries the stable `studentId`
+# of a registered student, and the store keeps an index of where each student
+# competed, so per-student history is a lookup instead of a scan of every event.
+#
+# Store layout:
+#   data["students"]     = { student_id: {"id", "studentName", "gradeLevel", "grades"} }
+#   data["studentIndex"] = { student_id: [[meet_id, event_id], ...] }
+#
+# A student's "gradeLevel" is the latest grade seen; participant records keep
+# the grade they competed in. The functions here only edit the loaded `data`
+# (registry dicts and models.Participant records); data_manager's mutators
+# call them and save.
+
+import uuid
+from collections import defaultdict
+
+GRADE_ORDER = {"freshman": 0, "sophomore": 1, "junior": 2, "senior": 3}
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive form of a student name, used for matching."""
+    return " ".join(str(name).split()).casefold()
+
+
+def _registry(data):
+    return data.setdefault("students", {}), data.setdefault("studentIndex", {})
+
+
+def index_add(data, student_id, meet_id, event_id):
+    _, index = _registry(data)
+    entries = index.setdefault(student_id, [])
+    if [meet_id, event_id] not in entries:
+        entries.append([meet_id, event_id])
+
+
+def index_remove(data, student_id, meet_id, event_id):
+    _, index = _registry(data)
+    entries = index.get(student_id, [])
+    if [meet_id, event_id] in entries:
+        entries.remove([meet_id, event_id])
+
+
+def _in_meet(index, student_id, meet_id):
+    return any(entry[0] == meet_id for entry in index.get(student_id, []))
+
+
+def attach_students(data, meet_id, event_id, participants):
+    """
+    Sets `studentId` on each participant record, registering new students as
+    needed, and adds the event to their index entries.
+
+    A name/grade pair already registered is reused. A known name with a new
+    grade is the same student in a later season (the registry grade is moved
+    forward), unless that student already competed in this meet under another
+    grade, in which case it's a different student with the same name.
+    """
+    students, index = _registry(data)
+    by_name = defaultdict(list)
+    for student in students.values():
+        by_name[normalize_name(student["studentName"])].append(student)
+
+    for participant in participants:
+        name = participant.studentName
+        grade = participant.gradeLevel
+        candidates = by_name[normalize_name(name)]
+
+        student = next((s for s in candidates if grade in s["grades"]), None)
+        if student is None:
+            student = next((s for s in candidates if not _in_meet(index, s["id"], meet_id)), None)
+        if student is None:
+            student = {"id": str(uuid.uuid4()), "studentName": name, "gradeLevel": grade, "grades": []}
+            students[student["id"]] = student
+            candidates.append(student)
+        if grade not in student["grades"]:
+            student["grades"].append(grade)
+            if GRADE_ORDER.get(grade, -1) >= GRADE_ORDER.get(student["gradeLevel"], -1):
+                student["gradeLevel"] = grade
+
+        participant.studentId = student["id"]
+        index_add(data, student["id"], meet_id, event_id)
+
+
+def detach_event(data, meet_id, event):
+    """Removes an event's participants from the index (the event is being deleted)."""
+    for participant in event.participants:
+        if participant.studentId:
+            index_remove(data, participant.studentId, meet_id, event.id)
+
+
+def migrate_students(data):
+    """
+    Registers the students of a store written before the registry existed,
+    merging name/grade pairs that are the same student (see attach_students).
+    Meets are taken in store order, i.e. the order they were created.
+    Returns True if the store was changed.
+    """
+    if "students" in data and "studentIndex" in data:
+        return False
+    data["students"] = {}
+    data["studentIndex"] = {}
+    for meet in data["meets"]:
+        for event in meet.events:
+            for participant in event.participants:
+                participant.studentId = None
+            attach_students(data, meet.id, event.id, event.participants)
+    return True
+
+
+def student_events(data, student_id):
+    """Yields (meet, event, participant) for every event the student competed in."""
+    _, index = _registry(data)
+    entries = index.get(student_id, [])
+    if not entries:
+        return
+    wanted = {meet_id for meet_id, _ in entries}
+    events = {
+        (meet.id, event.id): (meet, event)
+        for meet in data["meets"] if meet.id in wanted
+        for event in meet.events
+    }
+    for meet_id, event_id in entries:
+        if (meet_id, event_id) not in events:
+            continue
+        meet, event = events[(meet_id, event_id)]
+        participant = event.find_participant(student_id)
+        if participant is not None:
+            yield meet, event, participant
@@ -0,0 +1,119 @@
+# src/tenants.py
+# Several teams on one deployment. Each tenant (team) has its own store and
+# uploads folder under TENANTS_ROOT/<tenant>/; requests pick one with a URL
+# prefix, /t/<tenant>/..., which is moved into SCRIPT_NAME so every url_for()
+# link stays inside the tenant. Without a prefix (or outside a request) the
+# single-team layout is used: data/store.json and uploads/.
+#
+# The current tenant is a context variable, so it follows a request onto the
+# threads and tasks the flows and the ASGI server run it on.
+
+import contextlib
+import contextvars
+import json
+import os
+import re
+
+TENANTS_ROOT = os.getenv("TENANTS_ROOT", os.path.join("data", "tenants"))
+DEFAULT_STORE_PATH = os.path.join("data", "store.json")
+DEFAULT_UPLOAD_ROOT = os.path.join(os.getcwd(), "uploads")
+
+# WSGI environ key the tenant prefix is recorded under.
+TENANT_ENVIRON_KEY = "mathteam.tenant"
+TENANT_ID_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+_PREFIX = re.compile(r"/t/([^/]+)(?=/|$)")
+
+_current_tenant = contextvars.ContextVar("tenant", default=None)
+
+
+def current_tenant():
+    """The active tenant id, or None for the single-team layout."""
+    return _current_tenant.get()
+
+
+def tenant_dir(tenant_id):
+    return os.path.join(TENANTS_ROOT, tenant_id)
+
+
+def tenant_exists(tenant_id):
+    return bool(tenant_id and TENANT_ID_PATTERN.fullmatch(tenant_id)) and os.path.isdir(tenant_dir(tenant_id))
+
+
+def store_file_path():
+    """Path of the active tenant's store."""
+    tenant_id = current_tenant()
+    return DEFAULT_STORE_PATH if tenant_id is None else os.path.join(tenant_dir(tenant_id), "store.json")
+
+
+def upload_root():
+    """Absolute path of the active tenant's uploads folder."""
+    tenant_id = current_tenant()
+    if tenant_id is None:
+        return DEFAULT_UPLOAD_ROOT
+    return os.path.abspath(os.path.join(tenant_dir(tenant_id), "uploads"))
+
+
+def activate(tenant_id):
+    """Makes tenant_id current in this context; returns the token for deactivate()."""
+    return _current_tenant.set(tenant_id)
+
+
+def deactivate(token):
+    _current_tenant.reset(token)
+
+
+@contextlib.contextmanager
+def tenant_context(tenant_id):
+    """Runs the block against tenant_id's store and uploads (None: the single-team layout)."""
+    if tenant_id is not None and not tenant_exists(tenant_id):
+        raise KeyError(f"Unknown tenant '{tenant_id}'")
+    token = activate(tenant_id)
+    try:
+        yield
+    finally:
+        deactivate(token)
+
+
+def create_tenant(tenant_id):
+    """Creates a tenant's folder with an empty store. Raises ValueError for a bad or taken id."""
+    if not TENANT_ID_PATTERN.fullmatch(tenant_id or ""):
+        raise ValueError("Tenant ids are lower-case letters, digits, '-' and '_' (at most 64).")
+    if os.path.exists(tenant_dir(tenant_id)):
+        raise ValueError(f"Tenant '{tenant_id}' already exists.")
+    os.makedirs(os.path.join(tenant_dir(tenant_id), "uploads"))
+    with open(os.path.join(tenant_dir(tenant_id), "store.json"), "w", encoding="utf-8") as f:
+        json.dump({"meets": []}, f)
+
+
+def list_tenants():
+    if not os.path.isdir(TENANTS_ROOT):
+        return []
+    return sorted(name for name in os.listdir(TENANTS_ROOT) if tenant_exists(name))
+
+
+def split_tenant_prefix(environ):
+    """
+    Moves a leading /t/<tenant> from PATH_INFO to SCRIPT_NAME and records the
+    tenant under TENANT_ENVIRON_KEY. Returns the tenant id (None if no prefix).
+    Does nothing if the environ was already split.
+    """
+    if TENANT_ENVIRON_KEY in environ:
+        return environ[TENANT_ENVIRON_KEY]
+    match = _PREFIX.match(environ.get("PATH_INFO", ""))
+    if not match:
+        return None
+    environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + match.group(0)
+    environ["PATH_INFO"] = environ["PATH_INFO"][match.end():] or "/"
+    environ[TENANT_ENVIRON_KEY] = match.group(1)
+    return match.group(1)
+
+
+class TenantMiddleware:
+    """WSGI middleware applying split_tenant_prefix() before the Flask app routes the request."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        split_tenant_prefix(environ)
+        return self.wsgi_app(environ, start_response)
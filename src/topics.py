@@ -0,0 +1,238 @@
+# src/topics.py
+# Helpers for working with topic lists ({course: [topic, ...]}) and the
+# canonical "Course - topic" labels used throughout the analytics.
+
+import re
+import threading
+
+COURSES = ["Algebra", "Geometry", "Algebra II", "Precalculus"]
+TOPIC_SEPARATOR = " - "
+
+# Events scored once for the whole team rather than per student.
+TEAM_EVENTS = {
+    "Frosh-Soph 2-Person",
+    "Jr-Sr 2-Person",
+    "Frosh-Soph 8-person",
+    "Jr-Sr 8-person",
+    "Calculator Team"
+}
+
+
+def get_event_courses(event_name):
+    """
+    Return a list of courses for the given event name.
+    For example:
+      "Individual Algebra" -> ["Algebra"]
+      "Frosh-Soph 2-Person" -> ["Algebra", "Geometry"]
+      ...
+    """
+    # You can expand or rename these as you like
+    if "Algebra" in event_name and "II" not in event_name:
+        return ["Algebra"]
+    if "Geometry" in event_name:
+        return ["Geometry"]
+    if "Algebra II" in event_name:
+        return ["Algebra II"]
+    if "Precalculus" in event_name:
+        return ["Precalculus"]
+    if "Frosh-Soph" in event_name:
+        return ["Algebra", "Geometry"]
+    if "Jr-Sr" in event_name:
+        return ["Algebra II", "Precalculus"]
+    if "Calculator" in event_name:
+        return ["Algebra", "Geometry", "Algebra II", "Precalculus"]
+    # fallback
+    return []
+
+
+def topic_label(course, topic):
+    """Canonical label for a topic, e.g. "Algebra - expressions"."""
+    return f"{course}{TOPIC_SEPARATOR}{topic.strip()}"
+
+
+def ordered_courses(topic_list):
+    """The known courses in their usual order, followed by any others alphabetically."""
+    known = [c for c in COURSES if c in topic_list]
+    extra = sorted(c for c in topic_list if c not in COURSES)
+    return known + extra
+
+
+def build_topic_vocabulary(topic_list, courses=None):
+    """
+    Assigns stable integer ids to every topic in a topic list.
+
+    Ids are positions in the full list (courses in ordered_courses() order,
+    topics in list order), so filtering by `courses` does not renumber them.
+    Returns an ordered dict: { id: "Course - topic" }.
+    """
+    vocabulary = {}
+    next_id = 0
+    for course in ordered_courses(topic_list):
+        for topic in topic_list.get(course) or []:
+            if courses is None or course in courses:
+                vocabulary[next_id] = topic_label(course, topic)
+            next_id += 1
+    return vocabulary
+
+
+def format_vocabulary_for_prompt(vocabulary):
+    """
+    Renders a vocabulary as a compact numbered list grouped by course, so the
+    course prefix is written once per course instead of once per topic:
+
+        [Algebra]
+        0 expressions
+        1 factoring polynomials
+    """
+    lines = []
+    current_course = None
+    for topic_id, label in vocabulary.items():
+        course, _, topic = label.partition(TOPIC_SEPARATOR)
+        if course != current_course:
+            lines.append(f"[{course}]")
+            current_course = course
+        lines.append(f"{topic_id} {topic}")
+    return "\n".join(lines)
+
+
+# ---------- Topic registry ----------
+
+_WHITESPACE = re.compile(r"\s+")
+# Dice similarity a fuzzy match needs before GPT output is snapped onto an existing topic.
+FUZZY_MATCH_THRESHOLD = 0.7
+
+
+def _normalize_text(text):
+    return _WHITESPACE.sub(" ", text).strip().strip(".;,").strip().casefold()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TopicRegistry:
+    """
+    Interns topic labels to small integer ids.
+
+    Labels are matched on a normalized key (case, whitespace and separator
+    spacing ignored), so "Geometry - similarity" and "Geometry - Similarity "
+    share one id and the first spelling seen is the canonical label.
+    snap() additionally fuzzy-matches unseen GPT output onto a canonical topic
+    through a trigram index.
+    """
+
+    def __init__(self):
+        self.labels = []            # id -> canonical label
+        self._ids_by_key = {}       # normalized key -> id
+        self._course_of = []        # id -> normalized course ("" if unknown)
+        self._courses = {c.casefold(): c for c in COURSES}
+        self._trigram_index = {}    # trigram -> [ids]
+        self._trigram_counts = []   # id -> number of trigrams in its topic key
+        self._indexed_upto = 0      # ids below this are in the trigram index
+        # data_manager shares one registry per store between requests.
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _split(self, label):
+        """Returns (normalized course, normalized topic, display course, display topic)."""
+        course, sep, topic = label.partition("-")
+        course_key = _normalize_text(course)
+        if sep and course_key in self._courses:
+            return course_key, _normalize_text(topic), self._courses[course_key], topic.strip()
+        return "", _normalize_text(label), "", label.strip()
+
+    def add_topic_list(self, topic_list):
+        for course in ordered_courses(topic_list):
+            self._courses.setdefault(_normalize_text(course), course)
+            for topic in topic_list.get(course) or []:
+                self.intern(topic_label(course, topic))
+
+    def intern(self, label):
+        """Returns the id for a label, registering it as canonical if it is new."""
+        course_key, topic_key, course, topic = self._split(label)
+        key = f"{course_key}{TOPIC_SEPARATOR}{topic_key}"
+        topic_id = self._ids_by_key.get(key)
+        if topic_id is None:
+            with self._lock:
+                topic_id = self._ids_by_key.get(key)
+                if topic_id is None:
+                    topic_id = len(self.labels)
+                    self.labels.append(topic_label(course, topic) if course else topic)
+                    self._course_of.append(course_key)
+                    self._ids_by_key[key] = topic_id
+        return topic_id
+
+    def label(self, topic_id):
+        return self.labels[topic_id]
+
+    def _ensure_trigram_index(self):
+        if self._indexed_upto == len(self.labels):
+            return
+        with self._lock:
+            for topic_id in range(self._indexed_upto, len(self.labels)):
+                _, topic_key, _, _ = self._split(self.labels[topic_id])
+                trigrams = _trigrams(topic_key)
+                # The count goes in first: snap_id() reads the index without the lock.
+                self._trigram_counts.append(len(trigrams))
+                for trigram in trigrams:
+                    self._trigram_index.setdefault(trigram, []).append(topic_id)
+            self._indexed_upto = len(self.labels)
+
+    def snap_id(self, raw, courses=None):
+        """
+        Maps a raw topic string (e.g. from GPT) to the id of the nearest
+        canonical topic, restricted to `courses` when the string has no course
+        prefix. Strings with no close match are interned as new topics.
+        """
+        course_key, topic_key, course, topic = self._split(raw)
+        allowed = {course_key} if course_key else {c.casefold() for c in courses or []}
+
+        for candidate in sorted(allowed):
+            topic_id = self._ids_by_key.get(f"{candidate}{TOPIC_SEPARATOR}{topic_key}")
+            if topic_id is not None:
+                return topic_id
+
+        self._ensure_trigram_index()
+        query = _trigrams(topic_key)
+        shared = {}
+        for trigram in query:
+            for topic_id in self._trigram_index.get(trigram, ()):
+                if not allowed or self._course_of[topic_id] in allowed:
+                    shared[topic_id] = shared.get(topic_id, 0) + 1
+        best_id, best_score = None, 0.0
+        for topic_id, count in shared.items():
+            score = 2.0 * count / (len(query) + self._trigram_counts[topic_id])
+            if score > best_score:
+                best_id, best_score = topic_id, score
+        if best_id is not None and best_score >= FUZZY_MATCH_THRESHOLD:
+            return best_id
+
+        if not course and courses and len(courses) == 1:
+            return self.intern(topic_label(courses[0], topic))
+        return self.intern(topic_label(course, topic) if course else topic)
+
+    def snap(self, raw, courses=None):
+        return self.labels[self.snap_id(raw, courses)]
+
+    def snap_exam_topics(self, exam_topics, courses=None):
+        """Snaps every topic in an examTopics list, dropping duplicates within a question."""
+        snapped = []
+        for question in exam_topics:
+            labels = []
+            for raw in question.get("topics", []):
+                label = self.snap(raw, courses)
+                if label not in labels:
+                    labels.append(label)
+            snapped.append({**question, "topics": labels})
+        return snapped
+
+
+def build_topic_registry(topic_lists):
+    """Builds a registry from topic lists, in order (the default list first keeps ids stable)."""
+    registry = TopicRegistry()
+    for topic_list in topic_lists:
+        registry.add_topic_list(topic_list or {})
+    return registry
@@ -0,0 +1,196 @@
+# src/upload_store.py
+# Content-addressed storage for uploaded images. Files are stored under
+# uploads/<category>/<aa>/<sha256><ext>, so the same scan uploaded twice is kept
+# (and parsed) once. Paths handed to the rest of the app stay relative to uploads/.
+# Each tenant has its own uploads folder (see src/tenants.py); upload_root() is
+# the active one.
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from werkzeug.utils import secure_filename
+
+from src.archive import archived_upload_paths
+from src.tenants import upload_root
+
+PARSE_CACHE_DIR = ".parse_cache"
+# Resumable uploads still being sent (src/chunked_uploads.py expires these itself).
+PARTIAL_DIR = ".partial"
+# Thumbnails and previews (src/previews.py), named <source sha256>.jpg.
+PREVIEW_CACHE_DIR = ".previews"
+CHUNK_SIZE = 64 * 1024
+# Files younger than this are never garbage collected: they may belong to an
+# upload whose paths have not been recorded in the store yet.
+GC_MIN_AGE_SECONDS = 3600
+
+_EXTENSION_ALIASES = {".jpeg": ".jpg"}
+
+
+def upload_path(relative_path):
+    """Absolute path of a stored upload."""
+    return os.path.join(upload_root(), relative_path)
+
+
+def content_hash_of(relative_path):
+    """The sha256 a content-addressed path was stored under (None for legacy uuid paths)."""
+    stem = os.path.splitext(os.path.basename(relative_path))[0]
+    if len(stem) == 64 and all(c in "0123456789abcdef" for c in stem):
+        return stem
+    return None
+
+
+def _extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    return _EXTENSION_ALIASES.get(ext, ext)
+
+
+def save_stream(stream, filename, category):
+    """
+    Copies a binary stream into the store, hashing it as it is written.
+    Returns (relative_path, is_duplicate); a duplicate is not re-written, the
+    existing file is reused instead.
+    """
+    root = upload_root()
+    os.makedirs(os.path.join(root, category), exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.join(root, category), prefix=".incoming-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+        return store_file(tmp_path, digest.hexdigest(), filename, category)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def store_file(path, sha, filename, category):
+    """
+    Moves a fully written file whose sha256 is already known into the store
+    (it must be on the same filesystem as uploads/). Returns (relative_path,
+    is_duplicate) like save_stream(); a duplicate's file is deleted.
+    """
+    relative_path = os.path.join(category, sha[:2], sha + _extension(filename))
+    full_path = upload_path(relative_path)
+    if os.path.exists(full_path):
+        os.remove(path)
+        return relative_path, True
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    os.replace(path, full_path)
+    return relative_path, False
+
+
+def save_upload(file_storage, category):
+    """save_stream() for a werkzeug FileStorage from request.files."""
+    return save_stream(file_storage.stream, file_storage.filename, category)
+
+
+# ---------- Parse cache ----------
+
+def _parse_cache_file(kind, relative_paths, context):
+    hashes = [content_hash_of(p) for p in relative_paths]
+    if not hashes or None in hashes:
+        return None, hashes
+    key_source = json.dumps([kind, sorted(hashes), context], sort_keys=True, default=str)
+    key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+    return os.path.join(upload_root(), PARSE_CACHE_DIR, kind, key + ".json"), hashes
+
+
+def lookup_cached_parse(kind, relative_paths, context):
+    """The cached result of a previous parse of the same inputs, or None."""
+    cache_file, _ = _parse_cache_file(kind, relative_paths, context)
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, "r", encoding="utf-8") as f:
+            try:
+                return json.load(f)["result"]
+            except (json.JSONDecodeError, KeyError):
+                pass
+    return None
+
+
+def store_cached_parse(kind, relative_paths, context, result):
+    cache_file, hashes = _parse_cache_file(kind, relative_paths, context)
+    if cache_file:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_path = cache_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"inputs": hashes, "result": result}, f)
+        os.replace(tmp_path, cache_file)
+
+
+def cached_parse(kind, relative_paths, context, parse):
+    """
+    Returns the cached result of a previous parse of the same file contents
+    (with the same `context`, e.g. the topic vocabulary), or calls `parse()`
+    and caches its result. Failed parses raise and are not cached.
+    """
+    result = lookup_cached_parse(kind, relative_paths, context)
+    if result is None:
+        result = parse()
+        store_cached_parse(kind, relative_paths, context, result)
+    return result
+
+
+# ---------- Garbage collection ----------
+
+def referenced_upload_paths(data):
+    """Every upload path recorded on a meet or event in the store or its season archive."""
+    referenced = archived_upload_paths()
+    for meet in data["meets"]:
+        referenced.update(meet.topicListUploads)
+        for event in meet.events:
+            referenced.update(event.examImagePaths)
+            referenced.update(event.scoreImagePaths)
+    return {os.path.normpath(p) for p in referenced}
+
+
+def collect_garbage(data, dry_run=False, min_age=GC_MIN_AGE_SECONDS):
+    """
+    Deletes upload files that no meet or event references, plus parse cache
+    entries and previews whose inputs are gone. Returns the removed paths
+    (relative to uploads/).
+    """
+    referenced = referenced_upload_paths(data)
+    live_hashes = {content_hash_of(p) for p in referenced} - {None}
+    cutoff = time.time() - min_age
+    removed = []
+    root = upload_root()
+
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        relative_dir = os.path.relpath(dirpath, root)
+        top_dir = relative_dir.split(os.sep)[0]
+        if top_dir == PARTIAL_DIR:
+            continue
+        in_cache = top_dir == PARSE_CACHE_DIR
+        for name in filenames:
+            full_path = os.path.join(dirpath, name)
+            relative_path = os.path.normpath(os.path.join(relative_dir, name))
+            if os.path.getmtime(full_path) > cutoff:
+                continue
+            if in_cache:
+                try:
+                    with open(full_path, "r", encoding="utf-8") as f:
+                        inputs = json.load(f).get("inputs", [])
+                except (OSError, json.JSONDecodeError):
+                    inputs = [None]
+                if all(h in live_hashes for h in inputs):
+                    continue
+            elif top_dir == PREVIEW_CACHE_DIR:
+                if os.path.splitext(name)[0] in live_hashes:
+                    continue
+            elif relative_path in referenced:
+                continue
+            removed.append(relative_path)
+            if not dry_run:
+                os.remove(full_path)
+        if not dry_run and dirpath != root and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return removed
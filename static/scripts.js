@@ -0,0 +1,250 @@
+// static/scripts.js
+// Upload progress: forms marked with data-progress get a random progressId
+// field, show the loading overlay on submit and follow the upload's stages
+// over server-sent events (/progress/<id>) until the redirect comes back.
+//
+// Resumable uploads: before such a form is submitted, its files are sent to
+// /uploads in chunks (a few at a time, each retried on its own; see
+// src/chunked_uploads.py), and the form carries the upload ids instead of the
+// files. If the connection drops, submitting the form again with the same
+// files sends only the chunks the server doesn't have yet.
+
+const PROGRESS_LABELS = {
+  saved: "Files saved",
+  cache_hit: "Already parsed, reusing the earlier result",
+  scored_locally: "Scored from the printed sheet",
+  preprocessing: "Preparing images",
+  model_call_started: "Waiting for GPT",
+  tokens: "GPT is writing",
+  partial: "Receiving results",
+  merged: "Merging results",
+  committed: "Saved",
+  done: "Done",
+  error: "Error"
+};
+
+function newProgressId() {
+  if (window.crypto && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+function setProgressText(text, detail) {
+  const status = document.getElementById("loading-status");
+  const details = document.getElementById("loading-detail");
+  if (status) status.textContent = text;
+  if (details) details.textContent = detail || "";
+}
+
+function describePartial(result) {
+  // Exam parses stream back question -> topics entries.
+  if (!Array.isArray(result) || result.length === 0) return "";
+  const last = result[result.length - 1];
+  const topics = (last.topics || []).join(", ");
+  return `${result.length} question(s) so far. Q${last.questionNumber}: ${topics}`;
+}
+
+function followProgress(progressId) {
+  if (!window.EventSource) return;
+  const source = new EventSource(`/progress/${encodeURIComponent(progressId)}`);
+  Object.keys(PROGRESS_LABELS).forEach(stage => {
+    source.addEventListener(stage, event => {
+      const data = JSON.parse(event.data || "{}");
+      let detail = "";
+      if (stage === "tokens") detail = `${data.chars} characters received`;
+      if (stage === "partial") detail = describePartial(data.result);
+      if (stage === "error") detail = data.message || "";
+      setProgressText(PROGRESS_LABELS[stage], detail);
+      if (stage === "done" || stage === "error") source.close();
+    });
+  });
+}
+
+const UPLOADS_URL = (document.currentScript && document.currentScript.dataset.uploadsUrl) || "/uploads";
+const UPLOAD_PARALLEL_CHUNKS = 3;
+const UPLOAD_CHUNK_ATTEMPTS = 5;
+
+const CRC32_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+function crc32Hex(bytes) {
+  let crc = 0xffffffff;
+  for (let i = 0; i < bytes.length; i++) crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+  return ((crc ^ 0xffffffff) >>> 0).toString(16).padStart(8, "0");
+}
+
+function supportsResumableUploads() {
+  return Boolean(window.fetch && window.Blob && Blob.prototype.slice && Blob.prototype.arrayBuffer);
+}
+
+async function uploadRequest(url, options) {
+  const response = await fetch(url, options);
+  const body = await response.json().catch(() => ({}));
+  if (!response.ok) {
+    const error = new Error(body.message || `HTTP ${response.status}`);
+    error.status = response.status;
+    throw error;
+  }
+  return body;
+}
+
+function rememberedUploadKey(file) {
+  return `upload:${UPLOADS_URL}:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+function remembered(key, value) {
+  // localStorage can be unavailable (private browsing); resuming is then limited to this page.
+  try {
+    if (value === undefined) return localStorage.getItem(key);
+    if (value === null) localStorage.removeItem(key);
+    else localStorage.setItem(key, value);
+  } catch (e) {}
+  return null;
+}
+
+async function openUpload(file) {
+  // Resume an earlier upload of the same file if the server still has it.
+  const key = rememberedUploadKey(file);
+  const uploadId = remembered(key);
+  if (uploadId) {
+    try {
+      return await uploadRequest(`${UPLOADS_URL}/${uploadId}`);
+    } catch (error) {
+      if (error.status !== 404) throw error;
+      remembered(key, null);
+    }
+  }
+  const status = await uploadRequest(UPLOADS_URL, {
+    method: "POST",
+    headers: {"Content-Type": "application/json"},
+    body: JSON.stringify({filename: file.name, size: file.size})
+  });
+  remembered(key, status.uploadId);
+  return status;
+}
+
+async function putChunk(status, file, index) {
+  const start = index * status.chunkSize;
+  const bytes = new Uint8Array(await file.slice(start, start + status.chunkSize).arrayBuffer());
+  const checksum = crc32Hex(bytes);
+  for (let attempt = 1; ; attempt++) {
+    try {
+      await uploadRequest(`${UPLOADS_URL}/${status.uploadId}/chunks/${index}`, {
+        method: "PUT",
+        headers: {"Content-Type": "application/octet-stream", "X-Chunk-CRC32": checksum},
+        body: bytes
+      });
+      return bytes.length;
+    } catch (error) {
+      // 404/409/413: the upload itself is gone or finished, retrying the chunk won't help.
+      if (attempt >= UPLOAD_CHUNK_ATTEMPTS || [404, 409, 413].includes(error.status)) throw error;
+      await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+    }
+  }
+}
+
+async function uploadFile(file, onProgress) {
+  const status = await openUpload(file);
+  if (!status.complete) {
+    const received = new Set(status.received);
+    const pending = [];
+    for (let index = 0; index < status.chunks; index++) {
+      if (!received.has(index)) pending.push(index);
+    }
+    let sent = file.size - pending.reduce((sum, index) => sum + Math.min(status.chunkSize, file.size - index * status.chunkSize), 0);
+    onProgress(sent);
+    const worker = async () => {
+      while (pending.length) {
+        sent += await putChunk(status, file, pending.shift());
+        onProgress(sent);
+      }
+    };
+    await Promise.all(Array.from({length: UPLOAD_PARALLEL_CHUNKS}, worker));
+    await uploadRequest(`${UPLOADS_URL}/${status.uploadId}/complete`, {method: "POST"});
+  }
+  return status.uploadId;
+}
+
+function setHiddenField(form, name, value, append) {
+  let field = append ? null : form.querySelector(`input[type='hidden'][name='${name}']`);
+  if (!field) {
+    field = document.createElement("input");
+    field.type = "hidden";
+    field.name = name;
+    form.appendChild(field);
+  }
+  field.value = value;
+  return field;
+}
+
+function fileInputsWithFiles(form) {
+  return Array.from(form.querySelectorAll("input[type='file']")).filter(input => !input.disabled && input.files.length);
+}
+
+async function uploadFormFiles(form, inputs) {
+  const megabytes = bytes => (bytes / 1048576).toFixed(1);
+  const total = inputs.reduce((sum, input) => sum + Array.from(input.files).reduce((s, file) => s + file.size, 0), 0);
+  let done = 0;
+  form.querySelectorAll("input[data-upload-id]").forEach(field => field.remove());
+  for (const input of inputs) {
+    for (const file of Array.from(input.files)) {
+      const uploadId = await uploadFile(file, sent => {
+        setProgressText("Uploading...", `${megabytes(done + sent)} of ${megabytes(total)} MB`);
+      });
+      done += file.size;
+      setHiddenField(form, `${input.name}UploadId`, uploadId, true).dataset.uploadId = "";
+    }
+  }
+  // The files are on the server already; don't send them again with the form.
+  inputs.forEach(input => { input.disabled = true; });
+}
+
+function showOverlay(visible) {
+  const overlay = document.getElementById("loading-overlay");
+  if (overlay) overlay.style.display = visible ? "block" : "none";
+}
+
+function submitWithProgress(form) {
+  const field = setHiddenField(form, "progressId", newProgressId());
+  showOverlay(true);
+  followProgress(field.value);
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll("form[data-progress]").forEach(form => {
+    form.addEventListener("submit", event => {
+      const inputs = fileInputsWithFiles(form);
+      if (!inputs.length || !supportsResumableUploads()) {
+        submitWithProgress(form);
+        return;
+      }
+      event.preventDefault();
+      showOverlay(true);
+      setProgressText("Uploading...", "");
+      uploadFormFiles(form, inputs)
+        .then(() => {
+          submitWithProgress(form);
+          form.submit();
+        })
+        .catch(error => {
+          showOverlay(false);
+          alert(`The upload was interrupted (${error.message}). Submit again to resume where it stopped.`);
+        });
+    });
+  });
+});
+
+// Coming back to a submitted form (back button): give it its file fields back.
+window.addEventListener("pageshow", () => {
+  document.querySelectorAll("input[data-upload-id]").forEach(field => field.remove());
+  document.querySelectorAll("form[data-progress] input[type='file']").forEach(input => { input.disabled = false; });
+  showOverlay(false);
+});
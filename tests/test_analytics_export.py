@@ -0,0 +1,92 @@
+# test_analytics_export.py
+
+import csv
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+from src import analytics_export
+from src.analytics_export import ExportError, export_chunks, export_rows
+from src.app import create_app
+from src.data_manager import add_participant_scores, create_event, create_meet, update_event_exam_topics
+from src.seasons import archive_season
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _scored_meet(title, date, incorrect):
+    meet_id = create_meet(title, date)
+    event_id = create_event(meet_id, "Individual Algebra")
+    update_event_exam_topics(meet_id, event_id, [{"questionNumber": 1, "topics": ["Algebra - Functions"]},
+                                                 {"questionNumber": 2, "topics": ["Algebra - Inequalities"]}])
+    add_participant_scores(meet_id, event_id, [{"studentName": "Ada", "gradeLevel": "junior",
+                                                "correctQuestions": [q for q in (1, 2) if q not in incorrect],
+                                                "incorrectQuestions": incorrect}])
+
+
+@pytest.fixture
+def seasons(tmp_path, monkeypatch):
+    """One archived season (2022-23) and one live season (2023-24)."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    _scored_meet("Old Meet", "2022-10-01", [2])
+    _scored_meet("New Meet", "2023-10-01", [])
+    archive_season("2022-23")
+
+
+def test_question_outcomes(seasons):
+    rows = list(export_rows("question-outcomes"))
+    assert [(r["season"], r["meetTitle"], r["questionNumber"], r["correct"]) for r in rows] == [
+        ("2022-23", "Old Meet", 1, True), ("2022-23", "Old Meet", 2, False),
+        ("2023-24", "New Meet", 1, True), ("2023-24", "New Meet", 2, True)]
+    assert rows[1]["topics"] == ["Algebra - Inequalities"]
+    assert [r["meetTitle"] for r in export_rows("question-outcomes", seasons=["2023-24"])] == ["New Meet"] * 2
+
+
+def test_per_season_rows_add_up_to_totals(seasons):
+    totals = {r["topic"]: (r["correct"], r["attempted"]) for r in export_rows("topic-accuracy")}
+    summed = {}
+    for row in export_rows("topic-accuracy", seasons=["2022-23", "2023-24"]):
+        c, a = summed.get(row["topic"], (0, 0))
+        summed[row["topic"]] = (c + row["correct"], a + row["attempted"])
+    assert summed == totals
+    participants = list(export_rows("participants", seasons=["2022-23"]))
+    assert [(p["studentName"], p["totalCorrect"], p["totalQuestionsAttempted"]) for p in participants] == [
+        ("Ada", 1, 2)]
+
+
+def test_formats(seasons, monkeypatch):
+    monkeypatch.setattr(analytics_export, "CHUNK_SIZE", 1)
+    chunks = list(export_chunks("event-summaries", "csv"))
+    assert len(chunks) > 1
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert [(r["season"], r["meetTitle"], r["totalCorrect"]) for r in rows] == [
+        ("2022-23", "Old Meet", "1"), ("2023-24", "New Meet", "2")]
+    lines = b"".join(export_chunks("question-outcomes", "jsonl")).splitlines()
+    assert json.loads(lines[0])["topics"] == ["Algebra - Functions"]
+    with pytest.raises(ExportError):
+        export_chunks("everything", "csv")
+    with pytest.raises(ExportError):
+        export_chunks("participants", "xlsx")
+
+
+def test_export_route_and_command(seasons):
+    app = create_app()
+    client = app.test_client()
+    response = client.get("/export/question-outcomes.csv?season=2022-23")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert 'filename="question-outcomes-2022-23.csv"' in response.headers["Content-Disposition"]
+    assert len(response.get_data(as_text=True).splitlines()) == 3
+    assert client.get("/export/everything.csv").status_code == 400
+    if analytics_export._pyarrow() is None:
+        assert client.get("/export/participants.parquet").status_code == 400
+
+    result = app.test_cli_runner().invoke(args=["export-data", "participants", "out.jsonl"])
+    assert result.exit_code == 0, result.output
+    with open("out.jsonl", encoding="utf-8") as f:
+        assert json.loads(f.readline())["studentName"] == "Ada"
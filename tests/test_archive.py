@@ -0,0 +1,106 @@
+# test_archive.py
+
+import io
+import os
+import shutil
+
+import pytest
+
+from src import gpt_services, tenants
+from src.app import create_app
+from src.archive import season_of, season_of_meet
+from src.dashboard_logic import get_individual_breakdowns, get_student_history, get_topic_trends
+from src.data_manager import (add_participant_scores, create_event, create_meet, get_event, load_data,
+                              update_event_exam_topics)
+from src.roster import RosterError, import_roster
+from src.seasons import archive_season
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _scored_meet(title, date):
+    meet_id = create_meet(title, date)
+    event_id = create_event(meet_id, "Individual Algebra")
+    update_event_exam_topics(meet_id, event_id, [{"questionNumber": 1, "topics": ["Algebra - Functions"]},
+                                                 {"questionNumber": 2, "topics": ["Algebra - Inequalities"]}])
+    add_participant_scores(meet_id, event_id, [{"studentName": "Ada", "gradeLevel": "junior",
+                                                "correctQuestions": [1], "incorrectQuestions": [2]}])
+    return meet_id, event_id
+
+
+def test_season_of():
+    assert season_of("2023-08-01") == "2023-24"
+    assert season_of("2024-07-31") == "2023-24"
+    assert season_of(None) is None
+
+
+def test_archived_season_stays_readable(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    old_meet, old_event = _scored_meet("Old Meet", "2022-10-01")
+    _scored_meet("New Meet", "2023-10-01")
+    student_id = next(iter(load_data()["students"]))
+    before = (get_individual_breakdowns(), get_student_history(student_id), get_topic_trends())
+
+    assert archive_season("2022-23") == 1
+    assert [m.title for m in load_data()["meets"]] == ["New Meet"]
+    assert os.path.exists(os.path.join("data", "archive", "2022-23.json.gz"))
+    assert season_of_meet(old_meet) == "2022-23"
+    assert get_event(old_meet, old_event).participants[0].studentName == "Ada"
+    assert (get_individual_breakdowns(), get_student_history(student_id), get_topic_trends()) == before
+
+    with pytest.raises(ValueError):
+        archive_season("2022-23")
+    with pytest.raises(ValueError):
+        archive_season("2999-00")
+
+
+def test_archived_meets_reject_roster_imports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    old_meet, old_event = _scored_meet("Old Meet", "2022-10-01")
+    archive_season("2022-23")
+    rows = [{"studentName": "Ben", "gradeLevel": "senior", "incorrectList": "1"}]
+
+    with pytest.raises(RosterError):
+        import_roster(old_meet, old_event, rows)
+    client = create_app().test_client()
+    response = client.post(f"/meet/{old_meet}/event/{old_event}/roster", json={"participants": rows})
+    assert response.status_code == 409
+    response = client.post(f"/meet/{old_meet}/event/{old_event}/roster", follow_redirects=True,
+                           data={"studentName": "Ben", "gradeLevel": "senior", "incorrectList": "1"})
+    assert "archived (read-only)" in response.get_data(as_text=True)
+    assert [p.studentName for p in get_event(old_meet, old_event).participants] == ["Ada"]
+
+
+def test_archived_meets_refuse_uploads_and_edits(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    old_meet, old_event = _scored_meet("Old Meet", "2022-10-01")
+    archive_season("2022-23")
+
+    def no_gpt():
+        raise AssertionError("GPT called for an archived meet")
+    monkeypatch.setattr(gpt_services, "get_client", no_gpt)
+    client = create_app().test_client()
+    event_url = f"/meet/{old_meet}/event/{old_event}"
+    uploads = [
+        (f"{event_url}/upload_exam", {"files": (io.BytesIO(b"exam"), "exam.png")}),
+        (f"{event_url}/upload_single_student_score",
+         {"studentName": "Ben", "gradeLevel": "senior", "scoreMode": "image", "scoreFile": (io.BytesIO(b"s"), "s.png")}),
+        (f"/meet/{old_meet}/upload_topic_list", {"files": (io.BytesIO(b"topics"), "topics.png")}),
+        (f"{event_url}/delete_participant", {"studentName": "Ada", "gradeLevel": "junior"}),
+    ]
+    for url, data in uploads:
+        response = client.post(url, data=data, content_type="multipart/form-data")
+        assert response.status_code == 302, url
+        assert response.headers["Location"].endswith(event_url if "/event/" in url else f"/meet/{old_meet}")
+    assert "archived (read-only)" in client.get(event_url).get_data(as_text=True)
+    response = client.post(f"/meet/{old_meet}/update_topic_list_ajax", json={"topicList": {}})
+    assert response.status_code == 409
+    assert [names for _, _, names in os.walk(tmp_path / "uploads") if names] == []  # nothing was saved
+    assert [p.studentName for p in get_event(old_meet, old_event).participants] == ["Ada"]
@@ -0,0 +1,158 @@
+# test_asgi.py
+
+import asyncio
+import io
+import os
+import shutil
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("openai")
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from src import asgi, flows, gpt_services, progress, tenants
+from src.app import create_app
+from src.asgi import AsyncUploadApp, build_environ
+from src.data_manager import add_participant_scores, create_event, create_meet, get_event
+from src.gpt_services import CircuitBreaker
+from src.progress import ProgressTracker
+from src.seasons import archive_season
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def fake_openai():
+    server = FakeOpenAIServer(latency=0).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def flask_app(tmp_path, monkeypatch, fake_openai):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    monkeypatch.setenv("OPENAI_BASE_URL", fake_openai.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "fake-key")
+    monkeypatch.setattr(gpt_services, "_client", None)
+    monkeypatch.setattr(gpt_services, "_async_client", None)
+    monkeypatch.setattr(gpt_services, "circuit_breaker", CircuitBreaker(5, 30))
+    tracker = ProgressTracker()
+    for module in (progress, flows, asgi):
+        monkeypatch.setattr(module, "tracker", tracker)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    return create_app()
+
+
+def _request(flask_app, method, path, **kwargs):
+    """Sends one request through AsyncUploadApp (on its own event loop) and returns the response."""
+    app = AsyncUploadApp(flask_app, worker_threads=2)
+
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.request(method, path, **kwargs)
+
+    try:
+        return asyncio.run(send())
+    finally:
+        app.executor.shutdown()
+
+
+def _score_upload(student, progress_id, content=b"answer sheet"):
+    return {
+        "data": {"studentName": student, "gradeLevel": "7", "scoreMode": "image", "progressId": progress_id},
+        "files": {"scoreFile": ("sheet.png", io.BytesIO(content), "image/png")},
+    }
+
+
+def test_build_environ_maps_the_scope():
+    scope = {
+        "type": "http", "method": "POST", "root_path": "/app", "path": "/app/meet/1",
+        "query_string": b"progressId=abc", "server": ("example.org", 8000), "client": ("10.0.0.1", 5555),
+        "headers": [(b"content-type", b"text/plain"), (b"content-length", b"5"),
+                    (b"accept", b"text/html"), (b"accept", b"*/*")],
+    }
+    body = io.BytesIO(b"hello")
+    environ = build_environ(scope, body)
+    assert (environ["SCRIPT_NAME"], environ["PATH_INFO"], environ["QUERY_STRING"]) == ("/app", "/meet/1", "progressId=abc")
+    assert (environ["SERVER_NAME"], environ["SERVER_PORT"], environ["REMOTE_ADDR"]) == ("example.org", "8000", "10.0.0.1")
+    assert (environ["CONTENT_TYPE"], environ["CONTENT_LENGTH"]) == ("text/plain", "5")
+    assert environ["HTTP_ACCEPT"] == "text/html,*/*"
+    assert environ["wsgi.input"] is body and environ["wsgi.url_scheme"] == "http"
+
+
+def test_plain_routes_pass_through_to_flask(flask_app):
+    response = _request(flask_app, "POST", "/add_meet", data={"title": "Fall Meet", "date": "2024-10-05"})
+    assert response.status_code == 302
+    response = _request(flask_app, "GET", "/")
+    assert response.status_code == 200
+    assert "text/html" in response.headers["content-type"]
+    assert "Fall Meet" in response.text
+
+
+def test_upload_flow_awaits_the_parse_and_reports_progress(flask_app, fake_openai):
+    meet_id = create_meet("Fall Meet", "2024-10-05")
+    event_id = create_event(meet_id, "Individual Algebra")
+    served = fake_openai.requests_served
+    path = f"/meet/{meet_id}/event/{event_id}/upload_single_student_score"
+
+    response = _request(flask_app, "POST", path, **_score_upload("Ada", "job-1"))
+    assert response.status_code == 302
+    assert response.headers["location"].endswith(f"/meet/{meet_id}/event/{event_id}")
+    assert fake_openai.requests_served == served + 1
+    ada = get_event(meet_id, event_id).participants[0]
+    assert (ada.studentName, list(ada.correctQuestions)) == ("Ada", list(range(1, 21)))
+
+    stream = _request(flask_app, "GET", "/progress/job-1")
+    assert stream.headers["content-type"] == "text/event-stream"
+    assert stream.text.startswith("retry: 2000\n\n")
+    stages = [line.split(": ", 1)[1] for line in stream.text.splitlines() if line.startswith("event: ")]
+    assert stages == ["saved", "preprocessing", "model_call_started", "committed", "done"]
+
+    # The same sheet again is answered from the parse cache, without a model call.
+    _request(flask_app, "POST", path, **_score_upload("Grace", "job-2"))
+    assert fake_openai.requests_served == served + 1
+    assert "event: cache_hit" in _request(flask_app, "GET", "/progress/job-2").text
+    assert [p.studentName for p in get_event(meet_id, event_id).participants] == ["Ada", "Grace"]
+
+
+def test_failed_parse_is_reported_in_both_modes(flask_app, monkeypatch):
+    meet_id = create_meet("Fall Meet", "2024-10-05")
+    event_id = create_event(meet_id, "Individual Algebra")
+    path = f"/meet/{meet_id}/event/{event_id}/upload_single_student_score"
+    monkeypatch.setattr(gpt_services, "GPT_MAX_ATTEMPTS", 1)
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")  # nothing listens here
+
+    # Async: the awaited step raises and the flow handles the error.
+    response = _request(flask_app, "POST", path, **_score_upload("Ada", "job-1", b"sheet one"))
+    assert response.status_code == 302
+    events = _request(flask_app, "GET", "/progress/job-1").text
+    assert "event: error" in events and "event: committed" not in events
+
+    # Sync (run_flow under the WSGI app): same outcome.
+    client = flask_app.test_client()
+    upload = _score_upload("Grace", "job-2", b"sheet two")
+    name, content, _ = upload["files"]["scoreFile"]
+    data = dict(upload["data"], scoreFile=(content, name))
+    response = client.post(path, data=data, content_type="multipart/form-data", follow_redirects=True)
+    assert "GPT parse error" in response.get_data(as_text=True)
+    assert get_event(meet_id, event_id).participants == []
+
+
+def test_archived_meets_refuse_uploads_before_the_parse(flask_app, fake_openai):
+    meet_id = create_meet("Old Meet", "2022-10-01")
+    event_id = create_event(meet_id, "Individual Algebra")
+    add_participant_scores(meet_id, event_id, [{"studentName": "Ada", "gradeLevel": "junior",
+                                                "correctQuestions": [], "incorrectQuestions": []}])
+    archive_season("2022-23")
+    served = fake_openai.requests_served
+
+    response = _request(flask_app, "POST", f"/meet/{meet_id}/event/{event_id}/upload_single_student_score",
+                        **_score_upload("Ben", "job-1"))
+    assert response.status_code == 302
+    assert fake_openai.requests_served == served
+    assert [p.studentName for p in get_event(meet_id, event_id).participants] == ["Ada"]
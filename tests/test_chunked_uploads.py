@@ -0,0 +1,91 @@
+# test_chunked_uploads.py
+
+import hashlib
+import os
+import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import chunked_uploads, tenants
+from src.app import create_app
+from src.data_manager import create_event, create_meet, get_event
+from src.upload_store import upload_path
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK = 1000
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    monkeypatch.setattr(chunked_uploads, "UPLOAD_CHUNK_SIZE", CHUNK)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    return create_app().test_client()
+
+
+def _put(client, upload_id, index, data, checksum=None):
+    checksum = checksum or f"{zlib.crc32(data):08x}"
+    return client.put(f"/uploads/{upload_id}/chunks/{index}", data=data, headers={"X-Chunk-CRC32": checksum})
+
+
+def test_parallel_chunks_resume_and_complete(client):
+    content = os.urandom(4500)
+    status = client.post("/uploads", json={"filename": "scan.JPEG", "size": len(content),
+                                           "sha256": hashlib.sha256(content).hexdigest()})
+    assert status.status_code == 201
+    upload_id = status.json["uploadId"]
+    assert (status.json["chunks"], status.json["received"]) == (5, [])
+
+    # A corrupted chunk and a short one are rejected and not counted as received.
+    assert _put(client, upload_id, 1, content[1000:2000], checksum="00000000").status_code == 400
+    assert _put(client, upload_id, 4, content[4000:4400]).status_code == 400
+    with ThreadPoolExecutor(3) as pool:
+        replies = list(pool.map(lambda i: _put(client, upload_id, i, content[i * CHUNK:(i + 1) * CHUNK]), [4, 0, 2]))
+    assert [r.status_code for r in replies] == [200, 200, 200]
+
+    # After a dropped connection, the client asks what is left and sends only that.
+    status = client.get(f"/uploads/{upload_id}").json
+    assert status["received"] == [0, 2, 4] and not status["complete"]
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 409
+    for index in set(range(status["chunks"])) - set(status["received"]):
+        assert _put(client, upload_id, index, content[index * CHUNK:(index + 1) * CHUNK]).status_code == 200
+    done = client.post(f"/uploads/{upload_id}/complete").json
+    assert done["complete"] and done["sha256"] == hashlib.sha256(content).hexdigest()
+    assert _put(client, upload_id, 0, content[:CHUNK]).status_code == 409
+
+    # The upload form takes the upload id in place of the file.
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    client.post(f"/meet/{meet_id}/event/{event_id}/upload_exam", data={"filesUploadId": upload_id})
+    [path] = get_event(meet_id, event_id).examImagePaths
+    assert path.endswith(done["sha256"] + ".jpg")
+    with open(upload_path(path), "rb") as f:
+        assert f.read() == content
+    # Claimed once; the partial upload is gone.
+    assert client.get(f"/uploads/{upload_id}").status_code == 404
+
+
+def test_rejected_and_abandoned_uploads(client):
+    assert client.post("/uploads", json={"filename": "a.png", "size": 0}).status_code == 400
+    assert client.post("/uploads", json={"filename": "a.png", "size": chunked_uploads.MAX_UPLOAD_SIZE + 1}).status_code == 413
+    assert client.get("/uploads/../../data").status_code == 404
+    assert client.get("/uploads/" + "0" * 32).json["status"] == "error"
+
+    upload_id = client.post("/uploads", json={"filename": "a.png", "size": 10}).json["uploadId"]
+    assert _put(client, upload_id, 1, b"x").status_code == 400
+    assert client.put(f"/uploads/{upload_id}/chunks/0", data=b"0123456789").status_code == 400
+
+    # An upload that is not complete can't be submitted with a form.
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    client.post(f"/meet/{meet_id}/event/{event_id}/upload_exam", data={"filesUploadId": upload_id})
+    assert get_event(meet_id, event_id).examImagePaths == []
+
+    assert chunked_uploads.expire_partial_uploads(max_age=3600) == []
+    assert chunked_uploads.expire_partial_uploads(max_age=-1, dry_run=True) == [upload_id]
+    assert chunked_uploads.expire_partial_uploads(max_age=-1) == [upload_id]
+    assert client.get(f"/uploads/{upload_id}").status_code == 404
@@ -0,0 +1,35 @@
+# test_export.py
+
+import os
+import shutil
+
+from src.app import create_app
+from src.data_manager import add_participant_scores, create_event, create_meet, update_event_num_questions
+from src.export import export_site
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_reexport_renders_only_changed_pages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    meet_id = create_meet("Meet 1", "2024-01-15")
+    algebra = create_event(meet_id, "Individual Algebra")
+    geometry = create_event(meet_id, "Individual Geometry")
+    update_event_num_questions(meet_id, algebra, 3)
+    add_participant_scores(meet_id, algebra, [{"studentName": "Ada", "gradeLevel": "junior",
+                                               "correctQuestions": [1, 2], "incorrectQuestions": [3]}])
+    app = create_app()
+    out_dir = str(tmp_path / "site")
+
+    first = export_site(app, out_dir)
+    assert f"/meet/{meet_id}/event/{geometry}" in first["rendered"]
+    assert os.path.exists(os.path.join(out_dir, "meet", meet_id, "event", algebra, "index.html"))
+    assert os.path.exists(os.path.join(out_dir, "static", "scripts.js"))
+    assert export_site(app, out_dir)["rendered"] == []
+
+    update_event_num_questions(meet_id, geometry, 5)
+    assert export_site(app, out_dir)["rendered"] == ["/dashboard", f"/meet/{meet_id}/event/{geometry}"]
+    with open(os.path.join(out_dir, "meet", meet_id, "event", geometry, "index.html"), encoding="utf-8") as f:
+        assert "<form" not in f.read()
@@ -0,0 +1,229 @@
+# test_gpt_services.py
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+openai = pytest.importorskip("openai")
+httpx = pytest.importorskip("httpx")
+pydantic = pytest.importorskip("pydantic")
+
+from src import gpt_services
+from src.gpt_schemas import StudentScores
+from src.gpt_services import (CircuitBreaker, GPTRequest, GPTServiceError, GPTUnavailableError, _StreamWatcher,
+                              acall_gpt, call_gpt)
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _connection_error():
+    return openai.APIConnectionError(request=_REQUEST)
+
+
+def _timeout_error():
+    return openai.APITimeoutError(request=_REQUEST)
+
+
+def _validation_error():
+    try:
+        StudentScores.model_validate({"correctQuestions": "all of them"})
+    except pydantic.ValidationError as e:
+        return e
+
+
+def _reply(parsed, refusal=None):
+    message = SimpleNamespace(content="{}", parsed=parsed, refusal=refusal)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeStream:
+    def __init__(self, events, final):
+        self.events = events
+        self.final = final
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def get_final_completion(self):
+        return self.final
+
+
+class FakeClient:
+    """Stands in for the OpenAI client: each call takes the next outcome (a reply or an exception to raise)."""
+
+    def __init__(self, outcomes, stream=None):
+        self.outcomes = list(outcomes)
+        self.stream_outcome = stream
+        self.calls = 0
+        self.timeouts = []
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=self))
+
+    def with_options(self, timeout):
+        self.timeouts.append(timeout)
+        return self
+
+    def _next(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def parse(self, **kwargs):
+        return self._next()
+
+    def stream(self, **kwargs):
+        self.calls += 1
+        return self.stream_outcome
+
+
+class FakeAsyncClient(FakeClient):
+    async def parse(self, **kwargs):
+        return self._next()
+
+
+@pytest.fixture
+def gpt(monkeypatch):
+    """Fresh breaker and stats, recorded (not slept) backoffs, and a settable fake client."""
+    state = SimpleNamespace(client=None, sleeps=[])
+    monkeypatch.setattr(gpt_services, "circuit_breaker", CircuitBreaker(failure_threshold=2, reset_timeout=30))
+    monkeypatch.setattr(gpt_services, "_stats", {})
+    monkeypatch.setattr(gpt_services, "get_client", lambda: state.client)
+    monkeypatch.setattr(gpt_services, "get_async_client", lambda: state.client)
+    monkeypatch.setattr(gpt_services.time, "sleep", state.sleeps.append)
+    return state
+
+
+def _scores_request(**kwargs):
+    return GPTRequest("parse_scores", "StudentScores", lambda: [{"type": "text", "text": "scores"}],
+                      lambda parsed: parsed.model_dump(), **kwargs)
+
+
+def _stats(name="parse_scores"):
+    return gpt_services.get_gpt_stats()["calls"][name]
+
+
+def test_transient_errors_are_retried_with_backoff(gpt):
+    scores = StudentScores(correctQuestions=[1, 2], incorrectQuestions=[3])
+    gpt.client = FakeClient([_connection_error(), _timeout_error(), _reply(scores)])
+    assert _scores_request().run() == {"correctQuestions": [1, 2], "incorrectQuestions": [3]}
+    assert gpt.client.calls == 3
+    # Exponential backoff with jitter: base * 2**(attempt - 1) * [0.5, 1].
+    assert len(gpt.sleeps) == 2
+    assert 0.5 <= gpt.sleeps[0] <= 1.0 and 1.0 <= gpt.sleeps[1] <= 2.0
+    stats = _stats()
+    assert (stats["calls"], stats["retries"], stats["timeouts"], stats["successes"], stats["failures"]) == (3, 2, 1, 1, 0)
+    assert gpt_services.circuit_breaker.state == "closed"
+
+
+def test_unusable_replies_fail_without_retrying(gpt):
+    gpt.client = FakeClient([_validation_error()])
+    with pytest.raises(GPTServiceError, match="validation error"):
+        _scores_request().run()
+    gpt.client = FakeClient([_reply(None, refusal="I can't read this sheet")])
+    with pytest.raises(GPTServiceError, match="I can't read this sheet"):
+        _scores_request().run()
+    assert gpt.sleeps == [] and _stats()["failures"] == 2
+    # The provider is up, so these don't count toward opening the circuit.
+    assert gpt_services.circuit_breaker.state == "closed"
+
+
+def test_gives_up_after_max_attempts_or_at_the_deadline(gpt, monkeypatch):
+    gpt.client = FakeClient([_connection_error()] * 3)
+    with pytest.raises(GPTServiceError, match="after 3 attempt"):
+        call_gpt("parse_scores", lambda client: client.beta.chat.completions.parse())
+    assert gpt.client.calls == 3 and len(gpt.sleeps) == 2
+
+    # No time left for a backoff: the first transient error is final.
+    monkeypatch.setattr(gpt_services, "GPT_CALL_DEADLINE", 0.4)
+    gpt.sleeps.clear()
+    gpt.client = FakeClient([_connection_error()] * 3)
+    with pytest.raises(GPTServiceError, match="after 1 attempt"):
+        call_gpt("parse_scores", lambda client: client.beta.chat.completions.parse())
+    assert gpt.client.calls == 1 and gpt.sleeps == []
+    # Each attempt's timeout is cut to what is left of the deadline (at least a second).
+    assert gpt.client.timeouts == [1.0]
+
+
+def test_circuit_breaker_opens_probes_and_closes(gpt, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(gpt_services.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(gpt_services, "GPT_MAX_ATTEMPTS", 1)
+    breaker = gpt_services.circuit_breaker
+    request = _scores_request()
+
+    gpt.client = FakeClient([_connection_error()] * 2)
+    for _ in range(2):
+        with pytest.raises(GPTServiceError):
+            request.run()
+    assert breaker.state == "open"
+    with pytest.raises(GPTUnavailableError):
+        request.run()
+    assert gpt.client.calls == 2 and _stats()["rejected"] == 1
+
+    # After reset_timeout one trial call goes through; a failed trial opens it again.
+    now[0] += 30
+    assert breaker.state == "half-open"
+    gpt.client = FakeClient([_connection_error()])
+    with pytest.raises(GPTServiceError):
+        request.run()
+    assert breaker.state == "open"
+
+    now[0] += 30
+    assert breaker.allow() and not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    now[0] += 30
+    gpt.client = FakeClient([_reply(StudentScores(correctQuestions=[1], incorrectQuestions=[]))])
+    assert request.run() == {"correctQuestions": [1], "incorrectQuestions": []}
+    assert breaker.state == "closed"
+
+
+def test_async_calls_retry_without_blocking(gpt, monkeypatch):
+    monkeypatch.setattr(gpt_services, "GPT_BACKOFF_BASE", 0.001)
+    scores = StudentScores(correctQuestions=[], incorrectQuestions=[1])
+    gpt.client = FakeAsyncClient([_connection_error(), _reply(scores)])
+    assert asyncio.run(_scores_request().arun()) == {"correctQuestions": [], "incorrectQuestions": [1]}
+    assert gpt.client.calls == 2 and _stats()["retries"] == 1
+
+    gpt.client = FakeAsyncClient([_validation_error()])
+    with pytest.raises(GPTServiceError):
+        asyncio.run(acall_gpt("parse_scores", lambda client: client.beta.chat.completions.parse()))
+    assert gpt.client.calls == 1
+
+
+def _delta(snapshot, parsed):
+    return SimpleNamespace(type="content.delta", snapshot=snapshot, parsed=parsed)
+
+
+def test_streamed_replies_report_tokens_and_growing_partials(gpt):
+    def partial_result(parsed):
+        return parsed.get("questions", [])[:-1]  # the last question may be incomplete
+
+    events = [
+        SimpleNamespace(type="chunk"),
+        _delta('{"questions": [{"q', {"questions": [{}]}),
+        _delta('{"questions": [{"q": 1}, {"q', {"questions": [{"q": 1}, {}]}),
+        _delta('{"questions": [{"q": 1}, {"q"', {"questions": [{"q": 1}, {}]}),
+        _delta('{"questions": [{"q": 1}, {"q": 2}, {', {"questions": [{"q": 1}, {"q": 2}, {}]}),
+    ]
+    scores = StudentScores(correctQuestions=[1, 2], incorrectQuestions=[])
+    gpt.client = FakeClient([], stream=FakeStream(events, _reply(scores)))
+    reports = []
+    result = _scores_request(partial_result=partial_result).run(lambda stage, **data: reports.append((stage, data)))
+
+    assert result == {"correctQuestions": [1, 2], "incorrectQuestions": []}
+    stages = [stage for stage, _ in reports]
+    # Token counts are throttled to one report per TOKEN_REPORT_INTERVAL; a partial is reported when it grows.
+    assert stages == ["preprocessing", "model_call_started", "tokens", "partial", "partial"]
+    assert [data["result"] for stage, data in reports if stage == "partial"] == [[{"q": 1}], [{"q": 1}, {"q": 2}]]
+
+    watcher = _StreamWatcher(SimpleNamespace(partial_result=partial_result), lambda *a, **k: None)
+    watcher(_delta("x", "not a dict"))
+    assert watcher.partial_count == 0
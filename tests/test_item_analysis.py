@@ -0,0 +1,34 @@
+# test_item_analysis.py
+
+import statistics
+
+from src.dashboard_logic import _item_stats, _question_sums
+from src.models import Participant
+
+
+def _scores(correct, incorrect):
+    return Participant("Student", "junior", correct, incorrect)
+
+
+PARTICIPANTS = [
+    _scores([1, 2, 3], [4]),
+    _scores([1, 2], [3, 4]),
+    _scores([1, 4], [2, 3]),
+    _scores([1], [2, 3, 4]),
+    _scores([2, 3, 4], [1]),
+]
+
+
+def test_item_stats_match_direct_correlation():
+    sums = _question_sums(PARTICIPANTS)
+    for q in (2, 3, 4):
+        item = [1 if q in p.correctQuestions else 0 for p in PARTICIPANTS]
+        rest = [len(p.correctQuestions) - x for p, x in zip(PARTICIPANTS, item)]
+        p_value, discrimination = _item_stats(*sums[q])
+        assert p_value == sum(item) / len(item)
+        assert abs(discrimination - statistics.correlation(item, rest)) < 1e-9
+
+
+def test_discrimination_undefined_when_everyone_agrees():
+    sums = _question_sums([_scores([1, 2], []), _scores([1], [2])])
+    assert _item_stats(*sums[1]) == (1.0, None)
@@ -0,0 +1,88 @@
+# test_mark_detection.py
+
+import io
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from PIL import Image, ImageDraw
+
+from src import tenants
+from src.app import create_app
+from src.data_manager import create_event, create_meet, get_event, update_event_num_questions
+from src.mark_detection import (DIGIT_STROKES, MARK_COLUMN, MARK_STROKES, SHEET_SIZE, TOTAL_BOX, answer_sheet,
+                                draw_strokes, frame_box, layout_box, local_student_scores, question_row_box,
+                                score_sheet)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _graded_sheet(marks, total):
+    """An answer sheet with `marks` ("check", "c", "x" or None per question) and `total` written in."""
+    page = answer_sheet(len(marks), "Test Meet - Individual Algebra")
+    draw = ImageDraw.Draw(page)
+    frame = frame_box(SHEET_SIZE)
+    for i, kind in enumerate(marks):
+        if kind:
+            x0, y0, _, y1 = question_row_box(frame, len(marks), i, MARK_COLUMN)
+            size = (y1 - y0) * 0.7
+            draw_strokes(draw, MARK_STROKES[kind], (x0 + 40, y0 + size * 0.2, x0 + 40 + size, y0 + size * 1.2), 4)
+    x0, y0, x1, y1 = layout_box(frame, TOTAL_BOX)
+    for j, digit in enumerate(str(total)):
+        left = x0 + 60 + j * 35
+        draw_strokes(draw, DIGIT_STROKES[int(digit)], (left, y0 + 15, left + 22, y1 - 15), 4)
+    return page
+
+
+MARKS = ["check", "x", "c", None, "check", "x", "x", "c", "check", "check"]
+
+
+def test_scores_a_graded_sheet(tmp_path):
+    path = str(tmp_path / "sheet.jpg")
+    _graded_sheet(MARKS, 6).rotate(1.5, fillcolor=255).save(path, quality=80)
+    result = score_sheet(path, 10)
+    assert result.reason is None
+    assert result.scores() == {"correctQuestions": [1, 3, 5, 8, 9, 10], "incorrectQuestions": [2, 6, 7]}
+    assert result.total == 6
+
+
+def test_falls_back_when_unsure(tmp_path):
+    miscounted = str(tmp_path / "miscounted.png")
+    _graded_sheet(MARKS, 7).save(miscounted)
+    assert "total says 7" in score_sheet(miscounted, 10).reason
+    assert local_student_scores(miscounted, 10) is None
+    # Wrong number of rows for the event, and a photo that isn't one of our sheets.
+    assert score_sheet(miscounted, 12).reason
+    photo = str(tmp_path / "photo.png")
+    Image.new("L", (800, 600), 200).save(photo)
+    assert local_student_scores(photo) is None
+
+
+def test_upload_scores_locally(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    update_event_num_questions(meet_id, event_id, 10)
+    client = create_app().test_client()
+
+    sheet = client.get(f"/meet/{meet_id}/event/{event_id}/answer_sheet.png")
+    assert sheet.mimetype == "image/png"
+    assert Image.open(io.BytesIO(sheet.data)).size == SHEET_SIZE
+
+    image = io.BytesIO()
+    _graded_sheet(MARKS, 6).save(image, "PNG")
+    image.seek(0)
+    # No API key is configured: this only succeeds if GPT isn't needed.
+    client.post(f"/meet/{meet_id}/event/{event_id}/upload_single_student_score",
+                data={"studentName": "Ada", "gradeLevel": "junior", "scoreMode": "image",
+                      "scoreFile": (image, "sheet.png")}, content_type="multipart/form-data")
+    participant = get_event(meet_id, event_id).participants[0]
+    assert participant.correctQuestions.tolist() == [1, 3, 5, 8, 9, 10]
+    assert participant.incorrectQuestions.tolist() == [2, 6, 7]
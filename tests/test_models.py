@@ -0,0 +1,24 @@
+# test_models.py
+
+from src.models import Meet
+
+
+def test_round_trip_keeps_the_json_schema():
+    meet = {
+        "id": "m1", "title": "Meet", "date": "2024-01-01", "topicList": {"Algebra": ["expressions"]},
+        "topicListUploads": [], "customKey": 1,
+        "events": [
+            {"id": "e1", "eventName": "Algebra I", "numQuestions": 3,
+             "examTopics": [{"questionNumber": 1, "topics": ["Algebra - expressions"]}],
+             "participants": [{"studentId": "s1", "studentName": "Ada", "gradeLevel": "junior",
+                               "correctQuestions": [1, 2], "incorrectQuestions": [3]}],
+             "examImagePaths": [], "scoreImagePaths": []},
+            {"id": "e2", "eventName": "Calculator Team", "examTopics": [], "participants": [],
+             "examImagePaths": [], "scoreImagePaths": [],
+             "teamCorrectQuestions": [2], "teamIncorrectQuestions": []},
+        ],
+    }
+    loaded = Meet.from_dict(meet)
+    assert loaded.to_dict() == meet
+    assert loaded.find_event("e1").participants[0].correctQuestions.tolist() == [1, 2]
+    assert loaded.find_event("e2").numQuestions is None
@@ -0,0 +1,95 @@
+# test_previews.py
+
+import io
+import os
+import re
+import shutil
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image
+
+from src import previews, tenants
+from src.app import create_app
+from src.data_manager import create_event, create_meet, get_event
+from src.upload_store import PREVIEW_CACHE_DIR, upload_root
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    monkeypatch.setattr(previews, "_cache_bytes", {})
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    return create_app().test_client()
+
+
+def _photo(seed, size=(3000, 2000)):
+    """A noisy JPEG the size of a phone photo."""
+    image = Image.effect_noise(size, 40 + seed).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    buffer.seek(0)
+    return buffer
+
+
+def test_event_page_shows_cached_thumbnails(client):
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    photo = _photo(0)
+    original_size = len(photo.getvalue())
+    # No API key: the parse fails, but the images are stored on the event.
+    client.post(f"/meet/{meet_id}/event/{event_id}/upload_exam",
+                data={"files": [(photo, "page1.jpg")]}, content_type="multipart/form-data")
+    [path] = get_event(meet_id, event_id).examImagePaths
+
+    page = client.get(f"/meet/{meet_id}/event/{event_id}").get_data(as_text=True)
+    thumb_url = re.search(r'<img src="([^"]+)"', page).group(1)
+    assert thumb_url == f"/image/thumb/{path}"
+    assert f'href="/image/preview/{path}"' in page
+
+    thumb = client.get(thumb_url)
+    assert thumb.mimetype == "image/jpeg"
+    assert max(Image.open(io.BytesIO(thumb.data)).size) == 320
+    assert len(thumb.data) < original_size / 20
+    assert thumb.cache_control.max_age == previews.PREVIEW_MAX_AGE and thumb.cache_control.immutable
+    assert client.get(thumb_url, headers={"If-None-Match": thumb.headers["ETag"]}).status_code == 304
+
+    preview = client.get(f"/image/preview/{path}")
+    assert Image.open(io.BytesIO(preview.data)).size == (1600, 1067)
+    assert len(os.listdir(os.path.join(upload_root(), PREVIEW_CACHE_DIR))) == 2
+
+
+def test_bad_paths_and_eviction(client, monkeypatch):
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    client.post(f"/meet/{meet_id}/event/{event_id}/upload_exam",
+                data={"files": [(_photo(i, (1200, 900)), f"page{i}.jpg") for i in range(4)]},
+                content_type="multipart/form-data")
+    paths = get_event(meet_id, event_id).examImagePaths
+    assert len(paths) == 4
+
+    assert client.get(f"/image/huge/{paths[0]}").status_code == 404
+    assert client.get("/image/thumb/exams/missing.jpg").status_code == 404
+    assert client.get("/image/thumb/../data/store.json").status_code == 404
+    assert client.get(f"/image/thumb/{PREVIEW_CACHE_DIR}/thumb/x.jpg").status_code == 404
+
+    # Room for about two previews: the least recently served are evicted.
+    sizes = []
+    for path in paths[:2]:
+        sizes.append(len(client.get(f"/image/preview/{path}").data))
+    monkeypatch.setattr(previews, "PREVIEW_CACHE_MAX_BYTES", int(max(sizes) * 2.5))
+    client.get(f"/image/preview/{paths[0]}")  # served again: now the most recent
+    for path in paths[2:]:
+        assert client.get(f"/image/preview/{path}").status_code == 200
+    cached = os.listdir(os.path.join(upload_root(), PREVIEW_CACHE_DIR, "preview"))
+    cached = {name for folder in cached
+              for name in os.listdir(os.path.join(upload_root(), PREVIEW_CACHE_DIR, "preview", folder))}
+    stems = [os.path.splitext(os.path.basename(p))[0] + ".jpg" for p in paths]
+    assert stems[1] not in cached and stems[3] in cached
+    assert len(cached) <= 2
@@ -0,0 +1,75 @@
+# test_profiling.py
+
+import json
+import os
+import shutil
+
+import pytest
+
+from src import tenants
+from src.app import create_app
+from src.data_manager import create_event, create_meet
+from src.profiling import ProfilingMiddleware
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    create_event(meet_id, "Individual Algebra")
+    return tmp_path
+
+
+def test_not_installed_without_token(workdir, monkeypatch):
+    monkeypatch.delenv("PROFILING_TOKEN", raising=False)
+    app = create_app()
+    assert not isinstance(app.wsgi_app.wsgi_app, ProfilingMiddleware)
+    client = app.test_client()
+    assert "X-Profile-Id" not in client.get("/dashboard?profile=secret").headers
+    assert client.get("/admin/profiles?token=secret").status_code == 404
+    assert not os.path.exists(os.path.join("data", "profiles"))
+
+
+def test_profiles_requests_with_token(workdir, monkeypatch, caplog):
+    monkeypatch.setenv("PROFILING_TOKEN", "secret")
+    client = create_app().test_client()
+    # The first view: the dashboard's fragment isn't cached yet, so it loads the store.
+    with caplog.at_level("INFO", logger="src.profiling"):
+        response = client.get("/dashboard?profile=secret")
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    base = os.path.join("data", "profiles", profile_id)
+    [message] = caplog.messages
+    assert message.startswith("Profiled GET /dashboard in ") and message.endswith(f"ms: {base}.prof")
+    assert os.path.getsize(base + ".prof") > 0
+    with open(base + ".json", encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["path"] == "/dashboard" and summary["query"] == "" and summary["status"] == 200
+    assert summary["categories"]["templates"] > 0
+    assert summary["categories"]["load_data"] > 0
+    assert 0 < summary["categories"]["templates"] <= summary["duration"]
+    assert summary["topFunctions"]
+    with open(base + ".folded", encoding="utf-8") as f:
+        for line in f:
+            stack, count = line.rsplit(" ", 1)
+            assert stack and int(count) > 0
+
+    assert "X-Profile-Id" not in client.get("/dashboard").headers
+    assert "X-Profile-Id" not in client.get("/dashboard?profile=wrong").headers
+    assert len(os.listdir(os.path.join("data", "profiles"))) == 3
+
+    # The header works too, and the admin page lists both.
+    second = client.get("/dashboard", headers={"X-Profile-Token": "secret"}).headers["X-Profile-Id"]
+    assert client.get("/admin/profiles").status_code == 404
+    assert client.get("/admin/profiles?token=wrong").status_code == 404
+    page = client.get("/admin/profiles?token=secret").get_data(as_text=True)
+    assert profile_id in page and second in page
+    download = client.get(f"/admin/profiles/{profile_id}.json?token=secret")
+    assert download.status_code == 200 and json.loads(download.data)["id"] == profile_id
+    assert client.get(f"/admin/profiles/{profile_id}.json?token=wrong").status_code == 404
+    assert client.get(f"/admin/profiles/{profile_id}.py?token=secret").status_code == 404
@@ -0,0 +1,110 @@
+# test_progress.py
+
+import io
+import os
+import shutil
+
+import pytest
+
+from src import flows, progress, tenants
+from src.app import create_app
+from src.data_manager import create_event, create_meet, get_event, update_event_exam_topics
+from src.progress import ProgressTracker, format_sse, sse_stream
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOPIC_A = "Algebra - numerical patterns"
+TOPIC_B = "Algebra - number relationships: divisibility"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    monkeypatch.setattr(progress, "tracker", ProgressTracker())
+    monkeypatch.setattr(flows, "tracker", progress.tracker)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    return create_app().test_client()
+
+
+def test_tracker_reports_in_order_and_stops_at_the_end():
+    tracker = ProgressTracker()
+    tracker.report(None, "saved")  # no progressId: ignored
+    tracker.report("job", "saved", files=2)
+    tracker.report("job", "partial", result=[1])
+    assert tracker.poll("job", 0) == ([("saved", {"files": 2}), ("partial", {"result": [1]})], False)
+    assert tracker.poll("job", 1) == ([("partial", {"result": [1]})], False)
+    # Nothing new: wait() gives up after the timeout.
+    assert tracker.wait("job", 2, timeout=0.01) == ([], False)
+
+    tracker.report("job", "error", message="boom")
+    tracker.report("job", "done")  # after an error nothing more is recorded
+    events, done = tracker.wait("job", 2, timeout=1)
+    assert events == [("error", {"message": "boom"})] and done
+
+
+def test_tracker_forgets_stale_jobs(monkeypatch):
+    tracker = ProgressTracker(ttl=10)
+    tracker.report("old", "saved")
+    now = progress.time.monotonic()
+    monkeypatch.setattr(progress.time, "monotonic", lambda: now + 11)
+    tracker.report("new", "saved")
+    assert tracker.poll("old", 0) == ([], False)
+
+
+def test_sse_stream_ends_with_the_job(monkeypatch):
+    tracker = ProgressTracker()
+    monkeypatch.setattr(progress, "tracker", tracker)
+    monkeypatch.setattr(progress, "KEEPALIVE_SECONDS", 0.01)
+    stream = sse_stream("job")
+    assert next(stream) == "retry: 2000\n\n"
+    assert next(stream) == ": keep-alive\n\n"
+    tracker.report("job", "tokens", count=10)
+    tracker.report("job", "done", location="/meet/1")
+    assert list(stream) == [format_sse("tokens", {"count": 10}), format_sse("done", {"location": "/meet/1"})]
+    assert format_sse("done", {"location": "/meet/1"}) == 'event: done\ndata: {"location": "/meet/1"}\n\n'
+
+
+def _exam_upload(client, meet_id, event_id, fake_run, monkeypatch):
+    monkeypatch.setattr(flows.ParseStep, "run", fake_run)
+    return client.post(f"/meet/{meet_id}/event/{event_id}/upload_exam",
+                       data={"files": [(io.BytesIO(os.urandom(64)), "page1.png")], "progressId": "job"},
+                       content_type="multipart/form-data")
+
+
+def test_failed_exam_parse_restores_earlier_topics(client, monkeypatch):
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    update_event_exam_topics(meet_id, event_id, [{"questionNumber": q, "topics": [TOPIC_A]} for q in (1, 2, 3)])
+    seen_during_parse = []
+
+    def fail_after_partial(step):
+        step._progress_callback(step.on_partial)("partial", result=[{"questionNumber": 1, "topics": [TOPIC_B]}])
+        seen_during_parse.append([q.topics for q in get_event(meet_id, event_id).examTopics])
+        raise RuntimeError("GPT call deadline exceeded")
+
+    assert _exam_upload(client, meet_id, event_id, fail_after_partial, monkeypatch).status_code == 302
+    # The partial result was committed early, then rolled back with the failure.
+    assert seen_during_parse == [[[TOPIC_B]]]
+    event = get_event(meet_id, event_id)
+    assert [(q.questionNumber, q.topics) for q in event.examTopics] == [(q, [TOPIC_A]) for q in (1, 2, 3)]
+    events, done = progress.tracker.poll("job", 0)
+    assert [stage for stage, _ in events] == ["saved", "partial", "error"] and done
+    assert events[-1][1]["message"] == "GPT call deadline exceeded"
+
+
+def test_exam_parse_commits_partial_then_full_result(client, monkeypatch):
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    full = [{"questionNumber": q, "topics": [TOPIC_B]} for q in (1, 2)]
+
+    def succeed_after_partial(step):
+        step._progress_callback(step.on_partial)("partial", result=full[:1])
+        return full
+
+    _exam_upload(client, meet_id, event_id, succeed_after_partial, monkeypatch)
+    event = get_event(meet_id, event_id)
+    assert [q.questionNumber for q in event.examTopics] == [1, 2] and event.numQuestions == 2
+    events, done = progress.tracker.poll("job", 0)
+    assert [stage for stage, _ in events] == ["saved", "partial", "merged", "committed", "done"] and done
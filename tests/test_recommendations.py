@@ -0,0 +1,21 @@
+# test_recommendations.py
+
+from src.dashboard_logic import _rank_topics
+from src.topics import build_topic_registry
+
+
+def test_sparse_topics_are_shrunk_toward_the_team_average():
+    registry = build_topic_registry([{"Algebra": ["expressions", "absolute value", "literal equations"]}])
+    expressions, absolute_value, literal = (registry.intern(f"Algebra - {t}")
+                                            for t in ("expressions", "absolute value", "literal equations"))
+    courses = {t: "Algebra" for t in (expressions, absolute_value, literal)}
+    prior = {expressions: (90, 100), absolute_value: (50, 100), literal: (80, 100)}
+
+    # One miss on an easy topic vs. a consistent struggle with a hard one.
+    correct = {expressions: 0, absolute_value: 4}
+    attempted = {expressions: 1, absolute_value: 20}
+    recs = _rank_topics(registry, correct, attempted, prior, courses, k=2)
+
+    assert [r["topic"] for r in recs] == ["Algebra - absolute value", "Algebra - expressions"]
+    assert recs[1]["rawAccuracy"] == 0.0
+    assert recs[1]["accuracy"] == 0.75
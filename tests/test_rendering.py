@@ -0,0 +1,32 @@
+# test_rendering.py
+
+import os
+
+from flask import Flask
+
+from src.rendering import cached_fragment
+
+
+def test_fragment_is_rendered_once_per_store_version(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "store.json").write_text('{"meets": []}')
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "templates" / "fragment.html").write_text("built {{ count }}")
+    app = Flask(__name__, template_folder=str(tmp_path / "templates"))
+
+    builds = []
+
+    def build_context():
+        builds.append(1)
+        return {"count": len(builds)}
+
+    with app.test_request_context():
+        assert cached_fragment("fragment.html", "key", build_context) == "built 1"
+        assert cached_fragment("fragment.html", "key", build_context) == "built 1"
+        assert cached_fragment("fragment.html", "other", build_context) == "built 2"
+
+        # save_data() swaps in a new file, which changes the store version.
+        (tmp_path / "data" / "store.tmp").write_text('{"meets": [] }')
+        os.replace(tmp_path / "data" / "store.tmp", tmp_path / "data" / "store.json")
+        assert cached_fragment("fragment.html", "key", build_context) == "built 3"
@@ -0,0 +1,94 @@
+# test_rollups.py
+
+import os
+import shutil
+
+import pytest
+
+from src import dashboard_logic, data_manager, tenants
+from src.app import create_app
+from src.data_manager import create_meet, get_meet, get_topic_registry, load_data, update_meet_topic_list
+from src.models import Meet
+from src.rollups import apply_topic_delta, topic_trends
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    return create_app().test_client()
+
+
+def test_trends_read_rollups_in_date_order():
+    data = {"meets": [
+        Meet("late", "Late", "2024-03-01"),
+        Meet("early", "Early", "2024-01-01"),
+        Meet("mid", "Mid", "2024-02-01"),
+    ]}
+    apply_topic_delta(data, "early", {}, {"Geometry - similarity": [1, 4]})
+    apply_topic_delta(data, "late", {}, {"Geometry - similarity": [3, 4]})
+    apply_topic_delta(data, "mid", {}, {"Algebra - expressions": [2, 2]})
+
+    trends = topic_trends(data, window=2)
+    similarity = trends["topics"]["Geometry - similarity"]
+    assert [m["id"] for m in trends["meets"]] == ["early", "mid", "late"]
+    assert similarity["accuracy"] == [0.25, None, 0.75]
+    assert similarity["movingAverage"] == [0.25, None, 0.5]
+
+
+def test_delta_removes_emptied_topics():
+    data = {"meets": []}
+    apply_topic_delta(data, "m", {}, {"Algebra - expressions": [1, 2]})
+    apply_topic_delta(data, "m", {"Algebra - expressions": [1, 2]}, {})
+    assert data["topicRollups"]["m"] == {}
+
+
+def test_meet_dates_must_be_iso(client):
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    with pytest.raises(ValueError):
+        create_meet("Bad Meet", "next friday")
+
+    response = client.post(f"/meet/{meet_id}/date", data={"date": "next friday"}, follow_redirects=True)
+    assert b"YYYY-MM-DD" in response.data
+    assert get_meet(meet_id).date == "2024-01-06"
+    client.post(f"/meet/{meet_id}/date", data={"date": "2024-02-03"})
+    assert get_meet(meet_id).date == "2024-02-03"
+
+    response = client.post("/add_meet", data={"title": "Another", "date": "soon"}, follow_redirects=True)
+    assert b"YYYY-MM-DD" in response.data
+    result = client.application.test_cli_runner().invoke(args=["list-seasons"])
+    assert result.exit_code == 0, result.output
+
+
+def test_trend_requests_share_one_cached_computation(client, monkeypatch):
+    create_meet("Test Meet", "2024-01-06")
+    computed = []
+    real_topic_trends = dashboard_logic.topic_trends
+    monkeypatch.setattr(dashboard_logic, "topic_trends",
+                        lambda data, window: computed.append(window) or real_topic_trends(data, window))
+
+    everything = client.get("/api/topic_trends?window=1000").json
+    for topic in ("Algebra - numerical patterns", "Geometry - angle measure: polygons", "Nonexistent"):
+        filtered = client.get(f"/api/topic_trends?window=500&topic={topic}").json
+        assert filtered["meets"] == everything["meets"]
+        assert set(filtered["topics"]) <= {topic}
+    assert computed == [dashboard_logic.MAX_TREND_WINDOW]
+
+
+def test_topic_registry_is_extended_not_rebuilt(client, monkeypatch):
+    meet_id = create_meet("Fall Meet", "2024-10-05")
+    registry = get_topic_registry(load_data())
+    similarity = registry.intern("Geometry - similarity")
+    reads = []
+    monkeypatch.setattr(data_manager, "load_default_topic_list", lambda: reads.append(1) or {})
+    assert get_topic_registry(load_data()) is registry
+
+    update_meet_topic_list(meet_id, {"Geometry": ["similarity", "tessellations"]})
+    assert get_topic_registry(load_data()) is registry
+    assert "Geometry - tessellations" in registry.labels
+    assert registry.intern("Geometry - similarity") == similarity
+    assert reads == []
@@ -0,0 +1,31 @@
+# test_roster.py
+
+import pytest
+
+from src.roster import RosterError, build_participants, read_roster_csv
+
+ROSTER_CSV = """Name,Grade,Incorrect
+Ada,Junior,"3, 7"
+Ben,senior,
+,,
+"""
+
+
+def test_csv_roster_builds_participants():
+    participants = build_participants(read_roster_csv(ROSTER_CSV), num_questions=8)
+    assert [p["studentName"] for p in participants] == ["Ada", "Ben"]
+    assert participants[0]["gradeLevel"] == "junior"
+    assert participants[0]["incorrectQuestions"] == [3, 7]
+    assert participants[0]["correctQuestions"] == [1, 2, 4, 5, 6, 8]
+    assert participants[1]["correctQuestions"] == list(range(1, 9))
+
+
+def test_invalid_rows_reject_the_whole_roster():
+    rows = [
+        {"studentName": "Ada", "gradeLevel": "junior", "incorrectList": [3, 12]},
+        {"studentName": "Ben", "gradeLevel": "grad", "incorrectList": ""},
+        {"studentName": "Cy", "gradeLevel": "senior", "incorrectList": "1"},
+    ]
+    with pytest.raises(RosterError) as excinfo:
+        build_participants(rows, num_questions=10)
+    assert len(excinfo.value.errors) == 2
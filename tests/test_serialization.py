@@ -0,0 +1,125 @@
+# test_serialization.py
+
+import os
+import shutil
+
+import pytest
+
+from src import serialization, tenants
+from src.app import create_app
+from src.data_manager import add_participant_scores, create_event, create_meet, get_event, get_meet, load_data
+from src.models import Meet
+from src.serialization import LazyMeets, StoreError, encode_store, read_store_file
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _store():
+    meets = [Meet.from_dict({"id": f"m{i}", "title": f"Meet {i}", "date": "2024-01-0%d" % (i + 1),
+                             "events": [{"id": f"e{i}", "eventName": "Individual Algebra", "numQuestions": 2,
+                                         "examTopics": [{"questionNumber": 1, "topics": ["Algebra"]}]}]})
+             for i in range(3)]
+    return {"meets": meets, "students": {"s1": {"name": "Ada"}}, "topicRollups": {}}
+
+
+def _write(path, data, store_format):
+    with open(path, "wb") as f:
+        f.write(encode_store(data, store_format))
+
+
+@pytest.mark.parametrize("store_format", serialization.FORMATS)
+def test_round_trip(tmp_path, store_format):
+    path = str(tmp_path / "store.json")
+    data = _store()
+    _write(path, data, store_format)
+    loaded = read_store_file(path)
+    assert isinstance(loaded["meets"], LazyMeets) == (store_format == "binary")
+    assert [m.to_dict() for m in loaded["meets"]] == [m.to_dict() for m in data["meets"]]
+    assert loaded["students"] == data["students"]
+
+
+def test_stdlib_and_orjson_read_each_other(tmp_path, monkeypatch):
+    path = str(tmp_path / "store.json")
+    _write(path, _store(), "binary")
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert [m.id for m in read_store_file(path)["meets"]] == ["m0", "m1", "m2"]
+
+
+def test_binary_decodes_lazily_and_reuses_records(tmp_path):
+    path = str(tmp_path / "store.json")
+    _write(path, _store(), "binary")
+    loaded = read_store_file(path)
+    meets = loaded["meets"]
+    assert meets.ids() == ["m0", "m1", "m2"]
+    assert meets._meets == [None, None, None]
+    meets[1].title = "Renamed"
+    del meets[0]
+    meets.append(Meet("m3", "Added"))
+    assert meets._meets[1] is None  # m2 untouched
+    # Replace rather than overwrite: the loaded store still maps the old file.
+    _write(path + ".new", loaded, "binary")
+    os.replace(path + ".new", path)
+    assert [(m.id, m.title) for m in read_store_file(path)["meets"]] == [
+        ("m1", "Renamed"), ("m2", "Meet 2"), ("m3", "Added")]
+
+
+def test_malformed_binary(tmp_path):
+    path = str(tmp_path / "store.json")
+    with open(path, "wb") as f:
+        f.write(serialization.BINARY_MAGIC + b"\x01")
+    with pytest.raises(StoreError):
+        read_store_file(path)
+
+
+@pytest.mark.parametrize("store_format", serialization.FORMATS)
+def test_malformed_meet_records_raise_store_errors(tmp_path, monkeypatch, store_format):
+    path = str(tmp_path / "store.json")
+    data = _store()
+    # A meet record without its id, as a hand edit or a bad migration could leave it.
+    with monkeypatch.context() as patched:
+        patched.setattr(Meet, "to_dict", lambda meet: {"title": meet.title})
+        _write(path, data, store_format)
+    if store_format == "binary":
+        meets = read_store_file(path)["meets"]  # the records are only decoded when used
+        with pytest.raises(StoreError, match="Meet m1 .* could not be decoded"):
+            meets[1]
+    else:
+        with pytest.raises(StoreError, match="could not be decoded"):
+            read_store_file(path)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        encode_store(_store(), "yaml")
+
+
+def test_store_switches_format_on_save(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    meet_id = create_meet("Pretty Meet", "2024-01-06")
+    monkeypatch.setattr(serialization, "STORE_FORMAT", "binary")
+    event_id = create_event(meet_id, "Individual Algebra")
+    with open(os.path.join("data", "store.json"), "rb") as f:
+        assert serialization.detect_format(f.read(16)) == "binary"
+    add_participant_scores(meet_id, event_id, [{"studentName": "Ada", "gradeLevel": "junior",
+                                                "correctQuestions": [1], "incorrectQuestions": []}])
+    assert isinstance(load_data()["meets"], LazyMeets)
+    assert get_meet(meet_id).title == "Pretty Meet"
+    assert get_event(meet_id, event_id).participants[0].studentName == "Ada"
+    assert get_meet("missing") is None
+
+
+def test_a_bad_meet_record_fails_the_request_as_a_store_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    data = dict(_store(), studentIndex={})
+    with monkeypatch.context() as patched:
+        patched.setattr(Meet, "to_dict", lambda meet: {"title": meet.title})
+        _write(os.path.join("data", "store.json"), data, "binary")
+
+    response = create_app().test_client().get("/")
+    assert response.status_code == 500
+    assert b"could not be decoded" in response.data and b"Nothing has been written over it" in response.data
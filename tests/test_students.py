@@ -0,0 +1,82 @@
+# test_students.py
+
+import os
+import shutil
+
+import pytest
+
+from src import tenants
+from src.app import create_app
+from src.data_manager import (StoreError, add_participant_scores, create_event, create_meet, delete_participant,
+                              load_data)
+from src.models import Meet
+from src.roster import RosterError, build_participants
+from src.students import migrate_students
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _participant(name, grade):
+    return {"studentName": name, "gradeLevel": grade, "correctQuestions": [], "incorrectQuestions": []}
+
+
+def test_migration_merges_grade_changes_across_meets():
+    data = {"meets": [Meet.from_dict(meet) for meet in [
+        {"id": "m1", "events": [{"id": "e1", "participants": [
+            _participant("Ada", "junior"), _participant("Ada", "senior")]}]},
+        {"id": "m2", "events": [{"id": "e2", "participants": [
+            _participant("ada", "senior"), _participant("Ben", "freshman")]}]},
+    ]]}
+    assert migrate_students(data)
+    first, second = data["meets"][0].events[0].participants
+    later_ada, ben = data["meets"][1].events[0].participants
+
+    # Two Adas in one meet are different students; the senior one is seen again.
+    assert first.studentId != second.studentId
+    assert later_ada.studentId == second.studentId
+    assert data["studentIndex"][second.studentId] == [["m1", "e1"], ["m2", "e2"]]
+    assert data["students"][ben.studentId]["gradeLevel"] == "freshman"
+    assert not migrate_students(data)
+
+
+def test_corrupt_store_is_never_overwritten(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    create_meet("Test Meet", "2024-01-06")
+    with open(os.path.join("data", "store.json"), "rb") as f:
+        truncated = f.read()[:40]
+    with open(os.path.join("data", "store.json"), "wb") as f:
+        f.write(truncated)
+
+    response = create_app().test_client().get("/")
+    assert response.status_code == 500 and b"could not be decoded" in response.data
+    with pytest.raises(StoreError):
+        create_meet("Another Meet", "2024-02-03")
+    with open(os.path.join("data", "store.json"), "rb") as f:
+        assert f.read() == truncated
+
+
+def test_removing_a_duplicate_keeps_the_student_indexed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    meet_id = create_meet("Test Meet", "2024-01-06")
+    event_id = create_event(meet_id, "Individual Algebra")
+    add_participant_scores(meet_id, event_id, [_participant("Ada", "junior")])
+    add_participant_scores(meet_id, event_id, [_participant("Ada", "junior")])  # submitted twice
+    student_id = next(iter(load_data()["students"]))
+
+    assert delete_participant(meet_id, event_id, "Ada", "junior")
+    assert load_data()["studentIndex"][student_id] == [[meet_id, event_id]]
+    assert delete_participant(meet_id, event_id, "Ada", "junior")
+    assert load_data()["studentIndex"][student_id] == []
+
+
+def test_roster_rows_match_names_like_the_registry():
+    rows = [{"studentName": "Ann", "gradeLevel": "junior"}, {"studentName": " ann ", "gradeLevel": "Junior"},
+            {"studentName": "Ann", "gradeLevel": "senior"}]
+    with pytest.raises(RosterError) as excinfo:
+        build_participants(rows, num_questions=5)
+    assert excinfo.value.errors == ["Row 2 (ann): listed more than once"]
@@ -0,0 +1,64 @@
+# test_tenants.py
+
+import os
+import shutil
+
+import pytest
+
+from src import data_manager, tenants
+from src.app import create_app
+from src.data_manager import create_meet, load_data
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "TENANTS_ROOT", os.path.join("data", "tenants"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    tenants.create_tenant("alpha")
+    tenants.create_tenant("beta")
+    return tmp_path
+
+
+def test_tenants_have_separate_stores(workdir):
+    with tenants.tenant_context("alpha"):
+        create_meet("Alpha Meet", "2024-01-15")
+    with tenants.tenant_context("beta"):
+        assert load_data()["meets"] == []
+    assert load_data()["meets"] == []
+    with tenants.tenant_context("alpha"):
+        assert [m.title for m in load_data()["meets"]] == ["Alpha Meet"]
+    with pytest.raises(KeyError):
+        with tenants.tenant_context("gamma"):
+            pass
+    with pytest.raises(ValueError):
+        tenants.create_tenant("Bad Id")
+
+
+def test_url_prefix_selects_tenant(workdir):
+    client = create_app().test_client()
+    response = client.post("/t/alpha/add_meet", data={"title": "Alpha Meet"})
+    assert response.headers["Location"].startswith("/t/alpha/meet/")
+    page = client.get("/t/alpha/").get_data(as_text=True)
+    assert "Alpha Meet" in page
+    assert 'href="/t/alpha/dashboard"' in page
+    assert "Alpha Meet" not in client.get("/t/beta/").get_data(as_text=True)
+    assert "Alpha Meet" not in client.get("/").get_data(as_text=True)
+    assert client.get("/t/gamma/").status_code == 404
+
+
+def test_loaded_stores_are_bounded(workdir, monkeypatch):
+    monkeypatch.setattr(data_manager, "STORE_CACHE_SIZE", 2)
+    monkeypatch.setattr(data_manager, "_loaded_stores", type(data_manager._loaded_stores)())
+    for tenant_id in ("alpha", "beta", None):
+        with tenants.tenant_context(tenant_id):
+            load_data()
+    assert list(data_manager._loaded_stores) == [os.path.abspath(os.path.join("data", "tenants", "beta", "store.json")),
+                                                 os.path.abspath(os.path.join("data", "store.json"))]
+    with tenants.tenant_context("beta"):
+        assert load_data() is load_data()
+        create_meet("Beta Meet")
+        assert [m.title for m in load_data()["meets"]] == ["Beta Meet"]
@@ -0,0 +1,28 @@
+# test_topics.py
+
+from src.topics import build_topic_registry, build_topic_vocabulary
+
+TOPIC_LIST = {
+    "Geometry": ["similarity", "area of polygons"],
+    "Algebra": ["percents, percent of change", "expressions"],
+}
+
+
+def test_vocabulary_ids_are_stable_when_filtered():
+    full = build_topic_vocabulary(TOPIC_LIST)
+    geometry_only = build_topic_vocabulary(TOPIC_LIST, ["Geometry"])
+    assert full[0] == "Algebra - percents, percent of change"
+    assert geometry_only == {2: "Geometry - similarity", 3: "Geometry - area of polygons"}
+
+
+def test_near_duplicates_share_an_id():
+    registry = build_topic_registry([TOPIC_LIST])
+    assert registry.intern("Geometry - Similarity ") == registry.intern("Geometry - similarity")
+    assert registry.label(registry.intern("geometry-similarity")) == "Geometry - similarity"
+
+
+def test_snap_matches_fuzzy_and_unprefixed_topics():
+    registry = build_topic_registry([TOPIC_LIST])
+    assert registry.snap("Algebra - percent, percents of change") == "Algebra - percents, percent of change"
+    assert registry.snap("area of polygon", ["Geometry"]) == "Geometry - area of polygons"
+    assert registry.snap("probability", ["Algebra"]) == "Algebra - probability"
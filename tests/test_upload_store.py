@@ -0,0 +1,133 @@
+# test_upload_store.py
+
+import hashlib
+import io
+import os
+import shutil
+import time
+
+import pytest
+
+from src import tenants
+from src.data_manager import add_exam_files, add_score_files, create_event, create_meet, load_data
+from src.seasons import archive_season
+from src.upload_store import (PARSE_CACHE_DIR, PARTIAL_DIR, PREVIEW_CACHE_DIR, cached_parse, collect_garbage,
+                              content_hash_of, save_stream, store_cached_parse, upload_path, upload_root)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tenants, "DEFAULT_UPLOAD_ROOT", str(tmp_path / "uploads"))
+    os.makedirs("data")
+    shutil.copy(os.path.join(REPO_ROOT, "data", "topic_list.json"), "data")
+    return tmp_path
+
+
+def _save(content, filename="scan.jpg", category="exams"):
+    return save_stream(io.BytesIO(content), filename, category)
+
+
+def test_duplicate_uploads_are_stored_once():
+    path, duplicate = _save(b"page one", "Page 1.JPEG")
+    sha = hashlib.sha256(b"page one").hexdigest()
+    assert path == os.path.join("exams", sha[:2], sha + ".jpg") and not duplicate
+    assert content_hash_of(path) == sha
+
+    # The same bytes under another name (and extension alias) are the same upload.
+    assert _save(b"page one", "copy.jpg") == (path, True)
+    other, duplicate = _save(b"page two")
+    assert other != path and not duplicate
+    with open(upload_path(path), "rb") as f:
+        assert f.read() == b"page one"
+    # No temporary files are left behind.
+    leftovers = [name for _, _, names in os.walk(upload_root()) for name in names if name.startswith(".incoming")]
+    assert leftovers == []
+    assert content_hash_of("exams/legacy-uuid.png") is None
+
+
+def test_parse_cache_is_reused_per_content_and_context():
+    first, _ = _save(b"page one")
+    second, _ = _save(b"page two")
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return [{"questionNumber": len(calls)}]
+
+    assert cached_parse("exam", [first, second], {"vocab": 1}, parse) == [{"questionNumber": 1}]
+    # Same files (in any order) and context: served from the cache.
+    assert cached_parse("exam", [second, first], {"vocab": 1}, parse) == [{"questionNumber": 1}]
+    # Another vocabulary, another kind of parse or other files: parsed again.
+    assert cached_parse("exam", [first, second], {"vocab": 2}, parse) == [{"questionNumber": 2}]
+    assert cached_parse("scores", [first, second], {"vocab": 1}, parse) == [{"questionNumber": 3}]
+    assert cached_parse("exam", [first], {"vocab": 1}, parse) == [{"questionNumber": 4}]
+    # Legacy (not content-addressed) paths are never cached.
+    cached_parse("exam", ["exams/legacy-uuid.png"], {"vocab": 1}, parse)
+    cached_parse("exam", ["exams/legacy-uuid.png"], {"vocab": 1}, parse)
+    assert len(calls) == 6
+
+    def failing_parse():
+        raise RuntimeError("GPT is down")
+
+    third, _ = _save(b"page three")
+    with pytest.raises(RuntimeError):
+        cached_parse("exam", [third], {}, failing_parse)
+    assert cached_parse("exam", [third], {}, parse) == [{"questionNumber": 7}]
+
+
+def _preview(relative_path):
+    sha = content_hash_of(relative_path)
+    path = os.path.join(upload_root(), PREVIEW_CACHE_DIR, "thumb", sha[:2], sha + ".jpg")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"jpeg")
+    return os.path.relpath(path, upload_root())
+
+
+def test_garbage_collection_keeps_everything_still_in_use():
+    meet_id = create_meet("New Meet", "2023-10-01")
+    event_id = create_event(meet_id, "Individual Algebra")
+    exam, _ = _save(b"exam page")
+    add_exam_files(meet_id, event_id, [exam])
+    # Referenced only from an archived season.
+    old_meet = create_meet("Old Meet", "2022-10-01")
+    old_event = create_event(old_meet, "Individual Algebra")
+    archived, _ = _save(b"old score sheet", category="scores")
+    add_score_files(old_meet, old_event, [archived])
+    assert archive_season("2022-23") == 1
+
+    orphan, _ = _save(b"deleted event's page")
+    store_cached_parse("exam", [exam], {}, ["live"])
+    store_cached_parse("exam", [orphan], {}, ["stale"])
+    live_preview, stale_preview = _preview(exam), _preview(orphan)
+    partial = os.path.join(upload_root(), PARTIAL_DIR, "abc123", "data")
+    os.makedirs(os.path.dirname(partial))
+    with open(partial, "wb") as f:
+        f.write(b"half a scan")
+
+    # Everything is old enough to collect, except one upload that isn't recorded yet.
+    hour_ago = time.time() - 2 * 3600
+    for dirpath, _, names in os.walk(upload_root()):
+        for name in names:
+            os.utime(os.path.join(dirpath, name), (hour_ago, hour_ago))
+    young, _ = _save(b"upload in progress")
+
+    cache_dir = os.path.join(upload_root(), PARSE_CACHE_DIR, "exam")
+    stale_cache = [os.path.join(PARSE_CACHE_DIR, "exam", name) for name in os.listdir(cache_dir)
+                   if "stale" in open(os.path.join(cache_dir, name), encoding="utf-8").read()]
+    expected = {orphan, stale_preview, *stale_cache}
+
+    assert set(collect_garbage(load_data(), dry_run=True)) == expected
+    assert os.path.exists(upload_path(orphan))  # a dry run deletes nothing
+
+    assert set(collect_garbage(load_data())) == expected
+    for path in (exam, archived, young, live_preview, os.path.relpath(partial, upload_root())):
+        assert os.path.exists(upload_path(path)), path
+    for path in expected:
+        assert not os.path.exists(upload_path(path)), path
+    # Emptied folders go too.
+    assert not os.path.exists(os.path.dirname(upload_path(orphan)))
+    assert collect_garbage(load_data()) == []